@@ -0,0 +1,241 @@
+"""
+Conversion pipeline benchmarks on synthetic connectivity stacks.
+
+Run from the repository root:
+
+    python benchmarks/bench_conversion.py --rois 500 --subjects 64 --features degree,eigenvector
+
+Compares CPU thread counts and (when available) the CUDA device policy for the
+thresholding, node-feature and edge-extraction stages, and reports subjects/second.
+Then times each sparsifier (and the per-subject threshold_proportional loop it replaced)
+and reports the edges it keeps.
+
+With --calibrate, instead measures the coefficients of the conversion cost model
+(conversion/estimate.py) on this machine and saves them for the resource estimator:
+
+    python benchmarks/bench_conversion.py --calibrate --rois 400 --subjects 32
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add src/utils to the Python path, as when the conversion script is run directly
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src", "utils")))
+
+from conversion.runtime import DevicePolicy, allocated_cpus, configure_blas_threads
+
+configure_blas_threads()
+
+import numpy as np
+import torch
+
+from conversion.features import extract_features, parse_feature_names
+from conversion.graph_index import edges_from_stack
+from conversion.estimate import DEFAULT_COST_MODEL_PATH, load_cost_model, save_cost_model
+from conversion.features import FEATURE_EXTRACTORS
+from conversion.sparsify import SPARSIFIERS, sparsifier_tag, threshold_proportional
+from conversion.stats import chunk_stats
+
+
+def synthetic_stack(subjects: int, rois: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    stack = rng.standard_normal((subjects, rois, rois))
+    return (stack + stack.transpose(0, 2, 1)) / 2
+
+
+def run_pipeline(stack: np.ndarray, policy: DevicePolicy, features, threshold: float, chunk_size: int) -> dict:
+    timings = {"threshold": 0.0, "features": 0.0, "edges": 0.0}
+    for start in range(0, len(stack), chunk_size):
+        chunk = stack[start:start + chunk_size]
+        t0 = time.perf_counter()
+        thresholded = SPARSIFIERS["proportional"].fn(chunk, threshold=threshold)
+        t1 = time.perf_counter()
+        policy.to_host(extract_features(policy.to_device(thresholded), features))
+        t2 = time.perf_counter()
+        edges_from_stack(thresholded)
+        t3 = time.perf_counter()
+        timings["threshold"] += t1 - t0
+        timings["features"] += t2 - t1
+        timings["edges"] += t3 - t2
+    return timings
+
+
+def bench_device_modes(args) -> None:
+    stack = synthetic_stack(args.subjects, args.rois)
+    features = parse_feature_names(args.features)
+    modes = [("cpu", 1)]
+    if allocated_cpus() > 1:
+        modes.append(("cpu", allocated_cpus()))
+    if torch.cuda.is_available():
+        modes.append(("cuda", allocated_cpus()))
+
+    print(f"{args.subjects} subjects x {args.rois} ROIs, features={','.join(features)}, chunk={args.chunk_size}")
+    print(f"{'mode':<14}{'threshold s':>12}{'features s':>12}{'edges s':>10}{'subj/s':>10}")
+    for device, threads in modes:
+        policy = DevicePolicy(device, num_threads=threads)
+        run_pipeline(stack[:args.chunk_size], policy, features, args.threshold, args.chunk_size)  # warm-up
+        t = run_pipeline(stack, policy, features, args.threshold, args.chunk_size)
+        total = sum(t.values())
+        label = f"{device} x{threads}"
+        print(f"{label:<14}{t['threshold']:>12.3f}{t['features']:>12.3f}{t['edges']:>10.3f}{args.subjects / total:>10.1f}")
+
+
+def bench_sparsifiers(args) -> None:
+    stack = synthetic_stack(args.subjects, args.rois, seed=1)
+    params = {"threshold": args.threshold, "abs_threshold": args.abs_threshold, "knn": args.knn}
+    print(f"\n{'sparsifier':<22}{'s':>10}{'subj/s':>10}{'edges/subj':>12}{'min edges':>11}")
+
+    def report(label: str, elapsed: float, thresholded: np.ndarray, positive_only: bool) -> None:
+        _, counts = edges_from_stack(thresholded, positive_only=positive_only)
+        print(f"{label:<22}{elapsed:>10.3f}{args.subjects / elapsed:>10.1f}{counts.mean():>12.1f}{counts.min():>11d}")
+
+    t0 = time.perf_counter()
+    reference = np.stack([threshold_proportional(W, args.threshold) for W in stack])
+    report("proportional (loop)", time.perf_counter() - t0, reference, True)
+    for name in args.sparsifiers.split(","):
+        sparsifier = SPARSIFIERS[name]
+        t0 = time.perf_counter()
+        thresholded = np.concatenate([sparsifier.fn(stack[s:s + args.chunk_size], **params)
+                                      for s in range(0, len(stack), args.chunk_size)])
+        report(f"{name} ({sparsifier_tag(name, **params)})", time.perf_counter() - t0, thresholded,
+               sparsifier.positive_only)
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def probe(spec: str) -> None:
+    """
+    Runs in a fresh process and prints its peak memory before and after one step:
+    "chunk:<size>:<rois>" converts one chunk with every feature, "load:<path>" loads an input.
+    """
+    import scipy.io
+
+    kind, *rest = spec.split(":", 1)
+    base = _peak_rss_mb()
+    if kind == "load":
+        scipy.io.loadmat(rest[0])
+    else:
+        size, rois = (int(v) for v in rest[0].split(":"))
+        chunk = synthetic_stack(size, rois)
+        thresholded = SPARSIFIERS["proportional"].fn(chunk)
+        extract_features(torch.from_numpy(thresholded), list(FEATURE_EXTRACTORS))
+        edges_from_stack(thresholded)
+        chunk_stats(chunk, thresholded)
+    print(json.dumps({"base": base, "peak": _peak_rss_mb()}))
+
+
+def _run_probe(spec: str) -> dict:
+    out = subprocess.run([sys.executable, __file__, "--probe", spec], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _per_subject(fn, stack: np.ndarray, repeats: int = 2) -> float:
+    fn(stack[:2])  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn(stack)
+    return (time.perf_counter() - t0) / repeats / len(stack)
+
+
+def calibrate(args) -> None:
+    """Fits the cost model to this machine and saves it where the estimator looks for it."""
+    import scipy.io
+
+    model = load_cost_model(args.calibrate_path)
+    sizes = sorted({max(20, args.rois // 2), args.rois})
+    policy = DevicePolicy("cpu", num_threads=1)
+    timings = {}
+    for n in sizes:
+        stack = synthetic_stack(args.subjects, n)
+        thresholded = SPARSIFIERS["proportional"].fn(stack, threshold=args.threshold)
+        W = torch.from_numpy(thresholded)
+        for name, sparsifier in SPARSIFIERS.items():
+            timings[("sparsify", name, n)] = _per_subject(lambda s: sparsifier.fn(s, threshold=args.threshold), stack)
+        for name in FEATURE_EXTRACTORS:
+            timings[("features", name, n)] = _per_subject(lambda s: extract_features(s, [name]), W)
+        timings[("edges", "", n)] = _per_subject(edges_from_stack, thresholded)
+        timings[("stats", "", n)] = _per_subject(lambda s: chunk_stats(s, s), thresholded)
+
+    def fit(stage: str, name: str, exponent: int) -> float:
+        return sum(timings[(stage, name, n)] for n in sizes) / sum(n ** exponent for n in sizes)
+
+    model["sparsify_n2"] = {name: fit("sparsify", name, 2) for name in SPARSIFIERS}
+    model["edges_n2"] = fit("edges", "", 2)
+    model["stats_n2"] = fit("stats", "", 2)
+    for name, (_, exponent) in model["features"].items():
+        model["features"][name] = [fit("features", name, exponent), exponent]
+
+    cpus = allocated_cpus()
+    if cpus > 1:
+        W = torch.from_numpy(SPARSIFIERS["proportional"].fn(synthetic_stack(args.subjects, args.rois)))
+        cubic = [n for n, (_, p) in model["features"].items() if p >= 3]
+        single = _per_subject(lambda s: extract_features(s, cubic), W)
+        DevicePolicy("cpu", num_threads=cpus)
+        parallel = _per_subject(lambda s: extract_features(s, cubic), W)
+        model["parallel_efficiency"] = min(1.0, max(0.05, (single / parallel - 1) / (cpus - 1)))
+        policy = DevicePolicy("cpu", num_threads=1)
+
+    matrix_mb = args.rois ** 2 * 8 / 2 ** 20
+    small, large = _run_probe(f"chunk:4:{args.rois}"), _run_probe(f"chunk:16:{args.rois}")
+    model["chunk_factor"] = max(1.0, (large["peak"] - small["peak"]) / (12 * matrix_mb))
+    model["base_mb"] = small["base"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conn.mat")
+        stack = synthetic_stack(args.subjects, args.rois).transpose(1, 2, 0)
+        scipy.io.savemat(path, {"conn": stack}, do_compression=True)
+        t0 = time.perf_counter()
+        scipy.io.loadmat(path)
+        model["load_mb_per_s"] = stack.nbytes / 2 ** 20 / (time.perf_counter() - t0)
+        loaded = _run_probe(f"load:{path}")
+        model["load_factor"] = max(1.0, (loaded["peak"] - loaded["base"]) / (stack.nbytes / 2 ** 20))
+
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import numpy, scipy.io, torch, torch_geometric"], check=True)
+    model["startup_s"] = time.perf_counter() - t0
+    model["calibrated"] = {"host": os.uname().nodename, "date": time.strftime("%Y-%m-%d"), "rois": sizes,
+                           "cpus": cpus}
+    print(json.dumps(model, indent=2))
+    print(f"Saved cost model to {save_cost_model(model, args.calibrate_path)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the .mat -> .pt conversion stages.")
+    parser.add_argument("--rois", type=int, default=200)
+    parser.add_argument("--subjects", type=int, default=32)
+    parser.add_argument("--chunk_size", type=int, default=8)
+    parser.add_argument("--threshold", type=float, default=0.05)
+    parser.add_argument("--abs_threshold", type=float, default=0.3)
+    parser.add_argument("--knn", type=int, default=10)
+    parser.add_argument("--features", type=str, default="degree,strength,clustering,eigenvector")
+    parser.add_argument("--sparsifiers", type=str, default=",".join(SPARSIFIERS))
+    parser.add_argument("--calibrate", action="store_true", help="Fit and save the resource estimator's cost model.")
+    parser.add_argument("--calibrate_path", type=str, default=DEFAULT_COST_MODEL_PATH)
+    parser.add_argument("--probe", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.probe:
+        probe(args.probe)
+        return
+    if args.calibrate:
+        calibrate(args)
+        return
+    bench_device_modes(args)
+    bench_sparsifiers(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Job submission throughput on the local SLURM emulator.
+
+Run from the repository root (stdlib and PyYAML only, no cluster needed):
+
+    python benchmarks/bench_scheduler.py --jobs 200 --cpus 8 --sleep 0.05
+
+Renders and submits --jobs separate jobs, then the same work as one array job, and
+reports tasks submitted per second, time to drain the queue and the cost of a status poll.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from utils import scheduler
+from utils.commands import submit_slurm
+from utils.scheduler import LocalSlurmEmulator
+
+TEMPLATE = "#!/bin/bash\n#SBATCH --job-name bench\n#SBATCH --gpus 1\n\n#COMMAND_PLACEHOLDER\n"
+
+
+def bench(args, workdir: str, array: bool) -> None:
+    backend = LocalSlurmEmulator(cpus=args.cpus, mem=f"{args.cpus}G")
+    scheduler.set_backend(backend)
+    template = os.path.join(workdir, "template.sh")
+    with open(template, "w") as f:
+        f.write(TEMPLATE)
+    cfg = {"job_name": "bench", "cpus": 1, "mem": "1G", "output": os.path.join(workdir, "bench-%j.out")}
+    command = f"sleep {args.sleep}"
+
+    t0 = time.perf_counter()
+    if array:
+        cfg["additional"] = f"--array=0-{args.jobs - 1}"
+        results = [submit_slurm(template, command, cfg, os.path.join(workdir, "jobs"), "env")]
+    else:
+        results = [submit_slurm(template, command, cfg, os.path.join(workdir, "jobs"), "env") for _ in range(args.jobs)]
+    t1 = time.perf_counter()
+    ids = [r.job_id for r in results if r.ok]
+    polls, poll_time = 0, 0.0
+    while backend.queue(ids):
+        p0 = time.perf_counter()
+        backend.accounting(ids)
+        poll_time += time.perf_counter() - p0
+        polls += 1
+        time.sleep(0.05)
+    t2 = time.perf_counter()
+    failed = [j for j in backend.accounting(ids) if j.state != "COMPLETED"]
+    backend.close()
+
+    label = "1 array" if array else f"{args.jobs} jobs"
+    ideal = args.jobs * args.sleep / args.cpus
+    print(f"{label:<12}{args.jobs / (t1 - t0):>12.1f}{t2 - t0:>10.2f}{ideal:>10.2f}"
+          f"{1000 * poll_time / max(polls, 1):>12.2f}{len(failed):>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark job submission on the local SLURM emulator.")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--cpus", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sleep", type=float, default=0.05, help="Run time of each job in seconds.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_scheduler_")
+    try:
+        os.makedirs(os.path.join(workdir, "bin"))
+        with open(os.path.join(workdir, "bin", "conda"), "w") as f:
+            f.write('#!/bin/sh\nshift 3\nexec "$@"\n')
+        os.chmod(os.path.join(workdir, "bin", "conda"), 0o755)
+        # The rendered command is "srun conda run -n ENV ..."; a stub conda keeps the measurement on the scheduler
+        os.environ["PATH"] = f"{os.path.join(workdir, 'bin')}{os.pathsep}{os.environ['PATH']}"
+        print(f"{args.jobs} tasks of {args.sleep}s on {args.cpus} CPUs")
+        print(f"{'submit':<12}{'tasks/s':>12}{'drain s':>10}{'ideal s':>10}{'poll ms':>12}{'failed':>8}")
+        bench(args, workdir, array=False)
+        bench(args, workdir, array=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,15 @@ import os
 # Add src to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
 
-from PyQt5.QtWidgets import QApplication
-from ui.main_window import MainWindow
-
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Headless mode: the CLI never imports PyQt5
+        from cli import main as cli_main
+        sys.exit(cli_main())
+
+    from PyQt5.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     w = MainWindow()
     w.resize(1000, 700)
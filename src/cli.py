@@ -0,0 +1,586 @@
+import argparse
+import itertools
+import os
+import shlex
+import subprocess
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import yaml
+
+# Qt-free imports only: the CLI must start without PyQt5 or a display.
+from utils.config import load_config
+from utils.commands import (
+    CONVERSION_SLURM_TEMPLATE, DEFAULT_SPARSIFIER, MODEL_MAP, SPARSIFIER_PARAMS, build_conversion_command,
+    build_training_command, coerce_param, conda_env_name, conda_wrap, conversion_params, load_training_params,
+    submit_slurm
+)
+from utils import crossval, scheduler
+from utils.conversion.estimate import estimate_conversion
+from utils.executor import ProcessExecutor
+from utils.registry import RunRecord, RunRegistry, open_registry, registry_path
+
+
+class Run(NamedTuple):
+    """One fully resolved conversion or training launch."""
+    name: str
+    kind: str
+    command: str
+    use_slurm: bool
+    template: str
+    params: Dict[str, Any] = {}
+    datasets: List[str] = []
+
+
+def _expand_inputs(paths: Sequence[str]) -> List[str]:
+    """Expands directories to the .mat files they contain, like the GUI's "Add folder"."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, n) for n in sorted(os.listdir(path)) if n.lower().endswith(".mat"))
+        else:
+            files.append(path)
+    return files
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return [str(v) for v in value]
+
+
+def _use_slurm(config: Dict[str, Any], section: str, opts: Dict[str, Any]) -> bool:
+    if opts.get("slurm") is not None:
+        return bool(opts["slurm"])
+    return bool(config.get(section, {}).get("use_slurm_by_default", False))
+
+
+def plan_convert(config: Dict[str, Any], opts: Dict[str, Any], name: str = "convert") -> Run:
+    script = opts.get("script") or config["conversion"]["script_path"]
+    inputs = _expand_inputs(_as_list(opts.get("inputs")))
+    if not script:
+        raise ValueError(f"{name}: no conversion script configured")
+    if not inputs:
+        raise ValueError(f"{name}: no .mat inputs given")
+    if not opts.get("labels"):
+        raise ValueError(f"{name}: no labels file given")
+    extra_args = opts.get("extra_args") or []
+    if isinstance(extra_args, str):
+        extra_args = extra_args.split()
+    sparsifier = opts.get("sparsifier") or DEFAULT_SPARSIFIER
+    if sparsifier not in SPARSIFIER_PARAMS:
+        raise ValueError(f"{name}: unknown sparsifier '{sparsifier}'")
+    # The sparsifier's parameter is given under its own option name (threshold, abs_threshold, knn)
+    sparsifier_value = opts.get(SPARSIFIER_PARAMS[sparsifier][0].lstrip("-"))
+    command = build_conversion_command(
+        script, inputs, opts["labels"], opts.get("output_dir"),
+        str(opts.get("rois", 500)),
+        node_features=_as_list(opts.get("node_features")) or None,
+        spectral_dim=opts.get("spectral_dim"),
+        checkpoint_every=opts.get("checkpoint_every"),
+        resume=bool(opts.get("resume", False)),
+        sparsifier=sparsifier,
+        sparsifier_value=sparsifier_value,
+        append_to=opts.get("append"),
+        extra_args=extra_args,
+    )
+    params = conversion_params(inputs, opts["labels"], opts.get("output_dir"),
+                               opts.get("rois", 500), _as_list(opts.get("node_features")), opts.get("spectral_dim"),
+                               extra_args, sparsifier, sparsifier_value, opts.get("append"))
+    return Run(name, "conversion", command, _use_slurm(config, "slurm_conversion", opts), CONVERSION_SLURM_TEMPLATE,
+               params, [*inputs, opts["labels"]])
+
+
+def plan_train(config: Dict[str, Any], opts: Dict[str, Any], name: str = "train") -> Run:
+    script = opts.get("script") or config["training"]["script_path"]
+    if not script:
+        raise ValueError(f"{name}: no training script configured")
+    params: Dict[str, Any] = {}
+    try:
+        params.update({k: v for k, v in load_training_params().items() if k != "--path"})
+    except (OSError, ValueError):
+        pass
+    params.update({(k if k.startswith("--") else f"--{k}"): v for k, v in (opts.get("params") or {}).items()})
+    if opts.get("data"):
+        params["--data"] = os.path.basename(opts["data"])
+        if os.path.dirname(opts["data"]):
+            params["--path"] = os.path.dirname(opts["data"])
+    if opts.get("path"):
+        params["--path"] = opts["path"]
+    if opts.get("model"):
+        params["--model"] = MODEL_MAP.get(opts["model"], opts["model"])
+    if not params.get("--data"):
+        raise ValueError(f"{name}: no dataset (.pt) given")
+    use_slurm = _use_slurm(config, "slurm_training", opts)
+    command = build_training_command(script, params, use_slurm=use_slurm)
+    dataset = os.path.join(params.get("--path", ""), params["--data"])
+    return Run(name, "training", command, use_slurm, script, params, [dataset])
+
+
+def expand_batch(config: Dict[str, Any], batch: Dict[str, Any]) -> List[Run]:
+    """
+    Resolves a batch file into runs. Each entry of `runs` is merged over `defaults`;
+    a training entry with a `grid` of parameter lists expands to their cartesian product.
+    """
+    defaults = batch.get("defaults") or {}
+    runs: List[Run] = []
+    for n, entry in enumerate(batch.get("runs") or []):
+        opts = {**defaults, **entry}
+        kind = opts.get("kind", "train")
+        name = str(opts.get("name") or f"{kind}{n}")
+        if kind == "convert":
+            runs.append(plan_convert(config, opts, name))
+            continue
+        if kind != "train":
+            raise ValueError(f"{name}: unknown run kind '{kind}' (expected convert or train)")
+        grid = opts.get("grid") or {}
+        keys = list(grid)
+        for values in itertools.product(*(grid[k] for k in keys)):
+            point = dict(zip(keys, values))
+            point_opts = {**opts, "params": {**(opts.get("params") or {}), **point}}
+            suffix = "_".join(f"{k.lstrip('-')}{v}" for k, v in point.items())
+            runs.append(plan_train(config, point_opts, f"{name}_{suffix}" if suffix else name))
+    return runs
+
+
+def check_duplicate(registry: RunRegistry, run: Run) -> List[RunRecord]:
+    """Warns about earlier runs of the same configuration on the same data and returns them."""
+    hash_, _ = registry.fingerprint(run.kind, run.params, run.datasets)
+    earlier = registry.find_by_hash(hash_)
+    if earlier:
+        print(f"warning: [{run.name}] identical configuration already run as {earlier[0].describe()}", file=sys.stderr)
+    return earlier
+
+
+def execute(config: Dict[str, Any], run: Run, log_path: Optional[str] = None,
+            registry: Optional[RunRegistry] = None) -> int:
+    """
+    Submits a SLURM run or executes a local one; local output is streamed or written to log_path.
+    Launches are recorded in the registry when one is given.
+    """
+    env_name = conda_env_name(config)
+    hash_, checksum = registry.fingerprint(run.kind, run.params, run.datasets) if registry else (None, None)
+    if run.use_slurm:
+        slurm_cfg = dict(config.get(f"slurm_{run.kind}", {}))
+        slurm_cfg.setdefault("job_name", run.name)
+        result = submit_slurm(run.template, run.command, slurm_cfg, config["jobs_dir"], env_name)
+        status = f"submitted job {result.job_id}" if result.ok else f"SLURM submit failed: {result.message.strip()}"
+        print(f"[{run.name}] {status}")
+        if registry and result.ok:
+            registry.start(run.kind, run.name, run.command, run.params, hash_, checksum, "slurm",
+                           job_id=result.job_id, log_path=slurm_cfg.get("output"))
+        return 0 if result.ok else 1
+
+    run_id = registry.start(run.kind, run.name, run.command, run.params, hash_, checksum, "local",
+                            log_path=log_path) if registry else None
+    executor = ProcessExecutor(conda_wrap(run.command, env_name), working_dir=config.get("workspace_dir"))
+    out = open(log_path, "w", encoding="utf-8") if log_path else sys.stdout
+    lines: List[str] = []
+    try:
+        code = 1
+        for line, code in executor.run():
+            if code == -1:
+                out.write(line)
+                lines.append(line)
+    finally:
+        if log_path:
+            out.close()
+        if registry:
+            registry.finish_from_log(run_id, code, "".join(lines))
+    if log_path:
+        print(f"[{run.name}] finished with code {code} (log: {log_path})")
+    return code
+
+
+def run_all(config: Dict[str, Any], runs: Sequence[Run], parallel: int, registry: Optional[RunRegistry] = None) -> int:
+    os.makedirs(config["logs_dir"], exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        codes = list(pool.map(
+            lambda r: execute(config, r, os.path.join(config["logs_dir"], f"{r.name}.log"), registry), runs
+        ))
+    failed = [r.name for r, c in zip(runs, codes) if c != 0]
+    print(f"{len(runs) - len(failed)}/{len(runs)} runs succeeded" + (f"; failed: {', '.join(failed)}" if failed else ""))
+    return 1 if failed else 0
+
+
+def _checked_runs(registry: RunRegistry, runs: Sequence[Run], skip_duplicates: bool) -> List[Run]:
+    kept = []
+    for run in runs:
+        if check_duplicate(registry, run) and skip_duplicates:
+            print(f"[{run.name}] skipped (--skip-duplicates)")
+            continue
+        kept.append(run)
+    return kept
+
+
+def ensure_splits(config: Dict[str, Any], dataset: str, folds: int, split_seed: int) -> str:
+    """
+    Returns the fold split file of a dataset, computing it only when there is no valid
+    cached one. Labels are read with torch, in the conda environment if torch is not
+    importable here.
+    """
+    if crossval.load_cached_splits(dataset, folds, split_seed) is None:
+        try:
+            import torch  # noqa: F401
+        except ImportError:
+            script = os.path.abspath(crossval.__file__)
+            command = conda_wrap(
+                f"python {shlex.quote(script)} --data {shlex.quote(dataset)} --folds {folds} --seed {split_seed}",
+                conda_env_name(config),
+            )
+            result = subprocess.run(command, shell=True, capture_output=True, text=True, check=False)
+            if result.returncode != 0:
+                raise ValueError(f"could not compute fold splits: {result.stderr.strip()}")
+        else:
+            crossval.write_splits(dataset, folds, split_seed)
+    return crossval.splits_path(dataset, folds, split_seed)
+
+
+def plan_crossval(config: Dict[str, Any], opts: Dict[str, Any], group: str, split_file: str) -> List[Run]:
+    """One training run per model, seed and fold, named <group>.<model>.f<fold>.s<seed>."""
+    runs = []
+    for model in opts.get("models") or list(MODEL_MAP):
+        for seed in opts["seeds"]:
+            for fold in range(opts["folds"]):
+                params = {**(opts.get("params") or {}), "--seed": seed, "--fold": fold, "--split_file": split_file}
+                runs.append(plan_train(config, {**opts, "model": model, "params": params},
+                                       f"{group}.{model}.f{fold}.s{seed}"))
+    return runs
+
+
+def _array_log_path(path: str) -> str:
+    """Gives every array task its own log file unless the path already does."""
+    if "%a" in path:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_%A_%a{ext}"
+
+
+def crossval_array_tasks(runs: Sequence[Run], folds: int, seeds: Sequence[int]) -> Dict[int, Run]:
+    """
+    Array task ID of each run of one model: seed index x folds + fold, which the job script
+    decodes back. Runs left out (e.g. skipped duplicates) leave gaps in the IDs.
+    """
+    tasks = {list(seeds).index(r.params["--seed"]) * folds + r.params["--fold"]: r for r in runs}
+    return dict(sorted(tasks.items()))
+
+
+def array_spec(task_ids: Sequence[int], max_concurrent: Optional[int] = None) -> str:
+    """An --array value listing the task IDs, with consecutive IDs as ranges: "0-3,5,7-9%4"."""
+    parts: List[str] = []
+    ids = sorted(task_ids)
+    start = 0
+    for i in range(1, len(ids) + 1):
+        if i == len(ids) or ids[i] != ids[i - 1] + 1:
+            parts.append(str(ids[start]) if i - 1 == start else f"{ids[start]}-{ids[i - 1]}")
+            start = i
+    return ",".join(parts) + (f"%{max_concurrent}" if max_concurrent else "")
+
+
+def submit_crossval_arrays(config: Dict[str, Any], runs: Sequence[Run], folds: int, seeds: Sequence[int],
+                           registry: RunRegistry, max_concurrent: Optional[int] = None) -> int:
+    """
+    Submits one SLURM array job per model instead of folds x seeds separate jobs. The
+    task ID selects the fold and the seed; each task is recorded in the registry.
+    """
+    by_model: Dict[str, List[Run]] = defaultdict(list)
+    for run in runs:
+        by_model[run.params["--model"]].append(run)
+    env_name = conda_env_name(config)
+    failed = 0
+    for model, model_runs in by_model.items():
+        tasks = crossval_array_tasks(model_runs, folds, seeds)
+        first = model_runs[0]
+        base = {k: v for k, v in first.params.items() if k not in ("--seed", "--fold")}
+        command = f"{build_training_command(first.template, base, use_slurm=True)} --seed $SEED --fold $FOLD"
+        preamble = [
+            f"FOLD=$((SLURM_ARRAY_TASK_ID % {folds}))",
+            f"SEEDS=({' '.join(str(s) for s in seeds)})",
+            f"SEED=${{SEEDS[$((SLURM_ARRAY_TASK_ID / {folds}))]}}",
+        ]
+        group = first.name.rsplit(".", 3)[0]
+        slurm_cfg = dict(config.get("slurm_training", {}))
+        slurm_cfg["job_name"] = f"{group}.{model}"
+        array = f"--array={array_spec(list(tasks), max_concurrent)}"
+        slurm_cfg["additional"] = "; ".join(filter(None, [str(slurm_cfg.get("additional") or ""), array]))
+        for key in ("output", "error"):
+            if slurm_cfg.get(key):
+                slurm_cfg[key] = _array_log_path(slurm_cfg[key])
+
+        result = submit_slurm(first.template, command, slurm_cfg, config["jobs_dir"], env_name, preamble)
+        if not result.ok:
+            print(f"[{slurm_cfg['job_name']}] SLURM submit failed: {result.message.strip()}")
+            failed += 1
+            continue
+        print(f"[{slurm_cfg['job_name']}] submitted array job {result.job_id} ({len(model_runs)} tasks)")
+        for task, run in tasks.items():
+            hash_, checksum = registry.fingerprint(run.kind, run.params, run.datasets)
+            log_path = (slurm_cfg.get("output") or "").replace("%A", str(result.job_id)).replace("%a", str(task))
+            registry.start(run.kind, run.name, run.command, run.params, hash_, checksum, "slurm",
+                           job_id=f"{result.job_id}_{task}", log_path=log_path or None)
+    return 1 if failed else 0
+
+
+def crossval_report(registry: RunRegistry, group: str) -> List[str]:
+    """Mean and standard deviation of each model's final metrics over the group's completed runs."""
+    latest: Dict[str, RunRecord] = {}
+    for run in registry.runs(name_prefix=f"{group}.", limit=1_000_000):
+        latest.setdefault(run.name, run)  # newest first: a re-run replaces the earlier attempt
+    by_model: Dict[str, List[RunRecord]] = defaultdict(list)
+    for name, run in latest.items():
+        by_model[name[len(group) + 1:].split(".")[0]].append(run)
+    lines = []
+    for model, runs in sorted(by_model.items()):
+        done = [r for r in runs if r.status == "completed"]
+        lines.append(f"{model}: {len(done)}/{len(runs)} runs completed")
+        for name, (mean, std, n) in crossval.aggregate(registry.metrics(r.id) for r in done).items():
+            lines.append(f"  {name}: {mean:.4f} ± {std:.4f} (n={n})")
+    return lines
+
+
+def _print_plan(runs: Sequence[Run]) -> None:
+    for run in runs:
+        where = "slurm" if run.use_slurm else "local"
+        print(f"[{run.name}] ({run.kind}, {where}) {run.command}")
+
+
+def _launch_one(config: Dict[str, Any], args: argparse.Namespace, run: Run) -> int:
+    if args.dry_run:
+        _print_plan([run])
+        return 0
+    registry = open_registry(config)
+    if not _checked_runs(registry, [run], args.skip_duplicates):
+        return 0
+    return execute(config, run, registry=registry)
+
+
+def cmd_convert(config: Dict[str, Any], args: argparse.Namespace) -> int:
+    return _launch_one(config, args, plan_convert(config, vars(args)))
+
+
+def cmd_estimate(config: Dict[str, Any], args: argparse.Namespace) -> int:
+    estimate = estimate_conversion(
+        _expand_inputs(args.inputs), _as_list(args.node_features) or ["adjacency"], args.sparsifier,
+        threshold=args.threshold, knn=args.knn, spectral_dim=args.spectral_dim, chunk_size=args.chunk_size,
+        cpus=args.cpus,
+    )
+    print(estimate.describe())
+    return 0
+
+
+def cmd_train(config: Dict[str, Any], args: argparse.Namespace) -> int:
+    opts = vars(args).copy()
+    opts["params"] = {k: coerce_param(v) for k, v in (p.split("=", 1) for p in args.param)}
+    return _launch_one(config, args, plan_train(config, opts))
+
+
+def cmd_sweep(config: Dict[str, Any], args: argparse.Namespace) -> int:
+    with open(args.batch_file, "r", encoding="utf-8") as f:
+        batch = yaml.safe_load(f) or {}
+    runs = expand_batch(config, batch)
+    if args.dry_run:
+        _print_plan(runs)
+        return 0
+    registry = open_registry(config)
+    runs = _checked_runs(registry, runs, args.skip_duplicates)
+    parallel = args.parallel or int(batch.get("parallel", os.cpu_count() or 1))
+    return run_all(config, runs, parallel, registry)
+
+
+def cmd_crossval(config: Dict[str, Any], args: argparse.Namespace) -> int:
+    opts = vars(args).copy()
+    opts["params"] = {k: coerce_param(v) for k, v in (p.split("=", 1) for p in args.param)}
+    group = args.group or f"cv{datetime.now():%Y%m%d-%H%M%S}"
+    dataset = os.path.abspath(args.data)
+    if args.dry_run:
+        split_file = crossval.splits_path(dataset, args.folds, args.split_seed)
+    else:
+        split_file = ensure_splits(config, dataset, args.folds, args.split_seed)
+    runs = plan_crossval(config, opts, group, split_file)
+    if args.dry_run:
+        _print_plan(runs)
+        return 0
+
+    registry = open_registry(config)
+    runs = _checked_runs(registry, runs, args.skip_duplicates)
+    print(f"Cross-validation group '{group}': {len(runs)} runs, splits in {split_file}")
+    if runs and runs[0].use_slurm:
+        code = submit_crossval_arrays(config, runs, args.folds, args.seeds, registry, args.parallel)
+        print(f"Report when the jobs are done: python gnn_gui.py cv-report {group}")
+        return code
+    # Each training run may use every CPU thread or the GPU on its own; concurrency is opt-in
+    code = run_all(config, runs, args.parallel or 1, registry)
+    print("\n".join(crossval_report(registry, group)))
+    return code
+
+
+def cmd_cv_report(config: Dict[str, Any], args: argparse.Namespace) -> int:
+    registry = open_registry(config)
+    registry.refresh_slurm()
+    lines = crossval_report(registry, args.group)
+    print("\n".join(lines) if lines else f"No runs recorded for group '{args.group}'")
+    return 0 if lines else 1
+
+
+def _scheduler_call(call, *args) -> Optional[Any]:
+    """Runs a scheduler query, reporting a missing or failing SLURM installation instead of raising."""
+    try:
+        return call(*args)
+    except FileNotFoundError as e:
+        print(f"{e.filename or 'SLURM'} not found; is this a SLURM login node?", file=sys.stderr)
+    except subprocess.CalledProcessError as e:
+        print((e.stderr or str(e)).strip(), file=sys.stderr)
+    return None
+
+
+def cmd_status(config: Dict[str, Any], args: argparse.Namespace) -> int:
+    if os.path.exists(registry_path(config)):
+        open_registry(config).refresh_slurm()
+    backend = scheduler.get_backend()
+    jobs = _scheduler_call(backend.accounting if args.job_ids else backend.queue, args.job_ids)
+    if jobs is None:
+        return 1
+    print(f"{'JOBID':<16} {'NAME':<32} {'STATE':<10} {'ELAPSED':>9} EXITCODE")
+    for job in jobs:
+        minutes, seconds = divmod(int(job.elapsed), 60)
+        exit_code = "" if job.exit_code is None else job.exit_code
+        print(f"{job.job_id:<16} {job.name[:32]:<32} {job.state:<10} {minutes:>6}:{seconds:02d} {exit_code}")
+    return 0
+
+
+def cmd_cancel(config: Dict[str, Any], args: argparse.Namespace) -> int:
+    return 1 if _scheduler_call(scheduler.get_backend().cancel, args.job_ids) is None else 0
+
+
+def cmd_runs(config: Dict[str, Any], args: argparse.Namespace) -> int:
+    registry = open_registry(config)
+    registry.refresh_slurm()
+    for run in registry.runs(kind=args.kind, status=args.state, param_hash=args.hash, limit=args.limit):
+        metrics = ", ".join(f"{k}={v:g}" for k, v in registry.metrics(run.id).items())
+        print(f"{run.describe()} hash={run.param_hash}" + (f" [{metrics}]" if metrics else ""))
+        if args.verbose:
+            print(f"    {run.command}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="gnn_gui", description="Headless conversion and training launcher. Run without arguments to open the GUI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_slurm_flags(p):
+        group = p.add_mutually_exclusive_group()
+        group.add_argument("--slurm", dest="slurm", action="store_true", default=None, help="Submit with sbatch.")
+        group.add_argument("--local", dest="slurm", action="store_false", help="Run locally in the conda environment.")
+        p.add_argument("--dry-run", action="store_true", help="Print the commands without running them.")
+        p.add_argument("--skip-duplicates", action="store_true",
+                       help="Skip runs whose configuration and data match an earlier run in the registry.")
+
+    convert = sub.add_parser("convert", help="Convert .mat inputs to a .pt dataset.")
+    convert.add_argument("--inputs", nargs="+", required=True, help=".mat files or folders of .mat files.")
+    convert.add_argument("--labels", required=True)
+    convert.add_argument("--output_dir", help="Output directory (default: the conversion script's own default).")
+    convert.add_argument("--rois", type=int, default=500)
+    convert.add_argument("--node_features", help="Comma-separated node feature extractors.")
+    convert.add_argument("--spectral_dim", type=int)
+    convert.add_argument("--sparsifier", choices=list(SPARSIFIER_PARAMS), help=f"Default: {DEFAULT_SPARSIFIER}.")
+    convert.add_argument("--threshold", type=float, help="Density kept by proportional, mst_topk and signed.")
+    convert.add_argument("--abs_threshold", type=float, help="Minimum absolute weight kept by absolute.")
+    convert.add_argument("--knn", type=int, help="Connections kept per node by knn.")
+    convert.add_argument("--checkpoint_every", type=int)
+    convert.add_argument("--resume", action="store_true")
+    convert.add_argument("--append", metavar="DATASET", help="Add only the new subjects to this converted .pt dataset.")
+    convert.add_argument("--script", help="Conversion script (default: from config).")
+    add_slurm_flags(convert)
+
+    estimate = sub.add_parser("estimate", help="Predict conversion memory and runtime from the .mat headers.")
+    estimate.add_argument("--inputs", nargs="+", required=True, help=".mat files or folders of .mat files.")
+    estimate.add_argument("--node_features", help="Comma-separated node feature extractors.")
+    estimate.add_argument("--spectral_dim", type=int, default=8)
+    estimate.add_argument("--sparsifier", choices=list(SPARSIFIER_PARAMS), default=DEFAULT_SPARSIFIER)
+    estimate.add_argument("--threshold", type=float, default=0.05)
+    estimate.add_argument("--knn", type=int, default=10)
+    estimate.add_argument("--chunk_size", type=int, help="Default: 32.")
+    estimate.add_argument("--cpus", type=int, help="Default: where more CPUs stop paying off.")
+
+    train = sub.add_parser("train", help="Train a model on a converted dataset.")
+    train.add_argument("--data", required=True, help="Dataset .pt file.")
+    train.add_argument("--model", help=f"One of {', '.join(MODEL_MAP)} or a layer class name.")
+    train.add_argument("--param", action="append", default=[], metavar="KEY=VALUE",
+                       help="Override a training argument, e.g. --param epochs=100 (repeatable).")
+    train.add_argument("--script", help="Training script or SLURM template (default: from config).")
+    add_slurm_flags(train)
+
+    sweep = sub.add_parser("sweep", help="Run every entry of a YAML batch file in parallel.")
+    sweep.add_argument("batch_file")
+    sweep.add_argument("--parallel", type=int, help="Concurrent runs (default: batch file 'parallel', else CPU count).")
+    sweep.add_argument("--dry-run", action="store_true", help="Print the commands without running them.")
+    sweep.add_argument("--skip-duplicates", action="store_true",
+                       help="Skip runs whose configuration and data match an earlier run in the registry.")
+
+    cv = sub.add_parser("crossval", help="k-fold x multi-seed training of one or more models, with a summary.")
+    cv.add_argument("--data", required=True, help="Dataset .pt file.")
+    cv.add_argument("--models", nargs="+", help=f"Models to evaluate (default: all of {', '.join(MODEL_MAP)}).")
+    cv.add_argument("--folds", type=int, default=10)
+    cv.add_argument("--seeds", type=int, nargs="+", default=[1, 2, 3, 4, 5], help="Training seeds.")
+    cv.add_argument("--split-seed", type=int, default=0, help="Seed of the fold assignment, shared by all runs.")
+    cv.add_argument("--group", help="Name of this evaluation in the run registry (default: timestamped).")
+    cv.add_argument("--param", action="append", default=[], metavar="KEY=VALUE",
+                    help="Override a training argument (repeatable).")
+    cv.add_argument("--parallel", type=int,
+                    help="Concurrent local runs (default: 1), or concurrent tasks per SLURM array.")
+    cv.add_argument("--script", help="Training script or SLURM template (default: from config).")
+    add_slurm_flags(cv)
+
+    cv_report = sub.add_parser("cv-report", help="Summarize a cross-validation group from the run registry.")
+    cv_report.add_argument("group")
+
+    status = sub.add_parser("status", help="Show SLURM job status.")
+    status.add_argument("job_ids", nargs="*")
+
+    cancel = sub.add_parser("cancel", help="Cancel SLURM jobs (array IDs cancel every task).")
+    cancel.add_argument("job_ids", nargs="+")
+
+    runs = sub.add_parser("runs", help="List recorded runs from the run registry.")
+    runs.add_argument("--kind", choices=["conversion", "training"])
+    runs.add_argument("--state", choices=["submitted", "running", "completed", "failed"])
+    runs.add_argument("--hash", help="Only runs with this parameter hash.")
+    runs.add_argument("--limit", type=int, default=20)
+    runs.add_argument("-v", "--verbose", action="store_true", help="Also print each run's command.")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    handlers = {"convert": cmd_convert, "estimate": cmd_estimate, "train": cmd_train, "sweep": cmd_sweep, "crossval": cmd_crossval,
+                "cv-report": cmd_cv_report, "status": cmd_status, "cancel": cmd_cancel, "runs": cmd_runs}
+    backend = None
+    try:
+        config = load_config()
+        backend = scheduler.backend_from_config(config)
+        scheduler.set_backend(backend)
+        return handlers[args.command](config, args)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if isinstance(backend, scheduler.LocalSlurmEmulator):
+            _drain_local_jobs(config, backend)
+
+
+def _drain_local_jobs(config: Dict[str, Any], backend: "scheduler.LocalSlurmEmulator") -> None:
+    """The emulated cluster lives in this process: wait for its jobs, then record their results."""
+    remaining = backend.queue()
+    if remaining:
+        print(f"Waiting for {len(remaining)} jobs on the local SLURM emulator...")
+    backend.close()
+    if remaining and os.path.exists(registry_path(config)):
+        open_registry(config).refresh_slurm(backend)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
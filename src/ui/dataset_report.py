@@ -0,0 +1,42 @@
+from typing import Optional
+
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtWidgets import (
+    QDialog, QDialogButtonBox, QHeaderView, QLabel, QPlainTextEdit, QTableWidget, QTableWidgetItem, QVBoxLayout,
+    QWidget
+)
+
+from utils.conversion.report import DatasetStats
+
+
+class DatasetReportDialog(QDialog):
+    """Summary and outlier subjects of a converted dataset, from its statistics sidecar."""
+
+    def __init__(self, stats: DatasetStats, title: str, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Dataset report: {title}")
+        self.resize(720, 560)
+        layout = QVBoxLayout(self)
+
+        summary = QPlainTextEdit("\n".join(stats.summary_lines()))
+        summary.setReadOnly(True)
+        summary.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        summary.setMaximumHeight(200)
+        layout.addWidget(summary)
+
+        outliers = stats.outliers()
+        layout.addWidget(QLabel(f"Outlier subjects: {len(outliers)}"))
+        table = QTableWidget(len(outliers), 3)
+        table.setHorizontalHeaderLabels(["Subject", "Label", "Reasons"])
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for row, outlier in enumerate(outliers):
+            table.setItem(row, 0, QTableWidgetItem(outlier.subject_id))
+            table.setItem(row, 1, QTableWidgetItem(str(stats.labels[outlier.index])))
+            table.setItem(row, 2, QTableWidgetItem("; ".join(outlier.reasons)))
+        table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        layout.addWidget(table, 1)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
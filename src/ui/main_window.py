@@ -7,22 +7,28 @@ from PyQt5.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, QLineEdit,
     QLabel, QComboBox, QTextEdit, QCheckBox, QGroupBox, QScrollArea, QFormLayout
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QFileSystemWatcher, QTimer
 import re
 
-from utils.config import load_config, save_config
+from utils.config import ConfigError, ConfigService
 from utils.process_runner import CommandRunner
-import shlex
-from utils.slurm import update_slurm_script, submit_job
+from utils.commands import (
+    CONVERSION_SLURM_TEMPLATE, DEFAULT_SPARSIFIER, MODEL_MAP, SPARSIFIER_PARAMS, build_conversion_command,
+    build_crossval_command, build_training_command, coerce_param, conda_env_name, conda_wrap, conversion_params,
+    load_training_params, save_training_params, submit_slurm
+)
+from utils.metrics import LogTailer, MetricExtractor, MetricStore
+from utils.registry import open_registry
+from utils.scheduler import backend_from_config, set_backend
+from utils.conversion.estimate import estimate_conversion
+from utils.conversion.feature_names import FEATURE_NAMES
+from utils.conversion.report import DatasetStats
+from utils.conversion.stats import stats_path_for
+from ui.dataset_report import DatasetReportDialog
+from ui.metric_plot import MetricPlotWidget
 from ui.slurm_config_widget import SlurmConfigWidget
 
 
-def _detect_interpreter(script_path: str) -> str:
-    if script_path.endswith(".py"):
-        return f"python {script_path}"
-    return script_path
-
-
 def _format_label(text: str) -> str:
     if text == "--early_stopping":
         return "Early Stopping (epochs)"
@@ -33,19 +39,28 @@ class MainWindow(QMainWindow):
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle("GNN GUI")
-        self.config = load_config()
+        self.config_service = ConfigService()
+        try:
+            self.config = self.config_service.load()
+        except ConfigError as e:
+            QMessageBox.critical(None, "Invalid configuration", str(e))
+            raise SystemExit(1)
+        self.registry = open_registry(self.config)
+        try:
+            self.scheduler = backend_from_config(self.config)
+        except ValueError as e:
+            QMessageBox.critical(None, "Invalid configuration", str(e))
+            raise SystemExit(1)
+        set_backend(self.scheduler)
         self.runner = None  # type: CommandRunner
+        self._current_run_id = None
+        self._run_output: List[str] = []
         self.dataset_file_path = None
         self.param_widgets = {}
         self.is_submitting = False
 
-        self.model_map = {
-            "GCN": "GCNConv",
-            "GAT": "GATConv",
-            "GATv2": "GATv2Conv",
-            "GraphSAGE": "SAGEConv",
-            "GTransformer": "TransformerConv",
-        }
+        self.model_map = dict(MODEL_MAP)
+        self.node_feature_names = list(FEATURE_NAMES)
 
         scroll = QScrollArea()
         self.setCentralWidget(scroll)
@@ -106,8 +121,50 @@ class MainWindow(QMainWindow):
         conv_opts_row.addWidget(QLabel("ROIs:"))
         self.num_rois = QLineEdit("500")
         conv_opts_row.addWidget(self.num_rois)
+        conv_opts_row.addWidget(QLabel("Node features:"))
+        self.feature_checks = {}
+        for name in self.node_feature_names:
+            check = QCheckBox(name)
+            check.setChecked(name == "adjacency")
+            conv_opts_row.addWidget(check)
+            self.feature_checks[name] = check
+        conv_opts_row.addWidget(QLabel("Spectral dims:"))
+        self.spectral_dim = QLineEdit("8")
+        conv_opts_row.addWidget(self.spectral_dim)
         conv_opts_row.addStretch(1)
 
+        sparsify_row = QHBoxLayout()
+        root.addLayout(sparsify_row)
+        sparsify_row.addWidget(QLabel("Sparsifier:"))
+        self.sparsifier_combo = QComboBox()
+        self.sparsifier_combo.addItems(list(SPARSIFIER_PARAMS))
+        self.sparsifier_combo.setCurrentText(DEFAULT_SPARSIFIER)
+        sparsify_row.addWidget(self.sparsifier_combo)
+        self.sparsifier_label = QLabel()
+        sparsify_row.addWidget(self.sparsifier_label)
+        self.sparsifier_value = QLineEdit()
+        sparsify_row.addWidget(self.sparsifier_value)
+        sparsify_row.addStretch(1)
+        self.sparsifier_combo.currentTextChanged.connect(self._sparsifier_changed)
+        self._sparsifier_changed(self.sparsifier_combo.currentText())
+
+        checkpoint_row = QHBoxLayout()
+        root.addLayout(checkpoint_row)
+        checkpoint_row.addWidget(QLabel("Checkpoint every (subjects, 0 = off):"))
+        self.checkpoint_every = QLineEdit("0")
+        checkpoint_row.addWidget(self.checkpoint_every)
+        self.resume_conversion = QCheckBox("Resume partial conversion")
+        self.resume_conversion.setToolTip("Skip subjects already saved in the checkpoint of an interrupted run with the same inputs and options.")
+        checkpoint_row.addWidget(self.resume_conversion)
+        checkpoint_row.addWidget(QLabel("Append to dataset:"))
+        self.append_to = QLineEdit()
+        self.append_to.setPlaceholderText("(new dataset)")
+        self.append_to.setToolTip("Add only the input subjects missing from this converted .pt dataset, updating it in place.")
+        checkpoint_row.addWidget(self.append_to, 1)
+        btn_append = QPushButton("Browse")
+        btn_append.clicked.connect(self._pick_append_dataset)
+        checkpoint_row.addWidget(btn_append)
+
         files_row = QHBoxLayout()
         root.addLayout(files_row)
 
@@ -137,13 +194,18 @@ class MainWindow(QMainWindow):
         self.use_slurm_conversion.setChecked(self.config.get("slurm_conversion", {}).get("use_slurm_by_default", False))
         self.use_slurm_conversion.toggled.connect(self._update_slurm_visibility)
         actions_row.addWidget(self.use_slurm_conversion)
+        btn_estimate = QPushButton("Estimate Resources")
+        btn_estimate.setToolTip("Predict memory and runtime from the input headers and fill in the SLURM request.")
+        btn_estimate.clicked.connect(self._estimate_conversion_resources)
+        actions_row.addWidget(btn_estimate)
         actions_row.addStretch(1)
 
         # Slurm config for conversion
         self.slurm_conversion_group = QGroupBox("SLURM Configuration for Conversion")
         slurm_conversion_layout = QVBoxLayout(self.slurm_conversion_group)
         self.slurm_conversion_config_widget = SlurmConfigWidget(
-            self.config, "slurm_conversion", default_job_name="MakeTorchGraphData"
+            self.config, "slurm_conversion", default_job_name="MakeTorchGraphData",
+            on_change=self.config_service.schedule_save
         )
         slurm_conversion_layout.addWidget(self.slurm_conversion_config_widget)
         root.addWidget(self.slurm_conversion_group)
@@ -174,6 +236,10 @@ class MainWindow(QMainWindow):
         btn_ds = QPushButton("Browse")
         btn_ds.clicked.connect(self._pick_dataset_file)
         train_row2.addWidget(btn_ds)
+        btn_report = QPushButton("Dataset Report")
+        btn_report.setToolTip("Graph statistics and outlier subjects, computed during conversion.")
+        btn_report.clicked.connect(self._show_dataset_report)
+        train_row2.addWidget(btn_report)
 
         train_row3 = QHBoxLayout()
         root.addLayout(train_row3)
@@ -192,7 +258,8 @@ class MainWindow(QMainWindow):
         self.slurm_training_group = QGroupBox("SLURM Configuration for Training")
         slurm_training_layout = QVBoxLayout(self.slurm_training_group)
         self.slurm_training_config_widget = SlurmConfigWidget(
-            self.config, "slurm_training", default_job_name="LCBN_GNN_Training"
+            self.config, "slurm_training", default_job_name="LCBN_GNN_Training",
+            on_change=self.config_service.schedule_save
         )
         slurm_training_layout.addWidget(self.slurm_training_config_widget)
         root.addWidget(self.slurm_training_group)
@@ -208,14 +275,45 @@ class MainWindow(QMainWindow):
         self.btn_train.clicked.connect(self._run_training)
         slurm_row.addWidget(self.btn_train)
 
+        # k-fold x multi-seed evaluation, run through the headless CLI
+        cv_row = QHBoxLayout()
+        root.addLayout(cv_row)
+        cv_row.addWidget(QLabel("Cross-validation folds:"))
+        self.cv_folds = QLineEdit("10")
+        self.cv_folds.setMaximumWidth(50)
+        cv_row.addWidget(self.cv_folds)
+        cv_row.addWidget(QLabel("Seeds:"))
+        self.cv_seeds = QLineEdit("1,2,3,4,5")
+        cv_row.addWidget(self.cv_seeds)
+        self.cv_all_models = QCheckBox("All models")
+        cv_row.addWidget(self.cv_all_models)
+        cv_row.addStretch(1)
+        self.btn_crossval = QPushButton("Run Cross-Validation")
+        self.btn_crossval.clicked.connect(self._run_crossval)
+        cv_row.addWidget(self.btn_crossval)
+
+        # Live training metrics, parsed from the local output or the tailed SLURM log
+        metrics_cfg = self.config["metrics"]
+        self.metric_store = MetricStore(metrics_cfg["capacity"], metrics_cfg["downsample"])
+        self.metric_extractor = MetricExtractor(self.metric_store, metrics_cfg["patterns"], metrics_cfg["step_key"])
+        self.log_tailer = None  # type: LogTailer
+        self.tail_timer = QTimer(self)
+        self.tail_timer.timeout.connect(self._poll_slurm_log)
+        self.metrics_group = QGroupBox("Training Metrics")
+        metrics_row = QHBoxLayout(self.metrics_group)
+        metrics_row.addWidget(MetricPlotWidget(self.metric_store, "Loss", lambda name: "loss" in name))
+        metrics_row.addWidget(MetricPlotWidget(self.metric_store, "Scores", lambda name: "loss" not in name))
+        root.addWidget(self.metrics_group)
+
         # Output console
         self.console = QTextEdit()
         self.console.setReadOnly(True)
         self.console.setMinimumHeight(250)
         root.addWidget(self.console, 1)
 
-        # Persist on close
-        self.destroyed.connect(self._persist_config)
+        # Pick up edits made to the config file while the GUI is open
+        self.config_watcher = QFileSystemWatcher([self.config_service.path], self)
+        self.config_watcher.fileChanged.connect(self._on_config_file_changed)
 
         self._setup_training_params()
         self._update_slurm_visibility()
@@ -236,6 +334,11 @@ class MainWindow(QMainWindow):
         if path:
             self.conv_script.setText(path)
 
+    def _pick_append_dataset(self) -> None:
+        path, _ = QFileDialog.getOpenFileName(self, "Select dataset to append to", filter="PyTorch (*.pt)")
+        if path:
+            self.append_to.setText(path)
+
     def _add_mat_files(self) -> None:
         self._add_files_to_list(self.files_list, "Select .mat input files")
 
@@ -262,6 +365,31 @@ class MainWindow(QMainWindow):
         if d:
             self.out_dir.setText(d)
 
+    def _estimate_conversion_resources(self) -> None:
+        input_files = [self.files_list.item(i).text() for i in range(self.files_list.count())]
+        if not input_files:
+            QMessageBox.warning(self, "No files", "Please add .mat files to estimate.")
+            return
+        features = [name for name, check in self.feature_checks.items() if check.isChecked()] or ["adjacency"]
+        sparsifier = self.sparsifier_combo.currentText()
+        option, default, _ = SPARSIFIER_PARAMS[sparsifier]
+        params = {"threshold": 0.05, "knn": 10}
+        if option.lstrip("-") in params:
+            params[option.lstrip("-")] = coerce_param(self.sparsifier_value.text() or default)
+        try:
+            estimate = estimate_conversion(input_files, features, sparsifier,
+                                           spectral_dim=int(coerce_param(self.spectral_dim.text() or "8")), **params)
+        except (ValueError, OSError) as e:
+            QMessageBox.warning(self, "Cannot estimate resources", str(e))
+            return
+        self.slurm_conversion_config_widget.set_resources(estimate.slurm_settings())
+        self._append_console(estimate.describe())
+
+    def _sparsifier_changed(self, name: str) -> None:
+        _, default, label = SPARSIFIER_PARAMS[name]
+        self.sparsifier_label.setText(label)
+        self.sparsifier_value.setText(default)
+
     def _pick_train_script(self) -> None:
         path, _ = QFileDialog.getOpenFileName(self, "Select training script")
         if path:
@@ -276,6 +404,23 @@ class MainWindow(QMainWindow):
             self.dataset_file_path = path
             self.dataset_file_input.setText(os.path.basename(path))
 
+    def _show_dataset_report(self) -> None:
+        dataset = self.dataset_file_path or self.dataset_file_input.text().strip()
+        if not dataset:
+            QMessageBox.warning(self, "Missing dataset", "Select a dataset file (.pt) first.")
+            return
+        stats_path = stats_path_for(dataset)
+        if not os.path.isfile(stats_path):
+            QMessageBox.information(self, "No statistics",
+                                    f"{stats_path} not found.\nDatasets converted before statistics were added have none; re-run the conversion to create them.")
+            return
+        try:
+            stats = DatasetStats.load(stats_path)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.critical(self, "Unreadable statistics", f"Could not read {stats_path}: {e}")
+            return
+        DatasetReportDialog(stats, os.path.basename(dataset), self).exec_()
+
     def _remove_selected_input_file(self) -> None:
         self._remove_selected_from_list(self.files_list)
 
@@ -291,8 +436,7 @@ class MainWindow(QMainWindow):
 
     def _setup_training_params(self):
         try:
-            with open("src/utils/training_args.json", "r") as f:
-                params = json.load(f)
+            params = load_training_params()
         except (FileNotFoundError, json.JSONDecodeError) as e:
             QMessageBox.warning(self, "Could not load training params", f"Could not load or parse training_args.json: {e}")
             params = {}
@@ -356,32 +500,43 @@ class MainWindow(QMainWindow):
 
         label_file = label_files[0]  # The script expects a single label file.
 
-        # Construct the command with proper arguments.
-        command_parts = [
-            _detect_interpreter(script),
-            "--inputs", *[f'"{p}"' for p in input_files],
-            "--labels", f'"{label_file}"',
-            "--output_dir", f'"{out_dir}"',
-            "--ROIs", self.num_rois.text().strip()
-        ]
+        features = [name for name, check in self.feature_checks.items() if check.isChecked()]
+        if not features:
+            QMessageBox.warning(self, "No node features", "Please select at least one node feature.")
+            return
 
-        command = " ".join(command_parts)
+        command = build_conversion_command(
+            script, input_files, label_file, out_dir, self.num_rois.text(),
+            node_features=features, spectral_dim=self.spectral_dim.text(),
+            checkpoint_every=self.checkpoint_every.text(), resume=self.resume_conversion.isChecked(),
+            sparsifier=self.sparsifier_combo.currentText(), sparsifier_value=self.sparsifier_value.text(),
+            append_to=self.append_to.text().strip() or None,
+        )
+
+        params = conversion_params(input_files, label_file, out_dir, self.num_rois.text(), features,
+                                   self.spectral_dim.text(), sparsifier=self.sparsifier_combo.currentText(),
+                                   sparsifier_value=self.sparsifier_value.text(),
+                                   append_to=self.append_to.text().strip() or None)
+        fingerprint = self._check_duplicate("conversion", params, [*input_files, label_file])
+        if fingerprint is None:
+            return
 
+        env_name = conda_env_name(self.config)
         if self.use_slurm_conversion.isChecked():
             slurm_config = self.config.get("slurm_conversion", {})
-            env_name = self.config.get("environment_name", "NeuroGraph")
-            script_path = update_slurm_script(
-                "src/utils/MakeTorchGraphData.sh", command, slurm_config, self.config["jobs_dir"], env_name
-            )
-            result = submit_job(script_path)
-            if result.returncode == 0:
-                self._append_console(f"Submitted job: {result.stdout}")
+            try:
+                result = submit_slurm(CONVERSION_SLURM_TEMPLATE, command, slurm_config, self.config["jobs_dir"], env_name)
+            except ValueError as e:
+                QMessageBox.warning(self, "Invalid SLURM settings", str(e))
+                return
+            if result.ok:
+                self._append_console(f"Submitted job: {result.message}")
+                self.registry.start("conversion", slurm_config.get("job_name"), command, params, *fingerprint,
+                                    "slurm", job_id=result.job_id, log_path=slurm_config.get("output"))
             else:
-                self._append_console(f"SLURM submit failed: {result.stderr}")
-        else:
-            env_name = self.config.get("environment_name", "NeuroGraph")
-            conda_command = f"conda run -n {env_name} {command}"
-            self._start_command(conda_command)
+                self._append_console(f"SLURM submit failed: {result.message}")
+        elif self._start_command(conda_wrap(command, env_name)):
+            self._current_run_id = self.registry.start("conversion", "conversion", command, params, *fingerprint, "local")
 
     def _run_training(self) -> None:
         if self.is_submitting:
@@ -396,17 +551,7 @@ class MainWindow(QMainWindow):
                 return
 
             # Gather parameters from the dynamically generated widgets
-            params = {}
-            for key, widget in self.param_widgets.items():
-                value = widget.text().strip()
-                # Attempt to convert to number if possible, else keep as string
-                try:
-                    if '.' in value:
-                        params[key] = float(value)
-                    else:
-                        params[key] = int(value)
-                except ValueError:
-                    params[key] = value
+            params = {key: coerce_param(widget.text()) for key, widget in self.param_widgets.items()}
 
             # Add parameters from dedicated widgets
             dataset = self.dataset_file_input.text().strip()
@@ -424,50 +569,116 @@ class MainWindow(QMainWindow):
 
             # Save the updated parameters back to the JSON file
             try:
-                with open("src/utils/training_args.json", "w") as f:
-                    json.dump(params, f, indent=4)
+                save_training_params(params)
             except IOError as e:
                 QMessageBox.warning(self, "Save failed", f"Could not save training arguments to file: {e}")
                 return
 
-            # Construct the command from the parameters
-            args_list = []
-            for key, value in params.items():
-                args_list.append(str(key))
-                args_list.append(str(value))
-
-            args_filled = " ".join(shlex.quote(arg) for arg in args_list)
+            dataset_path = self.dataset_file_path or os.path.join(params.get("--path", ""), dataset)
+            fingerprint = self._check_duplicate("training", params, [dataset_path])
+            if fingerprint is None:
+                return
 
+            env_name = conda_env_name(self.config)
             if self.use_slurm.isChecked():
-                python_script = "main_NCanda.py"
-                command = f"python {python_script} {args_filled}".strip()
+                command = build_training_command(script, params, use_slurm=True)
                 slurm_config = self.config.get("slurm_training", {})
-                env_name = self.config.get("environment_name", "NeuroGraph")
-                script_path = update_slurm_script(script, command, slurm_config, self.config["jobs_dir"], env_name)
-                result = submit_job(script_path)
-                if result.returncode == 0:
-                    self._append_console(f"Submitted: {result.stdout}")
+                try:
+                    result = submit_slurm(script, command, slurm_config, self.config["jobs_dir"], env_name)
+                except ValueError as e:
+                    QMessageBox.warning(self, "Invalid SLURM settings", str(e))
+                    return
+                if result.ok:
+                    self._append_console(f"Submitted: {result.message}")
+                    if slurm_config.get("output") and result.job_id:
+                        self._follow_metrics(LogTailer(slurm_config["output"].replace("%j", result.job_id)))
+                    self.registry.start("training", slurm_config.get("job_name"), command, params, *fingerprint,
+                                        "slurm", job_id=result.job_id, log_path=slurm_config.get("output"))
                 else:
-                    self._append_console(f"SLURM submit failed: {result.stderr}")
+                    self._append_console(f"SLURM submit failed: {result.message}")
             else:
-                command = f"{_detect_interpreter(script)} {args_filled}".strip()
-                env_name = self.config.get("environment_name", "NeuroGraph")
-                conda_command = f"conda run -n {env_name} {command}"
-                self._start_command(conda_command)
+                command = build_training_command(script, params)
+                if self._start_command(conda_wrap(command, env_name), track_metrics=True):
+                    self._current_run_id = self.registry.start("training", model_display_name, command, params,
+                                                               *fingerprint, "local")
         finally:
             self.is_submitting = False
 
+    def _run_crossval(self) -> None:
+        script = self.train_script.text().strip()
+        dataset = self.dataset_file_path or self.dataset_file_input.text().strip()
+        if not script or not dataset:
+            QMessageBox.warning(self, "Missing input", "Please select a training script and a dataset file (.pt).")
+            return
+        try:
+            folds = int(self.cv_folds.text())
+            seeds = [int(s) for s in self.cv_seeds.text().replace(",", " ").split()]
+        except ValueError:
+            QMessageBox.warning(self, "Invalid settings", "Folds and seeds must be whole numbers.")
+            return
+        if folds < 2 or not seeds:
+            QMessageBox.warning(self, "Invalid settings", "Use at least 2 folds and one seed.")
+            return
+
+        params = {key: coerce_param(widget.text()) for key, widget in self.param_widgets.items()
+                  if key not in ("--seed", "--data", "--model", "--path")}
+        models = list(self.model_map) if self.cv_all_models.isChecked() else [self.model_combo.currentText()]
+        command = build_crossval_command(os.path.abspath(dataset), models, folds, seeds, script, params,
+                                         use_slurm=self.use_slurm.isChecked())
+        # The CLI reads the config file, so write pending edits first
+        self.config_service.flush()
+        self._start_command(command)
+
+    def _check_duplicate(self, kind: str, params: Dict, datasets: List[str]):
+        """
+        Returns (param_hash, dataset_checksum) for the registry, or None when the same
+        configuration already ran on the same data and the user chose not to run it again.
+        """
+        param_hash, checksum = self.registry.fingerprint(kind, params, datasets)
+        earlier = self.registry.find_by_hash(param_hash)
+        if earlier:
+            answer = QMessageBox.question(
+                self, "Already run",
+                f"An identical {kind} configuration was already run on the same data:\n{earlier[0].describe()}"
+                f"\n\nRun it again?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No,
+            )
+            if answer != QMessageBox.Yes:
+                return None
+        return param_hash, checksum
+
     # ------------- Runner -------------
-    def _start_command(self, command: str) -> None:
+    def _follow_metrics(self, tailer=None) -> None:
+        """Starts a fresh set of curves, fed by a tailed log file when one is given."""
+        self.tail_timer.stop()
+        self.metric_store.clear()
+        self.metric_extractor.reset()
+        self.log_tailer = tailer
+        if tailer is not None:
+            self.tail_timer.start(2000)
+
+    def _poll_slurm_log(self) -> None:
+        text = self.log_tailer.read_new() if self.log_tailer else ""
+        if text:
+            self.metric_extractor.feed(text)
+
+    def _start_command(self, command: str, track_metrics: bool = False) -> bool:
         if self.runner and self.runner.isRunning():
             QMessageBox.information(self, "Busy", "A job is already running. Please wait.")
-            return
+            return False
+        if track_metrics:
+            self._follow_metrics()
         self.console.clear()
+        self._run_output = []
         self._append_console(f"$ {command}\n")
         self.runner = CommandRunner(command, working_dir=self.config.get("workspace_dir"))
         self.runner.output.connect(self._append_console)
+        self.runner.output.connect(self._run_output.append)
+        if track_metrics:
+            self.runner.output.connect(self.metric_extractor.feed)
         self.runner.finished.connect(self._on_finished)
         self.runner.start()
+        return True
 
     def _append_console(self, text: str) -> None:
         self.console.moveCursor(self.console.textCursor().End)
@@ -476,6 +687,9 @@ class MainWindow(QMainWindow):
 
     def _on_finished(self, code: int) -> None:
         self._append_console(f"\nProcess finished with code {code}\n")
+        if self._current_run_id is not None:
+            self.registry.finish_from_log(self._current_run_id, code, "".join(self._run_output))
+            self._current_run_id = None
 
     def _persist_config(self) -> None:
         self.config["conversion"]["script_path"] = self.conv_script.text().strip()
@@ -487,7 +701,36 @@ class MainWindow(QMainWindow):
             self.config["slurm_training"] = {}
         self.config["slurm_training"]["use_slurm_by_default"] = self.use_slurm.isChecked()
         self.config["conda_env"] = self.conda_env.text().strip()
-        save_config(self.config)
+        self.config_service.save()
+
+    def closeEvent(self, event) -> None:
+        self._persist_config()
+        self.config_service.close()
+        self.scheduler.close(cancel=True)
+        super().closeEvent(event)
+
+    def _on_config_file_changed(self, path: str) -> None:
+        # Atomic saves replace the file, which drops it from the watcher
+        if path not in self.config_watcher.files() and os.path.exists(path):
+            self.config_watcher.addPath(path)
+        try:
+            changed = self.config_service.reload_if_changed()
+        except ConfigError as e:
+            self._append_console(f"Ignoring edited config file: {e}\n")
+            return
+        if not changed:
+            return
+        self.conda_env.setText(self.config.get("conda_env", "NeuroGraph"))
+        self.conv_script.setText(self.config["conversion"]["script_path"])
+        self.train_script.setText(self.config["training"]["script_path"])
+        self.use_slurm_conversion.setChecked(self.config.get("slurm_conversion", {}).get("use_slurm_by_default", False))
+        self.use_slurm.setChecked(self.config.get("slurm_training", {}).get("use_slurm_by_default", False))
+        self.slurm_conversion_config_widget.reload()
+        self.slurm_training_config_widget.reload()
+        self.theme_combo.blockSignals(True)
+        self._load_theme()
+        self.theme_combo.blockSignals(False)
+        self._append_console("Reloaded configuration from disk.\n")
 
     def _load_theme(self) -> None:
         theme = self.config.get("theme", "dark colorful")
@@ -497,8 +740,9 @@ class MainWindow(QMainWindow):
     def _change_theme(self, theme_name: str) -> None:
         theme = theme_name.lower()
         self._apply_theme(theme)
-        self.config["theme"] = theme
-        save_config(self.config)
+        if self.config.get("theme") != theme:
+            self.config["theme"] = theme
+            self.config_service.schedule_save()
 
     def _apply_theme(self, theme: str) -> None:
         p = os.path.dirname(__file__)
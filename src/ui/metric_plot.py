@@ -0,0 +1,88 @@
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QPointF, QRectF, Qt, QTimer
+from PyQt5.QtGui import QColor, QPainter, QPalette, QPen, QPolygonF
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+from utils.metrics import MetricStore
+
+_COLORS = ["#4e79a7", "#f28e2b", "#e15759", "#76b7b2", "#59a14f", "#edc948", "#b07aa1", "#ff9da7"]
+
+
+class MetricPlotWidget(QWidget):
+    """
+    Line plot of the metrics in a MetricStore that match `include`.
+
+    Appending to the store never repaints directly: a timer checks the store's version
+    every `refresh_ms` and schedules at most one repaint, and each series is
+    downsampled to the plot's pixel width before drawing, so redraw cost does not grow
+    with the length of the run.
+    """
+
+    def __init__(self, store: MetricStore, title: str, include: Callable[[str], bool] = lambda name: True,
+                 refresh_ms: int = 250, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.store = store
+        self.title = title
+        self.include = include
+        self._drawn_version = -1
+        self.setMinimumHeight(180)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._refresh)
+        self.timer.start(refresh_ms)
+
+    def _refresh(self) -> None:
+        if self.store.version != self._drawn_version and self.isVisible():
+            self.update()
+
+    def paintEvent(self, event) -> None:
+        self._drawn_version = self.store.version
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        text_color = self.palette().color(QPalette.WindowText)
+        metrics = painter.fontMetrics()
+        line_height = metrics.height()
+
+        names = [name for name in self.store.names() if self.include(name)]
+        plot = QRectF(self.rect()).adjusted(50, line_height + 8, -10, -2 * line_height - 12)
+        painter.setPen(text_color)
+        painter.drawText(QRectF(0, 2, self.width(), line_height), Qt.AlignHCenter, self.title)
+        painter.setPen(QPen(text_color, 1))
+        painter.drawRect(plot)
+        if not names or plot.width() < 10 or plot.height() < 10:
+            painter.drawText(plot, Qt.AlignCenter, "No data yet")
+            return
+
+        series = {name: self.store.series[name].points(max_points=int(plot.width())) for name in names}
+        xs = [x for s_x, _ in series.values() for x in (s_x[0], s_x[-1]) if s_x]
+        ys = [y for _, s_y in series.values() for y in s_y]
+        if not xs:
+            return
+        x0, x1 = min(xs), max(xs)
+        y0, y1 = min(ys), max(ys)
+        if x1 == x0:
+            x1 = x0 + 1
+        if y1 == y0:
+            y0, y1 = y0 - 0.5, y1 + 0.5
+
+        painter.drawText(QRectF(0, plot.top() - line_height / 2, 46, line_height), Qt.AlignRight, f"{y1:.3g}")
+        painter.drawText(QRectF(0, plot.bottom() - line_height / 2, 46, line_height), Qt.AlignRight, f"{y0:.3g}")
+        painter.drawText(QRectF(plot.left(), plot.bottom() + 2, 80, line_height), Qt.AlignLeft, f"{x0:g}")
+        painter.drawText(QRectF(plot.right() - 80, plot.bottom() + 2, 80, line_height), Qt.AlignRight, f"{x1:g}")
+
+        sx = plot.width() / (x1 - x0)
+        sy = plot.height() / (y1 - y0)
+        legend_x = plot.left()
+        for i, (name, (px, py)) in enumerate(series.items()):
+            color = QColor(_COLORS[i % len(_COLORS)])
+            painter.setPen(QPen(color, 1.5))
+            painter.drawPolyline(QPolygonF([
+                QPointF(plot.left() + (x - x0) * sx, plot.bottom() - (y - y0) * sy) for x, y in zip(px, py)
+            ]))
+            label = f"— {name}: {self.store.series[name].last:.4g}"
+            if legend_x < plot.right():
+                painter.drawText(QRectF(legend_x, plot.bottom() + line_height + 6, plot.right() - legend_x, line_height),
+                                 Qt.AlignLeft, label)
+            legend_x += metrics.horizontalAdvance(label) + 12
@@ -1,11 +1,12 @@
 from PyQt5.QtWidgets import QWidget, QLineEdit, QSpinBox, QFormLayout, QLabel, QComboBox
 
 class SlurmConfigWidget(QWidget):
-    def __init__(self, config, config_key="slurm", default_job_name="MakeTorchGraphData", parent=None):
+    def __init__(self, config, config_key="slurm", default_job_name="MakeTorchGraphData", on_change=None, parent=None):
         super().__init__(parent)
         self.config = config
         self.config_key = config_key
         self.default_job_name = default_job_name
+        self.on_change = on_change
 
         layout = QFormLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -16,6 +17,8 @@ class SlurmConfigWidget(QWidget):
         self.partition = QComboBox()
         self.partition.addItems(["gpu", "gpu-h100", "gpu-amd"])
         self.gpus = QSpinBox()
+        self.cpus = QSpinBox()
+        self.cpus.setRange(1, 256)
         self.mem = QLineEdit()
         self.time = QLineEdit()
         self.additional = QLineEdit()
@@ -26,12 +29,39 @@ class SlurmConfigWidget(QWidget):
         layout.addRow(QLabel("Error File:"), self.error)
         layout.addRow(QLabel("Partition:"), self.partition)
         layout.addRow(QLabel("GPUs:"), self.gpus)
+        layout.addRow(QLabel("CPUs per task:"), self.cpus)
         layout.addRow(QLabel("Memory (e.g., 700000M):"), self.mem)
-        layout.addRow(QLabel("Time (HH:MM:SS):"), self.time)
-        layout.addRow(QLabel("Additional SBATCH lines:"), self.additional)
+        layout.addRow(QLabel("Time (HH:MM:SS or D-HH:MM:SS):"), self.time)
+        layout.addRow(QLabel("Additional SBATCH lines (; separated):"), self.additional)
         layout.addRow(QLabel("Env Activation:"), self.env_activation)
 
         self._load_config()
+        self._connect_signals()
+
+    def reload(self):
+        """Shows the values of the (possibly reloaded) config without writing them back."""
+        for widget in self._fields():
+            widget.blockSignals(True)
+        try:
+            self._load_config()
+        finally:
+            for widget in self._fields():
+                widget.blockSignals(False)
+
+    def set_resources(self, resources):
+        """Fills in the resource fields given (mem, cpus, gpus, time), e.g. from a conversion estimate."""
+        if "mem" in resources:
+            self.mem.setText(str(resources["mem"]))
+        if "cpus" in resources:
+            self.cpus.setValue(int(resources["cpus"]))
+        if "gpus" in resources:
+            self.gpus.setValue(int(resources["gpus"]))
+        if "time" in resources:
+            self.time.setText(str(resources["time"]))
+
+    def _fields(self):
+        return [self.job_name, self.output, self.error, self.partition, self.gpus, self.cpus,
+                self.mem, self.time, self.additional, self.env_activation]
 
     def _load_config(self):
         if self.config_key not in self.config:
@@ -42,19 +72,19 @@ class SlurmConfigWidget(QWidget):
         self.error.setText(slurm_config.get("error", "./logs/train_err.txt"))
         self.partition.setCurrentText(slurm_config.get("partition", "gpu-h100"))
         self.gpus.setValue(int(slurm_config.get("gpus", 2)))
+        self.cpus.setValue(int(slurm_config.get("cpus", 4)))
         self.mem.setText(slurm_config.get("mem", "700000M"))
         self.time.setText(slurm_config.get("time", "04:00:00"))
         self.additional.setText(slurm_config.get("additional", ""))
         self.env_activation.setText(slurm_config.get("env_activation", ""))
 
-        self._connect_signals()
-
     def _connect_signals(self):
         self.job_name.textChanged.connect(lambda t: self._update_config("job_name", t))
         self.output.textChanged.connect(lambda t: self._update_config("output", t))
         self.error.textChanged.connect(lambda t: self._update_config("error", t))
         self.partition.currentTextChanged.connect(lambda t: self._update_config("partition", t))
         self.gpus.valueChanged.connect(lambda v: self._update_config("gpus", v))
+        self.cpus.valueChanged.connect(lambda v: self._update_config("cpus", v))
         self.mem.textChanged.connect(lambda t: self._update_config("mem", t))
         self.time.textChanged.connect(lambda t: self._update_config("time", t))
         self.additional.textChanged.connect(lambda t: self._update_config("additional", t))
@@ -64,3 +94,5 @@ class SlurmConfigWidget(QWidget):
         if self.config_key not in self.config:
             self.config[self.config_key] = {}
         self.config[self.config_key][key] = value
+        if self.on_change:
+            self.on_change()
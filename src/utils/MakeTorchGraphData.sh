@@ -8,6 +8,7 @@
 ##SBATCH --mem 1850000M
 #SBATCH --mem 700000M
 #SBATCH --time 4:00:00
+#SBATCH --signal=USR1@600
 
 module purge
 module load cuda-toolkit/11.8.0
@@ -13,4 +13,4 @@
 module purge
 module load cuda-toolkit/11.8.0
 
-#COMMAND_PLACEHOLDER#
+#COMMAND_PLACEHOLDER
@@ -1,52 +1,43 @@
-import scipy
-import scipy.io
-import torch
-import numpy as np
-from torch_geometric.data import Data
-from collections import defaultdict
 import argparse
-import pandas as pd
 import os
+import sys
 
-def threshold_proportional(W: np.ndarray, p: float = 0.05) -> np.ndarray: #python version of BCT function originally written in MATLAB
-    """
-    Thresholds a connectivity matrix by retaining the top p proportion of strongest weights.
-    
-    Parameters:
-        W (np.ndarray): Square connectivity matrix (symmetric or asymmetric).
-        p (float): Proportion of strongest weights to retain (0 < p < 1).
-    
-    Returns:
-        np.ndarray: Thresholded matrix with only top p weights retained.
-    """
-    W = W.copy()
-    n = W.shape[0]
-    np.fill_diagonal(W, 0)  # Remove self-connections
-
-    symmetric = np.allclose(W, W.T, atol=1e-10)
-    if symmetric:
-        W = np.triu(W)  # Work with upper triangle only
-        ud = 2
-    else:
-        ud = 1
-
-    # Get indices and values of non-zero elements
-    inds = np.transpose(np.nonzero(W))
-    weights = W[W != 0]
-    sorted_inds = inds[np.argsort(-np.abs(weights))]  # Sort by descending absolute weight
+from conversion.runtime import DevicePolicy, configure_blas_threads, threads_from_argv
 
-    num_edges_to_keep = int(round((n**2 - n) * p / ud))
-    keep_inds = sorted_inds[:num_edges_to_keep]
+# Size BLAS/OpenMP thread pools from --threads or the SLURM allocation before numpy and torch load them
+configure_blas_threads(threads_from_argv(sys.argv[1:]))
 
-    # Create new thresholded matrix
-    W_thr = np.zeros_like(W)
-    for i, j in keep_inds:
-        W_thr[i, j] = W[i, j]
+import torch
+import numpy as np
+from torch_geometric.data import Data
+from collections import defaultdict
 
-    if symmetric:
-        W_thr = W_thr + W_thr.T  # Restore symmetry
+from conversion.cache import cache_key, fingerprint_files
+from conversion.checkpoint import CheckpointStore, StopRequest
+from conversion.estimate import auto_chunk_size, feature_width
+from conversion.features import FEATURE_EXTRACTORS, FeatureStage, check_spectral_dim, is_compute_bound, parse_feature_names
+from conversion.graph_index import GraphIndexBuilder, append_graphs, edges_from_stack, index_path_for, load_dataset_index
+from conversion.inputs import scan_inputs, read_subject_ids, total_subjects, iter_subject_chunks
+from conversion.labels import LabelTable
+from conversion.report import DatasetStats, format_report
+from conversion.sparsify import SPARSIFIERS, get_sparsifier, sparsifier_tag
+from conversion.stats import StatsBuilder, stats_path_for
+
+def check_appendable(dataset_path, index, num_rois, width, sparsity):
+    """Refuses to append subjects converted differently from the existing dataset."""
+    node_counts = np.unique(np.diff(index.node_ptr))
+    if len(node_counts) and (len(node_counts) > 1 or node_counts[0] != num_rois):
+        raise ValueError(f"{dataset_path} has graphs of {node_counts.tolist()} nodes; the inputs have {num_rois} ROIs")
+    data, _ = torch.load(dataset_path, weights_only=False, mmap=True, map_location="cpu")
+    if data.x.shape[1] != width:
+        raise ValueError(f"{dataset_path} has {data.x.shape[1]} node features per node; --node_features gives {width}")
+    stats_path = stats_path_for(dataset_path)
+    if os.path.isfile(stats_path):
+        with np.load(stats_path) as f:
+            existing = str(f["meta_sparsity"]) if "meta_sparsity" in f.files else None
+        if existing is not None and existing != sparsity:
+            raise ValueError(f"{dataset_path} was sparsified as '{existing}'; these options give '{sparsity}'")
 
-    return W_thr
 
 def main():
     parser = argparse.ArgumentParser(description="Convert NCANDA .mat files to PyTorch Geometric data.")
@@ -55,90 +46,184 @@ def main():
     parser.add_argument('--output_dir', type=str, default=os.path.join("..", "NeuroGraph", "data", "NCanda", "raw"), help='Directory to save the output .pt file. Defaults to ../NeuroGraph/data/NCanda/raw')
     parser.add_argument('--num_labels', type=int, default=2, help='Number of labels for classification (default: 2).')
     parser.add_argument('--label_column', type=str, default='cddr15a', help='The column name in the labels file to use.')
-    parser.add_argument('--threshold', type=float, default=0.05, help='Proportional threshold for connectivity matrix (default: 0.05).')
+    parser.add_argument('--threshold', type=float, default=0.05, help='Proportion of connections kept by the proportional, mst_topk and signed sparsifiers (default: 0.05).')
+    parser.add_argument('--sparsifier', type=str, default='proportional', choices=list(SPARSIFIERS), help='How connectivity matrices are sparsified into graphs (default: proportional).')
+    parser.add_argument('--abs_threshold', type=float, default=0.3, help='Minimum absolute weight kept by the absolute sparsifier (default: 0.3).')
+    parser.add_argument('--knn', type=int, default=10, help='Connections kept per node by the knn sparsifier (default: 10).')
     parser.add_argument('--ROIs', type=int, default=500, help='The number of ROIs examined (default 500).')
-    parser.add_argument('--device', type=str, default='cuda', help='Enter either cuda or cpu into this field to use either gpu or cpu respectively.')
+    parser.add_argument('--device', type=str, default='auto', choices=['auto', 'cpu', 'cuda'], help='Where compute-bound node features run: cuda, cpu, or auto (GPU only when available and worthwhile). Everything else runs on the CPU.')
+    parser.add_argument('--threads', type=int, default=None, help='CPU threads for torch and BLAS (default: the SLURM allocation, else all available CPUs).')
+    parser.add_argument('--id_column', type=str, default=None, help='Subject ID column in the labels file (default: auto-detect, else join labels by position).')
+    parser.add_argument('--node_features', type=str, default='adjacency', help=f'Comma-separated node feature extractors: {", ".join(FEATURE_EXTRACTORS)} (default: adjacency).')
+    parser.add_argument('--spectral_dim', type=int, default=8, help='Number of eigenvectors used by the spectral node features (default: 8).')
+    parser.add_argument('--chunk_size', type=int, default=0, help='Number of subjects processed per vectorized batch (default: 0, the largest that fits the available memory, up to 64).')
+    parser.add_argument('--checkpoint_every', type=int, default=0, help='Checkpoint converted subjects to disk every N subjects so a preempted or timed-out job can resume (default: 0, disabled).')
+    parser.add_argument('--resume', action='store_true', help='Resume from the checkpoint of an earlier run with the same inputs and options, skipping verified subjects.')
+    parser.add_argument('--checkpoint_dir', type=str, default=None, help='Checkpoint directory (default: <output file>.checkpoint next to the output).')
+    parser.add_argument('--keep_checkpoint', action='store_true', help='Keep the checkpoint directory after a successful conversion.')
+    parser.add_argument('--append', type=str, default=None, help='Existing converted .pt dataset to extend with the subjects of --inputs that it does not contain yet (matched by subject ID). The dataset and its sidecars are updated in place.')
+    parser.add_argument('--cache_dir', type=str, default=None, help='Directory for cached intermediate results (default: <output_dir>/.cache).')
     args = parser.parse_args()
-    # Load input data
-    input_matrices = []
-    for path in args.inputs:
-        mat_file = scipy.io.loadmat(path)
-        # Find the variable name in the .mat file, ignoring metadata
-        var_name = [k for k in mat_file.keys() if not k.startswith('__')][0]
-        input_matrices.append(mat_file[var_name])
-
-    # Concatenate all input matrices
-    TasksAll = np.concatenate(input_matrices, axis=2)
-
-    # Load labels
-    labels_mat = scipy.io.loadmat(args.labels)
-    labels_var_name = [k for k in labels_mat.keys() if not k.startswith('__')][0]
-    labels_array = labels_mat[labels_var_name]
-
-    # Process labels
-    cddr15a = pd.Series(labels_array[:, 0].flatten())
-    nan_indices = cddr15a[cddr15a.isna()].index.tolist()
-    cleaned_column = cddr15a.dropna().tolist()
-
-    # Remove subjects with NaN labels from the data
-    TasksAll = np.delete(TasksAll, nan_indices, axis=2)
-
-    print(f'Tasks shape: {TasksAll.shape}')
-    print(f'Cleaned Column Length: {len(cleaned_column)}')
-
-    AdjMats = TasksAll
-    GraphsNum = AdjMats.shape[2]
-
-    x_all = []
-    edge_index_all = []
-    labels = []
+    cache_dir = args.cache_dir or os.path.join(args.output_dir, ".cache")
+
+    # Read input headers only; connectivity arrays are loaded one file at a time during ingestion
+    specs = scan_inputs(args.inputs)
+    subject_ids = read_subject_ids(specs)
+    num_subjects = total_subjects(specs)
+    num_rois = specs[0].num_rois
+
+    # Join labels to subjects by ID (or by position when either side lacks IDs)
+    label_table = LabelTable.from_file(args.labels, id_column=args.id_column, cache_dir=cache_dir)
+    label_column = args.label_column
+    if not label_table.has_named_columns and label_column not in label_table.columns:
+        print(f"Labels file has no column names; using the first column for '{label_column}'.")
+        label_column = label_table.columns[0]
+    keep, label_values = label_table.align(subject_ids, num_subjects, label_column)
+
+    feature_names = parse_feature_names(args.node_features)
+    check_spectral_dim(feature_names, num_rois, args.spectral_dim)
+    sparsifier = get_sparsifier(args.sparsifier)
+    sparsify_params = {"threshold": args.threshold, "abs_threshold": args.abs_threshold, "knn": args.knn}
+
+    # Append mode: convert only the subjects the existing dataset does not contain
+    existing_index = None
+    if args.append:
+        existing_index = load_dataset_index(args.append)
+        check_appendable(args.append, existing_index, num_rois,
+                         feature_width(feature_names, num_rois, args.spectral_dim),
+                         sparsifier_tag(args.sparsifier, **sparsify_params))
+        if subject_ids is not None and existing_index.subject_ids is not None:
+            present = np.isin(np.asarray(subject_ids, dtype=str), np.asarray(existing_index.subject_ids, dtype=str))
+            print(f"Appending to {args.append}: {len(existing_index)} subjects already converted, "
+                  f"{int((present & keep).sum())} of them in the inputs are skipped")
+            label_values = label_values[~present[keep]]
+            keep = keep & ~present
+        else:
+            print(f"Appending to {args.append}: no subject IDs to match, so every input subject is added")
+        if not keep.any():
+            print("No new subjects to append.")
+            return
+
+    print(f'Tasks shape: {(num_rois, num_rois, int(keep.sum()))}')
+    print(f'Cleaned Column Length: {len(label_values)}')
+
+    feature_key = cache_key(fingerprint_files(args.inputs), keep, args.threshold, feature_names, args.spectral_dim,
+                            args.sparsifier, args.abs_threshold, args.knn, sparsifier.positive_only)
+    policy = DevicePolicy(args.device, num_threads=args.threads, gpu_worthwhile=is_compute_bound(feature_names))
+    print(f"Compute policy: {policy.describe()}")
+    feature_stage = FeatureStage(feature_names, len(label_values), num_rois, cache_dir=cache_dir,
+                                 cache_key=feature_key, policy=policy, spectral_dim=args.spectral_dim,
+                                 positive_only=sparsifier.positive_only)
+    if feature_stage.from_cache:
+        print(f"Using cached node features: {feature_stage.path}")
+
+    num_graphs = len(label_values)
+    index_builder = GraphIndexBuilder(num_graphs)
+    stats_builder = StatsBuilder(num_graphs, num_rois, positive_only=sparsifier.positive_only)
+    edge_chunks = []
+
+    output_filename = f'NCandaData{args.ROIs}_{args.label_column}_{sparsifier_tag(args.sparsifier, **sparsify_params)}.pt'
+    output_path = args.append or os.path.join(args.output_dir, output_filename)
+
+    # Restore subjects completed by an earlier, interrupted run
+    i = 0
+    checkpoint = None
+    if args.checkpoint_every > 0 or args.resume:
+        checkpoint_dir = args.checkpoint_dir or f"{os.path.splitext(output_path)[0]}.checkpoint"
+        checkpoint = CheckpointStore(checkpoint_dir, feature_key)
+        if args.resume and checkpoint.exists():
+            for part in checkpoint.valid_parts():
+                x_part, edges, edge_counts = checkpoint.load(part)
+                feature_stage.fill(part.start, x_part)
+                edge_chunks.append(edges)
+                index_builder.set_counts(part.start, num_rois, edge_counts)
+                stats_builder.set_rows(part.start, checkpoint.load_extra(part))
+                i = part.stop
+            print(f"Resuming from checkpoint {checkpoint_dir}: {i} of {num_graphs} subjects already converted")
+        else:
+            checkpoint.start({"num_graphs": num_graphs, "num_rois": num_rois})
+    chunk_size = args.chunk_size
+    if chunk_size <= 0:
+        chunk_size, available_mb = auto_chunk_size(args.inputs, feature_names, args.sparsifier, args.threshold,
+                                                   args.knn, args.spectral_dim)
+        available = f"{available_mb:,.0f} MB available" if available_mb is not None else "available memory unknown"
+        print(f"Chunk size: {chunk_size} (auto, {available})")
+    checkpoint_every = args.checkpoint_every or chunk_size
+    stop_request = StopRequest() if checkpoint else None
+
+    remaining = keep.copy()
+    remaining[np.flatnonzero(keep)[:i]] = False
+    pending_start = i
+    pending_edges = []
+
+    for _, chunk in iter_subject_chunks(specs, remaining, chunk_size):
+        thresholded = sparsifier.fn(chunk, **sparsify_params)
+        feature_stage.process(i, thresholded)
+        edges, edge_counts = edges_from_stack(thresholded, positive_only=sparsifier.positive_only)
+        edge_chunks.append(edges)
+        index_builder.set_counts(i, num_rois, edge_counts)
+        stats_builder.add(i, chunk, thresholded)
+        i += len(chunk)
+
+        if checkpoint is None:
+            continue
+        pending_edges.append(edges)
+        if i - pending_start >= checkpoint_every or stop_request or i == num_graphs:
+            checkpoint.append(pending_start, feature_stage.features[pending_start * num_rois:i * num_rois],
+                              np.concatenate(pending_edges, axis=1), index_builder.edge_counts[pending_start:i],
+                              stats_builder.rows(pending_start, i))
+            pending_start = i
+            pending_edges = []
+        if stop_request:
+            print(f"Received signal {stop_request.signum}; checkpointed {i} of {num_graphs} subjects. Re-run with --resume to continue.")
+            sys.exit(1)
+
+    feature_stage.finalize()
+    if subject_ids is not None:
+        subject_labels = np.asarray(subject_ids, dtype=object)[keep]
+    else:
+        # Positions continue after the subjects of an appended-to dataset
+        subject_labels = np.flatnonzero(keep) + (len(existing_index) if existing_index is not None else 0)
+    new_subject_ids = [str(s) for s in subject_labels]
+    graph_index = index_builder.build(new_subject_ids)
 
     data2 = defaultdict(dict)
-    node_offsets = []
-    edge_offsets = []
-
-    node_offset = 0
-    edge_offset = 0
-
-    if args.device == 'cuda' and torch.cuda.is_available():
-        torch.set_default_device('cuda')
-
-    for i in range(GraphsNum):
-        Adj_i = threshold_proportional(AdjMats[:, :, i], args.threshold)
-
-        x = torch.tensor(Adj_i, dtype=torch.float32)
-
-        row, col = np.where(Adj_i > 0)
-        mask = row != col
-        row, col = row[mask], col[mask]
-        edge_index = torch.tensor([row, col], dtype=torch.long)
-
-        x_all.append(x)
-        edge_index_all.append(edge_index)
-        labels.append(torch.tensor(cleaned_column[i], dtype=torch.long))
-
-        node_offsets.append(node_offset)
-        edge_offsets.append(edge_offset)
-
-        node_offset += x.size(0)
-        edge_offset += edge_index.size(1)
-
-    x_all = torch.vstack(x_all)
-    edge_index_all = torch.cat(edge_index_all, dim=1)
-    y_all = torch.vstack(labels)
-
-    data2['x'] = torch.tensor(node_offsets + [x_all.size(0)])
-    data2['edge_index'] = torch.tensor(edge_offsets + [edge_index_all.size(1)])
+    x_all = torch.from_numpy(feature_stage.features)
+    edge_index_all = torch.from_numpy(np.concatenate(edge_chunks, axis=1) if edge_chunks else np.empty((2, 0), dtype=np.int64))
+    y_all = torch.from_numpy(label_values).to(torch.long).view(-1, 1)
+    if existing_index is not None:
+        # The existing graphs are copied, not recomputed
+        x_all, edge_index_all, y_all, graph_index = append_graphs(args.append, x_all, edge_index_all, y_all, graph_index)
+
+    data2['x'] = torch.from_numpy(graph_index.node_ptr)
+    data2['edge_index'] = torch.from_numpy(graph_index.edge_ptr)
     data2['y'] = y_all
 
     TorchGraph_Data = Data(x=x_all, edge_index=edge_index_all, y=y_all)
     data = (TorchGraph_Data, data2)
 
-    output_filename = f'NCandaData{args.ROIs}_{args.label_column}_{int(args.threshold * 100)}pct.pt'
-    output_path = os.path.join(args.output_dir, output_filename)
-    
-    torch.save(data, output_path)
+    # Written next to the output and renamed over it, so an interrupted run (or an append,
+    # whose input may still be memory-mapped) never leaves a truncated dataset
+    tmp_output_path = f"{output_path}.tmp"
+    torch.save(data, tmp_output_path)
+    os.replace(tmp_output_path, output_path)
+    graph_index.save(index_path_for(output_path))
+    stats_path = stats_path_for(output_path)
+    if existing_index is None:
+        stats_builder.save(stats_path, graph_index.subject_ids, label_values,
+                           {"threshold": args.threshold, "sparsifier": args.sparsifier,
+                            "sparsity": sparsifier_tag(args.sparsifier, **sparsify_params)})
+    elif os.path.isfile(stats_path):
+        stats_builder.append_to(stats_path, new_subject_ids, label_values)
+    else:
+        print(f"{output_path} has no statistics sidecar to extend; re-convert it to get one.")
+    if checkpoint is not None and not args.keep_checkpoint:
+        checkpoint.remove()
+    if existing_index is not None:
+        print(f"Appended {len(label_values)} subjects ({len(graph_index)} in total)")
     print(f"Saved data to {output_path}")
+    if os.path.isfile(stats_path):
+        print(format_report(DatasetStats.load(stats_path)))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,189 @@
+# Command builders shared by the GUI and the headless CLI.
+# Nothing here imports Qt, so it works over SSH without a display.
+import json
+import os
+import re
+import shlex
+import sys
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from .config import REPO_ROOT
+from .scheduler import get_backend
+from .slurm import update_slurm_script
+
+TRAINING_ARGS_PATH = os.path.join(REPO_ROOT, "src", "utils", "training_args.json")
+CONVERSION_SLURM_TEMPLATE = os.path.join(REPO_ROOT, "src", "utils", "MakeTorchGraphData.sh")
+TRAINING_SCRIPT_NAME = "main_NCanda.py"
+CLI_ENTRY_POINT = os.path.join(REPO_ROOT, "gnn_gui.py")
+
+MODEL_MAP: Dict[str, str] = {
+    "GCN": "GCNConv",
+    "GAT": "GATConv",
+    "GATv2": "GATv2Conv",
+    "GraphSAGE": "SAGEConv",
+    "GTransformer": "TransformerConv",
+}
+
+# Sparsifiers of the conversion script (conversion/sparsify.py) with the option, default
+# value and GUI label of the parameter each one takes
+SPARSIFIER_PARAMS: Dict[str, Tuple[str, str, str]] = {
+    "proportional": ("--threshold", "0.05", "Density:"),
+    "absolute": ("--abs_threshold", "0.3", "Min |weight|:"),
+    "knn": ("--knn", "10", "Neighbours:"),
+    "mst_topk": ("--threshold", "0.05", "Density:"),
+    "signed": ("--threshold", "0.05", "Density:"),
+}
+DEFAULT_SPARSIFIER = "proportional"
+
+_JOB_ID_RE = re.compile(r"Submitted batch job (\d+)")
+
+
+class SubmitResult(NamedTuple):
+    ok: bool
+    message: str
+    job_id: Optional[str]
+    script_path: str
+
+
+def detect_interpreter(script_path: str) -> str:
+    if script_path.endswith(".py"):
+        return f"python {script_path}"
+    return script_path
+
+
+def conda_env_name(config: Dict[str, Any]) -> str:
+    return config.get("environment_name") or config.get("conda_env") or "NeuroGraph"
+
+
+def conda_wrap(command: str, env_name: str) -> str:
+    return f"conda run -n {env_name} {command}"
+
+
+def coerce_param(value: str) -> Any:
+    """Converts a training argument typed as text to int or float when possible."""
+    value = value.strip()
+    try:
+        if '.' in value:
+            return float(value)
+        return int(value)
+    except ValueError:
+        return value
+
+
+def build_conversion_command(script: str, input_files: Sequence[str], label_file: str, out_dir: Optional[str],
+                             rois: str, node_features: Optional[Sequence[str]] = None,
+                             spectral_dim: Optional[str] = None, checkpoint_every: Optional[str] = None,
+                             resume: bool = False,
+                             sparsifier: Optional[str] = None, sparsifier_value: Optional[str] = None,
+                             append_to: Optional[str] = None, extra_args: Sequence[str] = ()) -> str:
+    command_parts = [
+        detect_interpreter(script),
+        "--inputs", *[f'"{p}"' for p in input_files],
+        "--labels", f'"{label_file}"',
+    ]
+    if out_dir:
+        command_parts += ["--output_dir", f'"{out_dir}"']
+    command_parts += ["--ROIs", str(rois).strip()]
+    if node_features:
+        command_parts += ["--node_features", ",".join(node_features)]
+        if "spectral" in node_features and spectral_dim:
+            command_parts += ["--spectral_dim", str(spectral_dim).strip()]
+    if sparsifier and sparsifier != DEFAULT_SPARSIFIER:
+        command_parts += ["--sparsifier", sparsifier]
+    if sparsifier_value is not None and str(sparsifier_value).strip():
+        option, default, _ = SPARSIFIER_PARAMS[sparsifier or DEFAULT_SPARSIFIER]
+        if coerce_param(str(sparsifier_value)) != coerce_param(default):
+            command_parts += [option, str(sparsifier_value).strip()]
+    if checkpoint_every and str(checkpoint_every).strip() != "0":
+        command_parts += ["--checkpoint_every", str(checkpoint_every).strip()]
+    if resume:
+        command_parts.append("--resume")
+    if append_to:
+        command_parts += ["--append", f'"{append_to}"']
+    command_parts += list(extra_args)
+    return " ".join(command_parts)
+
+
+def conversion_params(input_files: Sequence[str], label_file: str, out_dir: Optional[str], rois: Any,
+                      node_features: Optional[Sequence[str]] = None, spectral_dim: Any = None,
+                      extra_args: Sequence[str] = (), sparsifier: Optional[str] = None,
+                      sparsifier_value: Any = None, append_to: Optional[str] = None) -> Dict[str, Any]:
+    """
+    The conversion options as recorded in the run registry. Values are normalized so the
+    GUI and the CLI describe the same conversion identically. The sparsifier and the
+    dataset appended to are only recorded when set, so earlier runs keep their hashes.
+    """
+    node_features = list(node_features or ["adjacency"])
+    params = {
+        "inputs": list(input_files),
+        "labels": label_file,
+        "output_dir": out_dir,
+        "rois": coerce_param(str(rois)),
+        "node_features": node_features,
+        "spectral_dim": coerce_param(str(spectral_dim)) if "spectral" in node_features and spectral_dim else None,
+        "extra_args": list(extra_args),
+    }
+    sparsifier = sparsifier or DEFAULT_SPARSIFIER
+    _, default, _ = SPARSIFIER_PARAMS[sparsifier]
+    value = coerce_param(str(sparsifier_value)) if sparsifier_value not in (None, "") else coerce_param(default)
+    if sparsifier != DEFAULT_SPARSIFIER or value != coerce_param(default):
+        params["sparsifier"] = sparsifier
+        params["sparsifier_value"] = value
+    if append_to:
+        params["append"] = append_to
+    return params
+
+
+def load_training_params(path: str = TRAINING_ARGS_PATH) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_training_params(params: Dict[str, Any], path: str = TRAINING_ARGS_PATH) -> None:
+    with open(path, "w") as f:
+        json.dump(params, f, indent=4)
+
+
+def training_args_string(params: Dict[str, Any]) -> str:
+    args_list = []
+    for key, value in params.items():
+        args_list.append(str(key))
+        args_list.append(str(value))
+    return " ".join(shlex.quote(arg) for arg in args_list)
+
+
+def build_training_command(script: str, params: Dict[str, Any], use_slurm: bool = False) -> str:
+    """
+    Local runs call the selected script directly. Under SLURM the selected script is the
+    job template, and the job runs the training entry point from the template's directory.
+    """
+    args_filled = training_args_string(params)
+    if use_slurm:
+        return f"python {TRAINING_SCRIPT_NAME} {args_filled}".strip()
+    return f"{detect_interpreter(script)} {args_filled}".strip()
+
+
+def build_crossval_command(dataset: str, models: Sequence[str], folds: int, seeds: Sequence[int], script: str,
+                           params: Dict[str, Any], use_slurm: bool = False, group: Optional[str] = None) -> str:
+    """
+    The headless `crossval` command for a cross-validation launched from the GUI: it runs
+    the folds concurrently (or submits SLURM arrays) and prints the summary.
+    """
+    parts = [sys.executable, CLI_ENTRY_POINT, "crossval", "--data", dataset, "--models", *models,
+             "--folds", str(folds), "--seeds", *[str(s) for s in seeds], "--script", script,
+             "--slurm" if use_slurm else "--local"]
+    if group:
+        parts += ["--group", group]
+    for key, value in params.items():
+        parts += ["--param", f"{key.lstrip('-')}={value}"]
+    return " ".join(shlex.quote(part) for part in parts)
+
+
+def submit_slurm(template_path: str, command: str, slurm_cfg: Dict[str, Any], jobs_dir: str, env_name: str,
+                 preamble: Sequence[str] = ()) -> SubmitResult:
+    script_path = update_slurm_script(template_path, command, slurm_cfg, jobs_dir, env_name, preamble)
+    result = get_backend().submit(script_path)
+    if result.returncode != 0:
+        return SubmitResult(False, result.stderr, None, script_path)
+    match = _JOB_ID_RE.search(result.stdout or "")
+    return SubmitResult(True, result.stdout, match.group(1) if match else None, script_path)
@@ -1,6 +1,8 @@
+import copy
 import os
+import threading
 import yaml
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 # Get the repository root directory (parent of src/)
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -25,37 +27,231 @@ _DEFAULT_CONFIG: Dict[str, Any] = {
         "env_activation": "",
     },
     "theme": "dark colorful",
+    # Training-log metric extraction; empty patterns extract every "name: number" pair
+    "metrics": {"patterns": {}, "step_key": "epoch", "capacity": 4096, "downsample": "lttb"},
+    # "local" emulates SLURM on this machine (cpus/mem: 0 and '' mean all of it)
+    "scheduler": {"backend": "slurm", "cpus": 0, "mem": ""},
 }
 
+_DIR_KEYS = ("workspace_dir", "jobs_dir", "logs_dir")
+
+_SLURM_SCHEMA: Dict[str, Any] = {
+    "use_slurm_by_default": bool,
+    "job_name": str,
+    "output": str,
+    "error": str,
+    "account": str,
+    "partition": str,
+    "qos": str,
+    "gpus": int,
+    "cpus": int,
+    # YAML reads unquoted values such as 16000 or 4:00:00 as integers
+    "mem": (str, int),
+    "time": (str, int),
+    "additional": str,
+    "env_activation": str,
+    "conda_env": str,
+}
+
+# Expected types of the known keys. Unknown keys are kept as they are; None means "not set".
+CONFIG_SCHEMA: Dict[str, Any] = {
+    "workspace_dir": str,
+    "jobs_dir": str,
+    "logs_dir": str,
+    "conversion": {"script_path": str, "default_args": str},
+    "training": {"script_path": str, "default_args": str},
+    "slurm": _SLURM_SCHEMA,
+    "slurm_conversion": _SLURM_SCHEMA,
+    "slurm_training": _SLURM_SCHEMA,
+    "theme": str,
+    "conda_env": str,
+    "environment_name": str,
+    "default_dataset_path": str,
+    "metrics": {"patterns": dict, "step_key": str, "capacity": int, "downsample": str},
+    "scheduler": {"backend": str, "cpus": int, "mem": (str, int)},
+}
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def _type_name(expected: Any) -> str:
+    if isinstance(expected, tuple):
+        return " or ".join(t.__name__ for t in expected)
+    return expected.__name__
+
+
+def _check(value: Any, schema: Dict[str, Any], prefix: str, errors: List[str]) -> None:
+    for key, expected in schema.items():
+        if key not in value or value[key] is None:
+            continue
+        item = value[key]
+        name = f"{prefix}{key}"
+        if isinstance(expected, dict):
+            if isinstance(item, dict):
+                _check(item, expected, f"{name}.", errors)
+            else:
+                errors.append(f"{name}: expected a mapping, got {type(item).__name__}")
+        elif isinstance(item, bool) and bool not in (expected if isinstance(expected, tuple) else (expected,)):
+            errors.append(f"{name}: expected {_type_name(expected)}, got bool")
+        elif not isinstance(item, expected):
+            errors.append(f"{name}: expected {_type_name(expected)}, got {type(item).__name__}")
+
+
+def validate_config(config: Any) -> None:
+    """Raises ConfigError listing every key whose value has the wrong type."""
+    if not isinstance(config, dict):
+        raise ConfigError("Invalid configuration: expected a mapping at the top level")
+    errors: List[str] = []
+    _check(config, CONFIG_SCHEMA, "", errors)
+    if errors:
+        raise ConfigError("Invalid configuration:\n  " + "\n  ".join(errors))
+
+
+def _merge_defaults(d: Dict[str, Any], default: Dict[str, Any]) -> Dict[str, Any]:
+    for k, v in default.items():
+        if isinstance(v, dict):
+            d[k] = _merge_defaults(d.get(k, {}) or {}, v)
+        else:
+            d.setdefault(k, v)
+    return d
+
 
 def ensure_dirs(config: Dict[str, Any]) -> None:
-    for key in ["workspace_dir", "jobs_dir", "logs_dir"]:
+    for key in _DIR_KEYS:
         path = config.get(key)
         if path and not os.path.isdir(path):
             os.makedirs(path, exist_ok=True)
 
 
+def _write_atomic(path: str, text: str) -> None:
+    """Writes through a temp file and rename, so a crash never leaves a truncated file behind."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class ConfigService:
+    """
+    Owns the configuration dict and its file.
+
+    `data` is validated when loaded. Edits are made to `data` in place and followed by
+    `schedule_save()`: saves within `delay` seconds of each other coalesce into one write,
+    which happens on a timer thread from a snapshot taken at the last edit. Identical
+    content is never rewritten. `reload_if_changed()` picks up edits made to the file
+    by someone else; `close()` writes anything still pending.
+    """
+
+    def __init__(self, path: str = CONFIG_PATH, delay: float = 0.5):
+        self.path = path
+        self.delay = delay
+        self.data: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._pending: Optional[Dict[str, Any]] = None
+        self._written_text: Optional[str] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._dirs_ensured = set()
+
+    def _read(self) -> Dict[str, Any]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            text = f.read()
+        try:
+            data = yaml.safe_load(text) or {}
+        except yaml.YAMLError as e:
+            raise ConfigError(f"{self.path}: {e}") from e
+        validate_config(data)
+        self._written_text = text
+        return _merge_defaults(data, copy.deepcopy(_DEFAULT_CONFIG))
+
+    def _ensure_dirs(self, config: Dict[str, Any]) -> None:
+        """Creates the workspace, jobs and logs directories once per distinct path."""
+        for key in _DIR_KEYS:
+            path = config.get(key)
+            if path and path not in self._dirs_ensured:
+                os.makedirs(path, exist_ok=True)
+                self._dirs_ensured.add(path)
+
+    def load(self) -> Dict[str, Any]:
+        if not os.path.isfile(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.data = copy.deepcopy(_DEFAULT_CONFIG)
+            self._write(self.data)
+        else:
+            self.data = self._read()
+            self._stamp = _file_stamp(self.path)
+        self._ensure_dirs(self.data)
+        return self.data
+
+    def _write(self, config: Dict[str, Any]) -> None:
+        validate_config(config)
+        text = yaml.dump(config, sort_keys=False)
+        if text != self._written_text:
+            _write_atomic(self.path, text)
+            self._written_text = text
+        self._stamp = _file_stamp(self.path)
+        self._ensure_dirs(config)
+
+    def schedule_save(self) -> None:
+        with self._lock:
+            self._pending = copy.deepcopy(self.data)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if pending is not None:
+                self._write(pending)
+
+    def save(self) -> None:
+        """Writes the current data now, replacing any pending save."""
+        with self._lock:
+            self._pending = copy.deepcopy(self.data)
+        self.flush()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-reads the file if it changed since it was last read or written and updates
+        `data` in place. Skipped while a save is pending, as that save is newer.
+        """
+        with self._lock:
+            if _file_stamp(self.path) in (None, self._stamp) or self._pending is not None:
+                return False
+            data = self._read()
+            self._stamp = _file_stamp(self.path)
+            self.data.clear()
+            self.data.update(data)
+            self._ensure_dirs(self.data)
+            return True
+
+    def close(self) -> None:
+        self.flush()
+
+
 def load_config() -> Dict[str, Any]:
-    if not os.path.isfile(CONFIG_PATH):
-        os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
-        save_config(_DEFAULT_CONFIG)
-        return dict(_DEFAULT_CONFIG)
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or {}
-    # Merge defaults
-    def merge(d: Dict[str, Any], default: Dict[str, Any]) -> Dict[str, Any]:
-        for k, v in default.items():
-            if isinstance(v, dict):
-                d[k] = merge(d.get(k, {}) or {}, v)
-            else:
-                d.setdefault(k, v)
-        return d
-    data = merge(data, _DEFAULT_CONFIG)
-    ensure_dirs(data)
-    return data
+    return ConfigService().load()
 
 
 def save_config(config: Dict[str, Any]) -> None:
-    ensure_dirs(config)
-    with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-        yaml.dump(config, f, sort_keys=False)
+    service = ConfigService()
+    service.data = config
+    service.save()
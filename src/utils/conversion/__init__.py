@@ -0,0 +1 @@
+# Conversion pipeline package
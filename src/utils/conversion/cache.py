@@ -0,0 +1,40 @@
+import hashlib
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+def fingerprint_files(paths: Iterable[str]) -> str:
+    """Identifies a set of files by path, size and modification time, without reading them."""
+    h = hashlib.sha1()
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns};".encode("utf-8"))
+    return h.hexdigest()
+
+
+def cache_key(*parts) -> str:
+    """Combines strings, numbers and numpy arrays into a short, stable cache key."""
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            h.update(np.ascontiguousarray(part).tobytes())
+        else:
+            h.update(repr(part).encode("utf-8"))
+        h.update(b"|")
+    return h.hexdigest()[:16]
+
+
+def cache_path(cache_dir: Optional[str], prefix: str, key: str, ext: str = ".npy") -> Optional[str]:
+    if not cache_dir:
+        return None
+    return os.path.join(cache_dir, f"{prefix}-{key}{ext}")
+
+
+def save_array_atomic(path: str, array: np.ndarray) -> None:
+    """Writes an .npy file via a temporary file so readers never see a partial cache entry."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
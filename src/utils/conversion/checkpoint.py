@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import shutil
+import signal
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.jsonl"
+
+
+class Part(NamedTuple):
+    """A flushed range of converted subjects: kept-subject positions start .. start + count."""
+    file: str
+    start: int
+    count: int
+    size: int
+    sha256: str
+
+    @property
+    def stop(self) -> int:
+        return self.start + self.count
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class CheckpointStore:
+    """
+    Append-only on-disk store of converted subjects.
+
+    Each flush writes one part file (node features, edges and per-graph edge counts for
+    a contiguous range of subjects) via a temporary file and rename, then appends a line
+    to manifest.jsonl. The manifest header records a key identifying the run (inputs,
+    label mask and conversion options), so a checkpoint is never resumed by a different
+    conversion.
+    """
+
+    def __init__(self, directory: str, run_key: str):
+        self.directory = directory
+        self.run_key = run_key
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.manifest_path)
+
+    def start(self, header: Optional[Dict] = None) -> None:
+        """Begins a fresh checkpoint, discarding any previous one in the directory."""
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory)
+        self._append_line({"type": "header", "run_key": self.run_key, **(header or {})})
+
+    def _append_line(self, record: Dict) -> None:
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with open(self.manifest_path, "a+b") as f:
+            # An append interrupted mid-write leaves a torn last line; start on a line of our own
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_manifest(self) -> List[Dict]:
+        records = []
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn line from an interrupted append; later records are still valid
+        return records
+
+    def append(self, start: int, x: np.ndarray, edges: np.ndarray, edge_counts: np.ndarray,
+               extra: Optional[Dict[str, np.ndarray]] = None) -> Part:
+        """Flushes a range of subjects; `extra` holds further per-subject columns (e.g. statistics)."""
+        name = f"part-{start:08d}.npz"
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.tmp.npz"
+        columns = {f"extra.{k}": v for k, v in (extra or {}).items()}
+        np.savez(tmp_path, x=x, edges=edges, edge_counts=edge_counts, **columns)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        part = Part(name, start, len(edge_counts), os.path.getsize(path), _sha256(path))
+        self._append_line({"type": "part", **part._asdict()})
+        return part
+
+    def valid_parts(self) -> List[Part]:
+        """
+        Returns the verified parts covering subjects 0 .. n without gaps. Verification stops
+        at the first part that is missing, truncated or fails its checksum; everything
+        after it is recomputed.
+        """
+        records = self._read_manifest()
+        if not records or records[0].get("type") != "header":
+            raise ValueError(f"Checkpoint manifest {self.manifest_path} has no header")
+        if records[0].get("run_key") != self.run_key:
+            raise ValueError(
+                f"Checkpoint in {self.directory} was written by a different conversion "
+                "(inputs, labels or options changed); remove it or run without --resume"
+            )
+        # A range recomputed after a failed verification is re-appended; the latest record wins.
+        latest = {r["start"]: Part(**{k: r[k] for k in Part._fields}) for r in records[1:] if r.get("type") == "part"}
+        parts = [latest[start] for start in sorted(latest)]
+        valid: List[Part] = []
+        expected = 0
+        for part in parts:
+            path = os.path.join(self.directory, part.file)
+            if part.start != expected or not os.path.isfile(path):
+                break
+            if os.path.getsize(path) != part.size or _sha256(path) != part.sha256:
+                break
+            valid.append(part)
+            expected = part.stop
+        return valid
+
+    def load(self, part: Part):
+        with np.load(os.path.join(self.directory, part.file)) as f:
+            return f["x"], f["edges"], f["edge_counts"]
+
+    def load_extra(self, part: Part) -> Dict[str, np.ndarray]:
+        """The extra columns flushed with a part; empty for parts written without them."""
+        with np.load(os.path.join(self.directory, part.file)) as f:
+            return {k[len("extra."):]: f[k] for k in f.files if k.startswith("extra.")}
+
+    def remove(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class StopRequest:
+    """
+    Records SIGTERM/SIGUSR1 (sent by SLURM before a time limit or preemption) so the
+    conversion loop can flush its checkpoint and exit between chunks. The job template
+    requests USR1 ten minutes early (--signal), as the current chunk has to finish first.
+    """
+
+    def __init__(self, signals=("SIGTERM", "SIGUSR1")):
+        self.signum: Optional[int] = None
+        for name in signals:
+            sig = getattr(signal, name, None)
+            if sig is not None:
+                signal.signal(sig, self._handle)
+
+    def _handle(self, signum, frame) -> None:
+        self.signum = signum
+
+    def __bool__(self) -> bool:
+        return self.signum is not None
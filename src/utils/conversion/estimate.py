@@ -0,0 +1,274 @@
+# Predicts peak memory and runtime of a conversion from the .mat headers, and derives a
+# chunk size and SLURM resources from them. Stdlib only, so the GUI can estimate without
+# the conversion environment.
+import json
+import math
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .feature_names import COMPUTE_BOUND_FEATURES, check_spectral_dim, is_compute_bound
+from .matfile import CLASS_ITEMSIZE, connectivity_variable, whosmat
+
+DEFAULT_COST_MODEL_PATH = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "config", "conversion_cost_model.json"))
+
+DEFAULT_CHUNK_SIZE = 32
+MAX_CHUNK_SIZE = 64
+
+# Cost model of the conversion pipeline. Times are seconds per subject divided by N^p for
+# an N-ROI matrix (p = 2 for elementwise work, 3 for matmul/eigh), on one CPU. The memory
+# factors are multiples of one float64 N x N matrix per subject. Measured by
+# `python benchmarks/bench_conversion.py --calibrate`, which writes DEFAULT_COST_MODEL_PATH.
+DEFAULT_COST_MODEL: Dict[str, Any] = {
+    "version": 1,
+    "base_mb": 700.0,  # interpreter with numpy, scipy, torch and torch_geometric loaded
+    "startup_s": 6.0,
+    "load_mb_per_s": 100.0,  # scipy.io.loadmat, including decompression
+    "load_factor": 1.5,  # resident copies of an input file while it is being loaded
+    "chunk_factor": 12.0,  # working set of one chunk, per subject
+    "sparsify_n2": {"proportional": 6e-8, "absolute": 1e-8, "knn": 4e-8, "mst_topk": 6e-8, "signed": 1e-7},
+    "edges_n2": 7e-9,
+    "stats_n2": 3.5e-8,
+    # [coefficient, exponent] per node feature extractor
+    "features": {
+        "adjacency": [1.5e-9, 2],
+        "degree": [1.2e-8, 2],
+        "strength": [1e-9, 2],
+        "clustering": [2e-10, 3],
+        "eigenvector": [7e-10, 3],
+        "spectral": [7.5e-10, 3],
+    },
+    "parallel_efficiency": 0.6,  # speedup per extra CPU of the matmul/eigh features
+}
+
+class InputShape(NamedTuple):
+    path: str
+    num_rois: int
+    num_subjects: int
+    itemsize: int
+
+
+def scan_input_shapes(paths: Sequence[str]) -> List[InputShape]:
+    """The connectivity stack of each input, chosen as by conversion.inputs."""
+    shapes = []
+    for path in paths:
+        _, shape, mat_class = connectivity_variable(whosmat(path), path)
+        shapes.append(InputShape(path, shape[0], shape[2], CLASS_ITEMSIZE.get(mat_class, 8)))
+    rois = {s.num_rois for s in shapes}
+    if len(rois) > 1:
+        raise ValueError(f"Input files disagree on the number of ROIs: {sorted(rois)}")
+    return shapes
+
+
+def load_cost_model(path: Optional[str] = None) -> Dict[str, Any]:
+    """DEFAULT_COST_MODEL updated with the calibrated values saved at `path`, when present."""
+    model = json.loads(json.dumps(DEFAULT_COST_MODEL))
+    path = path or DEFAULT_COST_MODEL_PATH
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        for key, value in saved.items():
+            if isinstance(value, dict) and isinstance(model.get(key), dict):
+                model[key].update(value)
+            else:
+                model[key] = value
+    return model
+
+
+def save_cost_model(model: Dict[str, Any], path: Optional[str] = None) -> str:
+    path = path or DEFAULT_COST_MODEL_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2)
+    return path
+
+
+def feature_width(node_features: Sequence[str], num_rois: int, spectral_dim: int = 8) -> int:
+    check_spectral_dim(node_features, num_rois, spectral_dim)
+    widths = {"adjacency": num_rois, "spectral": spectral_dim}
+    return sum(widths.get(name, 1) for name in node_features)
+
+
+def edges_per_subject(sparsifier: str, num_rois: int, threshold: float = 0.05, knn: int = 10) -> int:
+    """Upper bound on the directed edges a sparsifier keeps for one subject."""
+    pairs = num_rois * (num_rois - 1)
+    bounds = {
+        "proportional": round(pairs * threshold),
+        "absolute": pairs,
+        "knn": 2 * num_rois * min(knn, num_rois - 1),
+        "mst_topk": max(round(pairs * threshold), 2 * (num_rois - 1)),
+        "signed": 2 * round(pairs * threshold),
+    }
+    return min(pairs, bounds[sparsifier])
+
+
+def available_memory_mb() -> Optional[float]:
+    """Memory this process may use: the SLURM allocation, else the available system memory."""
+    mem_per_node = os.environ.get("SLURM_MEM_PER_NODE", "")
+    if mem_per_node.isdigit():
+        return float(mem_per_node)
+    mem_per_cpu = os.environ.get("SLURM_MEM_PER_CPU", "")
+    cpus = os.environ.get("SLURM_CPUS_PER_TASK", "") or os.environ.get("SLURM_CPUS_ON_NODE", "")
+    if mem_per_cpu.isdigit() and cpus.isdigit():
+        return float(mem_per_cpu) * int(cpus)
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class ConversionEstimate(NamedTuple):
+    num_subjects: int
+    num_rois: int
+    chunk_size: int
+    memory_mb: Dict[str, float]  # peak memory by component
+    seconds: float
+    cpus: int
+    compute_bound: bool
+    gpu_useful: bool
+
+    @property
+    def peak_mb(self) -> float:
+        return sum(self.memory_mb.values())
+
+    def slurm_settings(self) -> Dict[str, Any]:
+        """
+        Right-sized SLURM request: 25% memory headroom, twice the predicted runtime plus 10
+        minutes. One GPU is requested when it pays off; otherwise the GPU request is left
+        as configured, since the partition (GPU-only in the widget) decides where the job
+        queues and dropping just the GPUs would not move it to a CPU partition.
+        """
+        mem_gb = max(4, math.ceil(self.peak_mb * 1.25 / 1024))
+        minutes = max(30, math.ceil((2 * self.seconds + 600) / 60 / 15) * 15)
+        days, minutes = divmod(minutes, 24 * 60)
+        hours, minutes = divmod(minutes, 60)
+        time = f"{days}-{hours:02d}:{minutes:02d}:00" if days else f"{hours:02d}:{minutes:02d}:00"
+        settings = {"mem": f"{mem_gb}G", "cpus": self.cpus, "time": time}
+        if self.gpu_useful:
+            settings["gpus"] = 1
+        return settings
+
+    def describe(self) -> str:
+        parts = ", ".join(f"{name} {mb:,.0f}" for name, mb in self.memory_mb.items())
+        slurm = self.slurm_settings()
+        return "\n".join([
+            f"{self.num_subjects} subjects x {self.num_rois} ROIs, chunk size {self.chunk_size}",
+            f"Peak memory ~{self.peak_mb:,.0f} MB ({parts})",
+            f"Runtime ~{self.seconds / 60:.1f} min on {self.cpus} CPU(s)"
+            + ("" if self.compute_bound else " (no matmul/eigh features: CPU-bound, a GPU would idle)"),
+            f"SLURM request: mem={slurm['mem']}, cpus={slurm['cpus']}, gpus={slurm.get('gpus', 'as configured')},"
+            f" time={slurm['time']}",
+            *([] if self.gpu_useful else ["A GPU would not speed this conversion up; a CPU partition would do."]),
+        ])
+
+
+def memory_mb(model: Dict[str, Any], shapes: Sequence[InputShape], chunk_size: int, width: int,
+              edges: int) -> Dict[str, float]:
+    """
+    Peak memory by component: the interpreter, the largest input file while it is loaded,
+    one chunk's working set, and the outputs, whose edge list is held twice while the
+    chunks are concatenated.
+    """
+    n = shapes[0].num_rois
+    subjects = sum(s.num_subjects for s in shapes)
+    matrix_mb = n * n * 8 / 2 ** 20
+    return {
+        "base": model["base_mb"],
+        "input": max(s.num_subjects * n * n * s.itemsize for s in shapes) / 2 ** 20 * model["load_factor"],
+        "chunk": chunk_size * matrix_mb * model["chunk_factor"],
+        "features": subjects * n * width * 4 / 2 ** 20,
+        "edges": 2 * subjects * edges * 16 / 2 ** 20,
+    }
+
+
+def runtime_seconds(model: Dict[str, Any], shapes: Sequence[InputShape], node_features: Sequence[str],
+                    sparsifier: str, cpus: int) -> float:
+    n = shapes[0].num_rois
+    subjects = sum(s.num_subjects for s in shapes)
+    host = (model["sparsify_n2"][sparsifier] + model["edges_n2"] + model["stats_n2"]) * n ** 2
+    cubic = 0.0
+    for name in node_features:
+        coef, exponent = model["features"][name]
+        if name in COMPUTE_BOUND_FEATURES:
+            cubic += coef * n ** exponent
+        else:
+            host += coef * n ** exponent
+    speedup = 1 + (max(1, cpus) - 1) * model["parallel_efficiency"]
+    load = sum(s.num_subjects * n * n * s.itemsize for s in shapes) / 2 ** 20 / model["load_mb_per_s"]
+    return model["startup_s"] + load + subjects * (host + cubic / speedup)
+
+
+def choose_chunk_size(model: Dict[str, Any], shapes: Sequence[InputShape], width: int, edges: int,
+                      available_mb: Optional[float]) -> int:
+    """
+    The largest chunk size up to MAX_CHUNK_SIZE whose predicted peak stays under 80% of
+    `available_mb`; DEFAULT_CHUNK_SIZE when the available memory is unknown.
+    """
+    subjects = max(1, sum(s.num_subjects for s in shapes))
+    if available_mb is None:
+        return min(DEFAULT_CHUNK_SIZE, subjects)
+    fixed = sum(memory_mb(model, shapes, 0, width, edges).values())
+    per_subject = memory_mb(model, shapes, 1, width, edges)["chunk"]
+    fits = int((0.8 * available_mb - fixed) // per_subject) if per_subject > 0 else MAX_CHUNK_SIZE
+    return max(1, min(fits, MAX_CHUNK_SIZE, subjects))
+
+
+def auto_chunk_size(paths: Sequence[str], node_features: Sequence[str], sparsifier: str = "proportional",
+                    threshold: float = 0.05, knn: int = 10, spectral_dim: int = 8) -> Tuple[int, Optional[float]]:
+    """Chunk size fitting the memory available to this process, with that memory in MB (None if unknown)."""
+    shapes = scan_input_shapes(paths)
+    n = shapes[0].num_rois
+    available = available_memory_mb()
+    chunk = choose_chunk_size(load_cost_model(), shapes, feature_width(node_features, n, spectral_dim),
+                              edges_per_subject(sparsifier, n, threshold, knn), available)
+    return chunk, available
+
+
+def _recommended_cpus(model: Dict[str, Any], shapes: Sequence[InputShape], node_features: Sequence[str],
+                      sparsifier: str) -> int:
+    """Doubles the CPUs while that still cuts the predicted runtime by at least 15%."""
+    if not is_compute_bound(node_features):
+        return 2
+    cpus = 1
+    while cpus < 32:
+        now = runtime_seconds(model, shapes, node_features, sparsifier, cpus)
+        if runtime_seconds(model, shapes, node_features, sparsifier, cpus * 2) > 0.85 * now:
+            break
+        cpus *= 2
+    return max(2, cpus)
+
+
+def estimate_conversion(paths: Sequence[str], node_features: Sequence[str] = ("adjacency",),
+                        sparsifier: str = "proportional", threshold: float = 0.05, knn: int = 10,
+                        spectral_dim: int = 8, chunk_size: Optional[int] = None, cpus: Optional[int] = None,
+                        model: Optional[Dict[str, Any]] = None) -> ConversionEstimate:
+    """
+    Predicts the conversion of `paths` from their headers. Every subject is counted, as
+    labels are not read. Without `chunk_size`, DEFAULT_CHUNK_SIZE is assumed (the job then
+    sizes its chunks to its allocation); without `cpus`, the count past which more CPUs
+    stop paying off is used.
+    """
+    model = model or load_cost_model()
+    shapes = scan_input_shapes(paths)
+    n = shapes[0].num_rois
+    subjects = sum(s.num_subjects for s in shapes)
+    width = feature_width(node_features, n, spectral_dim)
+    edges = edges_per_subject(sparsifier, n, threshold, knn)
+    chunk = min(chunk_size or DEFAULT_CHUNK_SIZE, max(1, subjects))
+    cpus = cpus or _recommended_cpus(model, shapes, node_features, sparsifier)
+    seconds = runtime_seconds(model, shapes, node_features, sparsifier, cpus)
+
+    compute_bound = is_compute_bound(node_features)
+    cubic_share = 1 - runtime_seconds(model, shapes, [f for f in node_features if f not in COMPUTE_BOUND_FEATURES],
+                                      sparsifier, cpus) / seconds
+    # A GPU only helps the matmul/eigh features, and only when they dominate a long run
+    gpu_useful = compute_bound and cubic_share > 0.25 and seconds > 300
+    return ConversionEstimate(subjects, n, chunk, memory_mb(model, shapes, chunk, width, edges), seconds, cpus,
+                              compute_bound, gpu_useful)
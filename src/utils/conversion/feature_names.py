@@ -0,0 +1,18 @@
+# Names of the node feature extractors in features.py. Stdlib only, so the GUI and the
+# resource estimator can list and classify features without importing torch.
+from typing import Sequence
+
+FEATURE_NAMES = ("adjacency", "degree", "strength", "clustering", "eigenvector", "spectral")
+
+# Extractors dominated by batched matmul/eigh; only these justify moving a chunk to the GPU.
+COMPUTE_BOUND_FEATURES = ("clustering", "eigenvector", "spectral")
+
+
+def is_compute_bound(names: Sequence[str]) -> bool:
+    return any(n in COMPUTE_BOUND_FEATURES for n in names)
+
+
+def check_spectral_dim(names: Sequence[str], num_rois: int, spectral_dim: int) -> None:
+    """The spectral features take eigenvectors 1 .. spectral_dim, so at most num_rois - 1 of them."""
+    if "spectral" in names and not 1 <= spectral_dim < num_rois:
+        raise ValueError(f"spectral_dim must be between 1 and {num_rois - 1} for {num_rois} ROIs; got {spectral_dim}")
@@ -0,0 +1,150 @@
+import os
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+from .cache import cache_path, save_array_atomic
+from .feature_names import COMPUTE_BOUND_FEATURES, FEATURE_NAMES, check_spectral_dim, is_compute_bound  # noqa: F401
+from .runtime import DevicePolicy
+
+# Each extractor maps a batch of thresholded adjacency matrices (B, N, N) to node
+# features (B, N, k). All of them operate on the whole batch at once.
+FeatureFn = Callable[..., torch.Tensor]
+
+
+def _binary(W: torch.Tensor, positive_only: bool = True) -> torch.Tensor:
+    """Unweighted adjacency of the edges edges_from_stack emits: positive entries only, or all nonzero ones."""
+    A = (W > 0 if positive_only else W != 0).to(W.dtype)
+    return A * (1 - torch.eye(W.shape[-1], dtype=W.dtype, device=W.device))
+
+
+def _symmetric_abs(W: torch.Tensor) -> torch.Tensor:
+    M = W.abs()
+    return (M + M.transpose(-1, -2)) / 2
+
+
+def _fix_sign(vecs: torch.Tensor) -> torch.Tensor:
+    """Makes eigenvector signs deterministic: the largest-magnitude entry of each vector is positive."""
+    idx = vecs.abs().argmax(dim=-2, keepdim=True)
+    signs = torch.sign(torch.gather(vecs, -2, idx))
+    return vecs * torch.where(signs == 0, torch.ones_like(signs), signs)
+
+
+def adjacency(W: torch.Tensor, **_) -> torch.Tensor:
+    """Full row of the thresholded matrix (k = N); the original node features."""
+    return W
+
+
+def degree(W: torch.Tensor, positive_only: bool = True, **_) -> torch.Tensor:
+    """Number of retained connections per node."""
+    return _binary(W, positive_only).sum(-1, keepdim=True)
+
+
+def strength(W: torch.Tensor, **_) -> torch.Tensor:
+    """Sum of retained connection weights per node."""
+    return W.sum(-1, keepdim=True)
+
+
+def clustering(W: torch.Tensor, positive_only: bool = True, **_) -> torch.Tensor:
+    """Binary clustering coefficient, diag(A^3) / (k (k - 1))."""
+    A = _binary(W, positive_only)
+    closed = (torch.matmul(A, A) * A).sum(-1)
+    k = A.sum(-1)
+    denom = k * (k - 1)
+    return torch.where(denom > 0, closed / denom.clamp(min=1), torch.zeros_like(k)).unsqueeze(-1)
+
+
+def eigenvector(W: torch.Tensor, **_) -> torch.Tensor:
+    """Eigenvector centrality: leading eigenvector of |W|, scaled to unit norm."""
+    _, vecs = torch.linalg.eigh(_symmetric_abs(W))
+    return vecs[..., -1:].abs()
+
+
+def spectral(W: torch.Tensor, spectral_dim: int = 8, **_) -> torch.Tensor:
+    """Laplacian eigenmap: the `spectral_dim` smallest non-trivial eigenvectors of the normalized Laplacian."""
+    check_spectral_dim(["spectral"], W.shape[-1], spectral_dim)
+    M = _symmetric_abs(W)
+    d = M.sum(-1)
+    d_inv_sqrt = torch.where(d > 0, d.clamp(min=1e-12).rsqrt(), torch.zeros_like(d))
+    eye = torch.eye(W.shape[-1], dtype=W.dtype, device=W.device)
+    L = eye - d_inv_sqrt.unsqueeze(-1) * M * d_inv_sqrt.unsqueeze(-2)
+    _, vecs = torch.linalg.eigh(L)
+    return _fix_sign(vecs[..., 1:spectral_dim + 1])
+
+
+FEATURE_EXTRACTORS: Dict[str, FeatureFn] = {
+    "adjacency": adjacency,
+    "degree": degree,
+    "strength": strength,
+    "clustering": clustering,
+    "eigenvector": eigenvector,
+    "spectral": spectral,
+}
+
+
+def parse_feature_names(spec: str) -> List[str]:
+    names = [n.strip().lower() for n in spec.split(",") if n.strip()]
+    unknown = [n for n in names if n not in FEATURE_EXTRACTORS]
+    if unknown or not names:
+        raise ValueError(f"Unknown node features {unknown}; choose from {', '.join(FEATURE_EXTRACTORS)}")
+    return names
+
+
+def extract_features(W: torch.Tensor, names: Sequence[str], **options) -> torch.Tensor:
+    """Runs the selected extractors on a (B, N, N) batch and concatenates their outputs along the last axis."""
+    W = W.to(torch.float64)
+    return torch.cat([FEATURE_EXTRACTORS[n](W, **options) for n in names], dim=-1)
+
+
+class FeatureStage:
+    """
+    Node-feature stage of the conversion pipeline.
+
+    Features for the whole (kept) subject stack are written chunk by chunk into a single
+    (subjects * N, k) float32 array. Unless the raw adjacency rows are requested, that
+    array is cached under `cache_dir` so that a re-run with the same inputs, threshold
+    and extractors skips the computation.
+    """
+
+    def __init__(self, names: Sequence[str], num_subjects: int, num_rois: int,
+                 cache_dir: Optional[str] = None, cache_key: str = "", policy: Optional[DevicePolicy] = None,
+                 **options):
+        self.names = list(names)
+        self.policy = policy
+        self.num_subjects = num_subjects
+        self.num_rois = num_rois
+        self.options = options
+        self.features: Optional[np.ndarray] = None
+        self.path = None
+        if "adjacency" not in self.names:
+            self.path = cache_path(cache_dir, "features", cache_key)
+        self.from_cache = bool(self.path and os.path.isfile(self.path))
+        if self.from_cache:
+            self.features = np.load(self.path)
+
+    def process(self, start: int, W: np.ndarray) -> np.ndarray:
+        """Returns features for the kept subjects start .. start + len(W) as (B * N, k) rows."""
+        rows = slice(start * self.num_rois, (start + len(W)) * self.num_rois)
+        if self.from_cache:
+            return self.features[rows]
+        W_t = self.policy.to_device(W) if self.policy else torch.from_numpy(W)
+        feats = extract_features(W_t, self.names, **self.options)
+        feats = feats.reshape(-1, feats.shape[-1]).to(torch.float32)
+        feats = self.policy.to_host(feats) if self.policy else feats.numpy()
+        if self.features is None:
+            self.features = np.empty((self.num_subjects * self.num_rois, feats.shape[1]), dtype=np.float32)
+        self.features[rows] = feats
+        return self.features[rows]
+
+    def fill(self, start: int, x: np.ndarray) -> None:
+        """Stores previously computed (B * N, k) feature rows, e.g. restored from a checkpoint."""
+        if self.from_cache:
+            return
+        if self.features is None:
+            self.features = np.empty((self.num_subjects * self.num_rois, x.shape[1]), dtype=np.float32)
+        self.features[start * self.num_rois:start * self.num_rois + len(x)] = x
+
+    def finalize(self) -> None:
+        if self.path and not self.from_cache and self.features is not None:
+            save_array_atomic(self.path, self.features)
@@ -0,0 +1,184 @@
+import os
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+import torch
+from torch_geometric.data import Data
+
+
+class GraphIndex:
+    """
+    CSR-style index over graphs concatenated along the node and edge axes.
+
+    Graph i owns nodes node_ptr[i]:node_ptr[i + 1] and edges (columns of edge_index)
+    edge_ptr[i]:edge_ptr[i + 1]. Both pointer arrays have length num_graphs + 1 and are
+    the offset tables stored in the `data2` slices dict of the converted dataset.
+    """
+
+    def __init__(self, node_ptr: np.ndarray, edge_ptr: np.ndarray, subject_ids: Optional[Sequence[str]] = None):
+        if len(node_ptr) != len(edge_ptr):
+            raise ValueError("node_ptr and edge_ptr must have the same length")
+        self.node_ptr = np.asarray(node_ptr, dtype=np.int64)
+        self.edge_ptr = np.asarray(edge_ptr, dtype=np.int64)
+        self.subject_ids = list(subject_ids) if subject_ids is not None else None
+
+    def __len__(self) -> int:
+        return len(self.node_ptr) - 1
+
+    @property
+    def num_nodes(self) -> int:
+        return int(self.node_ptr[-1])
+
+    @property
+    def num_edges(self) -> int:
+        return int(self.edge_ptr[-1])
+
+    @classmethod
+    def from_counts(cls, node_counts: np.ndarray, edge_counts: np.ndarray,
+                    subject_ids: Optional[Sequence[str]] = None) -> "GraphIndex":
+        node_ptr = np.zeros(len(node_counts) + 1, dtype=np.int64)
+        edge_ptr = np.zeros(len(edge_counts) + 1, dtype=np.int64)
+        np.cumsum(node_counts, out=node_ptr[1:])
+        np.cumsum(edge_counts, out=edge_ptr[1:])
+        return cls(node_ptr, edge_ptr, subject_ids)
+
+    def save(self, path: str) -> None:
+        arrays = {"node_ptr": self.node_ptr, "edge_ptr": self.edge_ptr}
+        if self.subject_ids is not None:
+            arrays["subject_ids"] = np.asarray(self.subject_ids, dtype=str)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "GraphIndex":
+        with np.load(path) as f:
+            ids = f["subject_ids"].tolist() if "subject_ids" in f.files else None
+            return cls(f["node_ptr"], f["edge_ptr"], ids)
+
+    def extend(self, other: "GraphIndex") -> "GraphIndex":
+        """Index of this index's graphs followed by `other`'s, as when their tensors are concatenated."""
+        node_ptr = np.concatenate([self.node_ptr, other.node_ptr[1:] + self.num_nodes])
+        edge_ptr = np.concatenate([self.edge_ptr, other.edge_ptr[1:] + self.num_edges])
+        ids = None
+        if self.subject_ids is not None and other.subject_ids is not None:
+            ids = self.subject_ids + other.subject_ids
+        return GraphIndex(node_ptr, edge_ptr, ids)
+
+
+class GraphIndexBuilder:
+    """Accumulates per-graph node and edge counts into preallocated arrays."""
+
+    def __init__(self, num_graphs: int):
+        self.node_counts = np.zeros(num_graphs, dtype=np.int64)
+        self.edge_counts = np.zeros(num_graphs, dtype=np.int64)
+
+    def set_counts(self, start: int, node_counts, edge_counts) -> None:
+        stop = start + len(edge_counts)
+        self.node_counts[start:stop] = node_counts
+        self.edge_counts[start:stop] = edge_counts
+
+    def build(self, subject_ids: Optional[Sequence[str]] = None) -> GraphIndex:
+        return GraphIndex.from_counts(self.node_counts, self.edge_counts, subject_ids)
+
+
+def edges_from_stack(W: np.ndarray, positive_only: bool = True):
+    """
+    Extracts the edges of a (B, N, N) batch of thresholded matrices in one pass.
+
+    Returns a (2, E) int64 array of per-graph (local) node indices, ordered by graph,
+    then row, then column, and the number of edges of each graph. Self-loops are dropped.
+    """
+    b, row, col = np.nonzero(W > 0 if positive_only else W != 0)
+    mask = row != col
+    b, row, col = b[mask], row[mask], col[mask]
+    edges = np.empty((2, len(row)), dtype=np.int64)
+    edges[0] = row
+    edges[1] = col
+    return edges, np.bincount(b, minlength=len(W))
+
+
+def index_path_for(dataset_path: str) -> str:
+    """Location of the index sidecar written next to a converted .pt dataset."""
+    return f"{os.path.splitext(dataset_path)[0]}.index.npz"
+
+
+class GraphViews:
+    """
+    Random access to the graphs of a converted dataset.
+
+    Every per-graph `Data` holds views into the concatenated x, edge_index and y tensors.
+    The views are created once, in a single split per tensor, so indexing and shuffling
+    never copy or allocate tensor storage.
+    """
+
+    def __init__(self, x: torch.Tensor, edge_index: torch.Tensor, y: torch.Tensor, index: GraphIndex):
+        self.x = x
+        self.edge_index = edge_index
+        self.y = y
+        self.index = index
+        node_splits = torch.from_numpy(index.node_ptr[1:-1])
+        edge_splits = torch.from_numpy(index.edge_ptr[1:-1])
+        xs = torch.tensor_split(x, node_splits, dim=0)
+        edges = torch.tensor_split(edge_index, edge_splits, dim=1)
+        ys = torch.tensor_split(y, len(index), dim=0) if len(index) else ()
+        self._graphs: List[Data] = [Data(x=a, edge_index=b, y=c) for a, b, c in zip(xs, edges, ys)]
+
+    def __len__(self) -> int:
+        return len(self._graphs)
+
+    def __getitem__(self, i: int) -> Data:
+        return self._graphs[i]
+
+    def __iter__(self) -> Iterator[Data]:
+        return iter(self._graphs)
+
+    def shuffled(self, generator: Optional[torch.Generator] = None) -> Iterator[Data]:
+        """Yields the graphs in a random order; only the permutation is allocated."""
+        for i in torch.randperm(len(self._graphs), generator=generator).tolist():
+            yield self._graphs[i]
+
+
+def load_dataset_index(dataset_path: str) -> GraphIndex:
+    """The index of a converted dataset, from its sidecar (with subject IDs) or else its offset tables."""
+    sidecar = index_path_for(dataset_path)
+    if os.path.isfile(sidecar):
+        return GraphIndex.load(sidecar)
+    _, slices = torch.load(dataset_path, weights_only=False, mmap=True, map_location="cpu")
+    return GraphIndex(slices["x"].numpy(), slices["edge_index"].numpy())
+
+
+def append_graphs(dataset_path: str, x: torch.Tensor, edge_index: torch.Tensor, y: torch.Tensor,
+                  index: GraphIndex):
+    """
+    Concatenates new graphs after those of an existing dataset.
+
+    The existing tensors are memory-mapped and copied once into the concatenated
+    tensors; nothing of the existing graphs is recomputed. Edge indices are local to
+    each graph, so they need no shifting. Returns (x, edge_index, y, index).
+
+    Only the conversion work scales with the new subjects. The I/O does not: a
+    torch.save archive cannot be extended in place, and the training script loads a
+    single .pt file, so the caller rewrites the whole dataset and reads and writes
+    every existing graph once.
+    """
+    data, _ = torch.load(dataset_path, weights_only=False, mmap=True, map_location="cpu")
+    if data.x.shape[1] != x.shape[1]:
+        raise ValueError(f"{dataset_path} has {data.x.shape[1]} node features per node; the new subjects have {x.shape[1]}")
+    combined = load_dataset_index(dataset_path).extend(index)
+    return (torch.cat([data.x, x]), torch.cat([data.edge_index, edge_index], dim=1),
+            torch.cat([data.y, y.to(data.y.dtype)]), combined)
+
+
+def load_graph_views(dataset_path: str, mmap: bool = False) -> GraphViews:
+    """
+    Opens a converted dataset as per-graph views. With mmap=True the tensors are
+    memory-mapped from the .pt file instead of being read into memory.
+    """
+    data, slices = torch.load(dataset_path, weights_only=False, mmap=mmap, map_location="cpu")
+    sidecar = index_path_for(dataset_path)
+    if os.path.isfile(sidecar):
+        index = GraphIndex.load(sidecar)
+    else:
+        index = GraphIndex(slices["x"].numpy(), slices["edge_index"].numpy())
+    return GraphViews(data.x, data.edge_index, data.y, index)
@@ -0,0 +1,125 @@
+import os
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.io
+
+from .matfile import connectivity_variable
+
+# Variable names that may hold subject identifiers, checked case-insensitively.
+ID_VARIABLE_CANDIDATES = ("subject_id", "subject_ids", "subjectid", "subject", "subjects", "id", "ids")
+
+
+class InputSpec(NamedTuple):
+    """Header information for one connectivity .mat file."""
+    path: str
+    var_name: str
+    shape: Tuple[int, ...]
+    id_var_name: Optional[str]
+
+    @property
+    def num_subjects(self) -> int:
+        return int(self.shape[2])
+
+    @property
+    def num_rois(self) -> int:
+        return int(self.shape[0])
+
+
+def scan_input(path: str) -> InputSpec:
+    """
+    Reads the variable table of a connectivity .mat file without loading its data.
+
+    The connectivity variable is the first 3-D (ROIs x ROIs x subjects) array. A variable
+    whose name matches ID_VARIABLE_CANDIDATES and whose length equals the subject count is
+    used for subject identifiers.
+    """
+    variables = [v for v in scipy.io.whosmat(path) if not v[0].startswith("__")]
+    var_name, shape, _ = connectivity_variable(variables, path)
+
+    id_var_name = None
+    for name, var_shape, _ in variables:
+        if name.lower() in ID_VARIABLE_CANDIDATES and max(var_shape, default=0) == shape[2]:
+            id_var_name = name
+            break
+    return InputSpec(path, var_name, tuple(int(s) for s in shape), id_var_name)
+
+
+def scan_inputs(paths: Sequence[str]) -> List[InputSpec]:
+    specs = [scan_input(p) for p in paths]
+    rois = {s.num_rois for s in specs}
+    if len(rois) > 1:
+        raise ValueError(f"Input files disagree on the number of ROIs: {sorted(rois)}")
+    return specs
+
+
+def read_subject_ids(specs: Sequence[InputSpec]) -> Optional[List[str]]:
+    """
+    Returns the subject IDs of all inputs in ingestion order, or None when any input
+    lacks an ID variable (labels are then joined by position).
+    """
+    if not specs or any(s.id_var_name is None for s in specs):
+        return None
+    ids: List[str] = []
+    for spec in specs:
+        values = scipy.io.loadmat(spec.path, variable_names=[spec.id_var_name], simplify_cells=True)[spec.id_var_name]
+        ids.extend(normalize_id(v) for v in np.atleast_1d(values).ravel())
+    return ids
+
+
+def normalize_id(value) -> str:
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def iter_subject_matrices(specs: Sequence[InputSpec], keep: Optional[np.ndarray] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yields (global_subject_index, adjacency) for every kept subject, one input file at a time.
+
+    Each adjacency is a view into the loaded file, so dropping subjects never copies the
+    connectivity stack and only one input file is resident at a time.
+    """
+    offset = 0
+    for spec in specs:
+        n = spec.num_subjects
+        if keep is not None and not keep[offset:offset + n].any():
+            offset += n
+            continue
+        stack = scipy.io.loadmat(spec.path, variable_names=[spec.var_name])[spec.var_name]
+        for j in range(n):
+            if keep is None or keep[offset + j]:
+                yield offset + j, stack[:, :, j]
+        offset += n
+        del stack
+
+
+def iter_subject_chunks(specs: Sequence[InputSpec], keep: Optional[np.ndarray] = None,
+                        chunk_size: int = 32) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Groups kept subjects into (global_indices, stack) chunks with stack shaped
+    (B, ROIs, ROIs) for batch-vectorized processing.
+
+    The stack buffer is reused between chunks, so callers must not hold on to it.
+    """
+    n = specs[0].num_rois if specs else 0
+    buffer = np.empty((max(1, chunk_size), n, n), dtype=np.float64)
+    indices = np.empty(max(1, chunk_size), dtype=np.int64)
+    filled = 0
+    for g, adjacency in iter_subject_matrices(specs, keep):
+        buffer[filled] = adjacency
+        indices[filled] = g
+        filled += 1
+        if filled == len(buffer):
+            yield indices.copy(), buffer
+            filled = 0
+    if filled:
+        yield indices[:filled].copy(), buffer[:filled]
+
+
+def total_subjects(specs: Sequence[InputSpec]) -> int:
+    return sum(s.num_subjects for s in specs)
+
+
+def describe_inputs(specs: Sequence[InputSpec]) -> str:
+    return ", ".join(f"{os.path.basename(s.path)}:{s.var_name}{list(s.shape)}" for s in specs)
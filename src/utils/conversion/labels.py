@@ -0,0 +1,160 @@
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.io
+
+from .cache import cache_key, fingerprint_files
+from .inputs import ID_VARIABLE_CANDIDATES, normalize_id
+
+# Tables already built in this process, keyed by the same fingerprint as the on-disk cache.
+_TABLE_CACHE: Dict[str, "LabelTable"] = {}
+
+
+class LabelTable:
+    """
+    Label columns indexed by subject ID.
+
+    A table read from a file without subject IDs keeps a positional (RangeIndex) index,
+    in which case `align` joins labels to subjects by row order.
+    """
+
+    def __init__(self, frame: pd.DataFrame, by_id: bool):
+        self.frame = frame
+        self.by_id = by_id
+
+    @property
+    def columns(self) -> List[str]:
+        return [str(c) for c in self.frame.columns]
+
+    @property
+    def has_named_columns(self) -> bool:
+        return not all(c.startswith("col") and c[3:].isdigit() for c in self.columns)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def column(self, name: str) -> pd.Series:
+        """Selects a column by exact name, case-insensitive name, or integer position."""
+        if name in self.frame.columns:
+            return self.frame[name]
+        lowered = {c.lower(): c for c in self.columns}
+        if name.lower() in lowered:
+            return self.frame[lowered[name.lower()]]
+        if name.isdigit() and int(name) < len(self.frame.columns):
+            return self.frame.iloc[:, int(name)]
+        raise KeyError(f"Label column '{name}' not found. Available columns: {', '.join(self.columns)}")
+
+    def align(self, subject_ids: Optional[Sequence[str]], num_subjects: int, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Joins a label column to the ingested subjects.
+
+        Returns a boolean keep-mask over all `num_subjects` (False where the label is
+        missing or the subject is absent from the table) and the label values of the
+        kept subjects, in subject order.
+        """
+        series = pd.to_numeric(self.column(column), errors="coerce")
+        if self.by_id and subject_ids is not None:
+            if len(subject_ids) != num_subjects:
+                raise ValueError(f"Got {len(subject_ids)} subject IDs for {num_subjects} subjects")
+            values = series.reindex(pd.Index(subject_ids, dtype=object)).to_numpy(dtype=np.float64)
+        else:
+            values = np.full(num_subjects, np.nan)
+            n = min(num_subjects, len(series))
+            values[:n] = series.to_numpy(dtype=np.float64)[:n]
+        keep = ~np.isnan(values)
+        return keep, values[keep]
+
+    @classmethod
+    def from_file(cls, path: str, id_column: Optional[str] = None, cache_dir: Optional[str] = None) -> "LabelTable":
+        """
+        Builds the table for a labels file, reusing an in-process or on-disk cached copy
+        when the file has not changed since it was last parsed.
+        """
+        key = cache_key(fingerprint_files([path]), id_column or "")
+        if key in _TABLE_CACHE:
+            return _TABLE_CACHE[key]
+
+        cache_path = os.path.join(cache_dir, f"labels-{key}.pkl") if cache_dir else None
+        if cache_path and os.path.isfile(cache_path):
+            frame = pd.read_pickle(cache_path)
+        else:
+            frame = _read_frame(path)
+            frame = _index_by_id(frame, id_column)
+            if cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = f"{cache_path}.tmp"
+                frame.to_pickle(tmp_path)
+                os.replace(tmp_path, cache_path)
+
+        table = cls(frame, by_id=not isinstance(frame.index, pd.RangeIndex))
+        _TABLE_CACHE[key] = table
+        return table
+
+
+def _read_frame(path: str) -> pd.DataFrame:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return pd.read_csv(path)
+    if ext in (".tsv", ".txt"):
+        return pd.read_csv(path, sep="\t")
+    return _read_mat_frame(path)
+
+
+def _read_mat_frame(path: str) -> pd.DataFrame:
+    """
+    Reads labels from a .mat file. A struct of equal-length fields maps to named columns;
+    otherwise the first numeric array is used, named by a cell array of strings with one
+    entry per column when present, and by position ("col0", "col1", ...) when not.
+    """
+    mat = scipy.io.loadmat(path, simplify_cells=True)
+    variables = {k: v for k, v in mat.items() if not k.startswith("__")}
+
+    for value in variables.values():
+        if isinstance(value, dict):
+            return pd.DataFrame({k: np.atleast_1d(v).ravel() for k, v in value.items()})
+
+    arrays = {k: v for k, v in variables.items() if isinstance(v, np.ndarray) and v.dtype.kind in "biuf"}
+    if not arrays:
+        raise ValueError(f"No label array found in {path}")
+    data_name = next(iter(arrays))
+    data = np.atleast_1d(arrays[data_name])
+    if data.ndim == 1:
+        data = data[:, None]
+
+    names = [f"col{i}" for i in range(data.shape[1])]
+    ids = None
+    for name, value in variables.items():
+        if name == data_name:
+            continue
+        flat = np.atleast_1d(value).ravel() if isinstance(value, (np.ndarray, list)) else None
+        if flat is None:
+            continue
+        if flat.dtype == object and len(flat) == data.shape[1] and all(isinstance(v, str) for v in flat):
+            names = [str(v) for v in flat]
+        elif name.lower() in ID_VARIABLE_CANDIDATES and len(flat) == data.shape[0]:
+            ids = flat
+
+    frame = pd.DataFrame(data, columns=names)
+    if ids is not None:
+        frame.insert(0, "subject_id", ids)
+    return frame
+
+
+def _index_by_id(frame: pd.DataFrame, id_column: Optional[str]) -> pd.DataFrame:
+    if id_column is None:
+        candidates = [c for c in frame.columns if str(c).lower() in ID_VARIABLE_CANDIDATES]
+        if not candidates:
+            return frame.reset_index(drop=True)
+        id_column = candidates[0]
+    elif id_column not in frame.columns:
+        raise KeyError(f"Subject ID column '{id_column}' not found in labels")
+
+    ids = frame[id_column].map(normalize_id)
+    frame = frame.drop(columns=[id_column])
+    frame.index = pd.Index(ids, name="subject_id", dtype=object)
+    if not frame.index.is_unique:
+        dupes = frame.index[frame.index.duplicated()].unique().tolist()
+        raise ValueError(f"Duplicate subject IDs in labels: {dupes[:5]}")
+    return frame
@@ -0,0 +1,90 @@
+# Variable tables of MATLAB 5 (-v6/-v7) .mat files, read without loading the data, and
+# the choice of the connectivity variable shared by the conversion and the estimator.
+# Stdlib only: scipy.io.whosmat is used when scipy is installed, and the GUI environment,
+# which may lack it, falls back to parsing the variable headers directly.
+import struct
+import zlib
+from typing import List, Tuple
+
+# One variable as scipy.io.whosmat reports it: name, shape and MATLAB class
+MatVariable = Tuple[str, Tuple[int, ...], str]
+
+# Bytes per element once loaded, by MATLAB class
+CLASS_ITEMSIZE = {"double": 8, "single": 4, "int8": 1, "uint8": 1, "int16": 2, "uint16": 2, "int32": 4,
+                  "uint32": 4, "int64": 8, "uint64": 8, "logical": 1}
+
+# miMATRIX class codes
+_MAT_CLASSES = {1: "cell", 2: "struct", 3: "object", 4: "char", 5: "sparse", 6: "double", 7: "single",
+                8: "int8", 9: "uint8", 10: "int16", 11: "uint16", 12: "int32", 13: "uint32", 14: "int64",
+                15: "uint64"}
+_LOGICAL_FLAG = 0x0200
+_MI_MATRIX, _MI_COMPRESSED = 14, 15
+
+
+def _matrix_header(data: bytes, endian: str) -> MatVariable:
+    """Name, dimensions and class from the first sub-elements of an miMATRIX element."""
+    offset = 0
+    fields = []
+    for _ in range(3):  # array flags, dimensions, array name
+        mtype, nbytes = struct.unpack(endian + "II", data[offset:offset + 8])
+        if mtype >> 16:  # small data element: type and size share the first word
+            mtype, nbytes = mtype & 0xFFFF, mtype >> 16
+            fields.append((mtype, data[offset + 4:offset + 4 + nbytes]))
+            offset += 8
+        else:
+            fields.append((mtype, data[offset + 8:offset + 8 + nbytes]))
+            offset += 8 + nbytes + (-nbytes % 8)
+    (_, flags), (_, dims), (_, name) = fields
+    flag_word = struct.unpack(endian + "I", flags[:4])[0]
+    mat_class = "logical" if flag_word & _LOGICAL_FLAG else _MAT_CLASSES.get(flag_word & 0xFF, "unknown")
+    shape = struct.unpack(endian + f"{len(dims) // 4}i", dims)
+    return name.decode("latin1"), tuple(shape), mat_class
+
+
+def read_mat_header(path: str) -> List[MatVariable]:
+    """
+    scipy.io.whosmat without scipy: reads only the first bytes of each variable. v7.3
+    (HDF5) files are not supported, as by scipy.io.loadmat.
+    """
+    variables = []
+    with open(path, "rb") as f:
+        header = f.read(128)
+        if len(header) < 128 or header[:10] == b"MATLAB 7.3" or header[126:128] not in (b"IM", b"MI"):
+            raise ValueError(f"{path} is not a MATLAB 5 (-v6/-v7) .mat file")
+        endian = "<" if header[126:128] == b"IM" else ">"
+        while True:
+            tag = f.read(8)
+            if len(tag) < 8:
+                break
+            element_type, nbytes = struct.unpack(endian + "II", tag)
+            start = f.tell()
+            if element_type == _MI_COMPRESSED:
+                # Only the start of the variable is inflated; compressed elements are not padded
+                data = zlib.decompressobj().decompress(f.read(min(nbytes, 4096)), 8 + 256)
+                mtype, body, end = struct.unpack(endian + "I", data[:4])[0], data[8:], start + nbytes
+            else:
+                mtype, body, end = element_type, f.read(min(nbytes, 256)), start + nbytes + (-nbytes % 8)
+            if mtype == _MI_MATRIX:
+                variables.append(_matrix_header(body, endian))
+            f.seek(end)
+    return variables
+
+
+def whosmat(path: str) -> List[MatVariable]:
+    """The variables of a .mat file, from scipy.io.whosmat when scipy is available."""
+    try:
+        import scipy.io
+    except ImportError:
+        return read_mat_header(path)
+    return scipy.io.whosmat(path)
+
+
+def connectivity_variable(variables: List[MatVariable], path: str) -> MatVariable:
+    """The connectivity stack of an input: its first 3-D variable, which must be ROIs x ROIs x subjects."""
+    stacks = [v for v in variables if len(v[1]) == 3 and not v[0].startswith("__")]
+    if not stacks:
+        raise ValueError(f"No ROIs x ROIs x subjects array found in {path}")
+    name, shape, _ = stacks[0]
+    if shape[0] != shape[1]:
+        raise ValueError(f"Connectivity array '{name}' in {path} is not square: {shape}")
+    return stacks[0]
@@ -0,0 +1,154 @@
+# Reads the .stats.npz sidecar written by conversion/stats.py and summarizes it.
+import math
+import statistics
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Columns screened for outliers, with the label used in the report
+OUTLIER_COLUMNS = {
+    "edge_count": "edges",
+    "isolated_nodes": "isolated nodes",
+    "degree_std": "degree spread",
+    "weight_mean": "mean weight",
+    "weight_std": "weight spread",
+}
+
+# Fewer subjects give too unstable a median and MAD to call any of them unusual
+MIN_OUTLIER_COHORT = 10
+
+_BARS = " ▁▂▃▄▅▆▇█"
+
+
+def _robust_z(values: Sequence[float]) -> List[float]:
+    """
+    Distance of each value from the median, in robust standard deviations (MAD-based,
+    falling back to the mean absolute deviation when over half the values are equal).
+    """
+    center = statistics.median(values)
+    deviations = [abs(v - center) for v in values]
+    scale = statistics.median(deviations) / 0.6745
+    if scale == 0:
+        scale = statistics.mean(deviations) * 1.2533
+    if scale == 0:
+        return [0.0] * len(values)
+    return [(v - center) / scale for v in values]
+
+
+class Outlier(NamedTuple):
+    index: int
+    subject_id: str
+    reasons: List[str]
+
+
+class DatasetStats:
+    """Per-subject statistics of a converted dataset, read from its sidecar."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.subject_ids = [str(s) for s in arrays["subject_id"]]
+        self.labels = arrays["label"].tolist()
+        self.num_rois = arrays["num_rois"].item()
+        self.threshold = self._meta("threshold")
+        self.sparsifier = self._meta("sparsifier")
+        self.sparsity = self._meta("sparsity")
+
+    @classmethod
+    def load(cls, path: str) -> "DatasetStats":
+        with np.load(path) as f:
+            return cls({name: f[name] for name in f.files})
+
+    def _meta(self, key: str) -> Any:
+        value = self.arrays.get(f"meta_{key}")
+        return value.item() if value is not None else None
+
+    def __len__(self) -> int:
+        return len(self.subject_ids)
+
+    def column(self, name: str) -> list:
+        return self.arrays[name].tolist()
+
+    def _valid(self, name: str) -> List[Tuple[int, float]]:
+        """(subject index, value) of the rows that were computed."""
+        return [(i, v) for i, v in enumerate(self.column(name))
+                if not (isinstance(v, float) and math.isnan(v)) and not (isinstance(v, int) and v == -1)]
+
+    def label_counts(self) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for label in self.labels:
+            counts[label] = counts.get(label, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def weight_histogram(self) -> List[int]:
+        hist = self.arrays["weight_hist"]
+        return hist.sum(axis=0).tolist() if len(hist) else []
+
+    def outliers(self, z_threshold: float = 3.5) -> List[Outlier]:
+        """
+        Subjects with an empty graph, non-finite input values, an asymmetric matrix in a
+        mostly symmetric cohort, or a robust z-score above `z_threshold` in one of
+        OUTLIER_COLUMNS. The comparisons with the cohort need at least MIN_OUTLIER_COHORT
+        subjects with statistics.
+        """
+        reasons: Dict[int, List[str]] = {}
+        for i, count in self._valid("edge_count"):
+            if count == 0:
+                reasons.setdefault(i, []).append("empty graph")
+        for i, count in self._valid("nonfinite"):
+            if count > 0:
+                reasons.setdefault(i, []).append(f"{count} non-finite input values")
+        asymmetry = self._valid("max_asymmetry")
+        asymmetric = [(i, v) for i, v in asymmetry if v > 1e-10]
+        if len(asymmetry) >= MIN_OUTLIER_COHORT and len(asymmetric) * 2 < len(asymmetry):
+            for i, v in asymmetric:
+                reasons.setdefault(i, []).append(f"asymmetric matrix (max |W - Wᵀ| = {v:.3g})")
+        for name, label in OUTLIER_COLUMNS.items():
+            rows = self._valid(name)
+            if len(rows) < MIN_OUTLIER_COHORT:
+                continue
+            for (i, v), z in zip(rows, _robust_z([v for _, v in rows])):
+                if abs(z) > z_threshold:
+                    reasons.setdefault(i, []).append(f"{label} {v:.4g} ({'+' if z > 0 else ''}{z:.1f} robust SD)")
+        return [Outlier(i, self.subject_ids[i], r) for i, r in sorted(reasons.items())]
+
+    def summary_lines(self) -> List[str]:
+        n = len(self)
+        if self.sparsifier:
+            sparsity = f", {self.sparsifier} sparsifier ({self.sparsity})"
+        else:
+            sparsity = f", threshold {self.threshold:g}" if self.threshold is not None else ""
+        lines = [f"{n} subjects, {self.num_rois} ROIs{sparsity}"]
+        counts = self.label_counts()
+        lines.append("Labels: " + ", ".join(f"{k}: {c} ({100 * c / n:.1f}%)" for k, c in counts.items()))
+        missing = n - len(self._valid("edge_count"))
+        if missing:
+            lines.append(f"No statistics for {missing} subjects (restored from an older checkpoint)")
+        for name, label, fmt in (("edge_count", "Edges", ".0f"), ("density", "Density", ".4f"),
+                                 ("degree_mean", "Mean degree", ".2f"), ("isolated_nodes", "Isolated nodes", ".1f"),
+                                 ("weight_mean", "Mean edge weight", ".4f")):
+            values = [v for _, v in self._valid(name)]
+            if values:
+                std = statistics.stdev(values) if len(values) > 1 else 0.0
+                lines.append(f"{label}: {statistics.mean(values):{fmt}} ± {std:{fmt}} "
+                             f"(min {min(values):{fmt}}, max {max(values):{fmt}})")
+        empty = sum(1 for _, v in self._valid("edge_count") if v == 0)
+        asymmetric = sum(1 for _, v in self._valid("max_asymmetry") if v > 1e-10)
+        nonfinite = sum(1 for _, v in self._valid("nonfinite") if v > 0)
+        lines.append(f"Empty graphs: {empty}, asymmetric matrices: {asymmetric}, with non-finite values: {nonfinite}")
+        hist = self.weight_histogram()
+        edges = self.column("bin_edges")
+        if hist and max(hist):
+            bars = "".join(_BARS[math.ceil(8 * h / max(hist))] for h in hist)
+            lines.append(f"Edge weights [{edges[1]:g} .. {edges[-2]:g}]: |{bars}|")
+        return lines
+
+
+def format_report(stats: DatasetStats, max_outliers: Optional[int] = 20) -> str:
+    lines = stats.summary_lines()
+    outliers = stats.outliers()
+    lines.append(f"Outlier subjects: {len(outliers)}")
+    for o in outliers[:max_outliers]:
+        lines.append(f"  {o.subject_id}: {'; '.join(o.reasons)}")
+    if max_outliers is not None and len(outliers) > max_outliers:
+        lines.append(f"  ... and {len(outliers) - max_outliers} more")
+    return "\n".join(lines)
@@ -0,0 +1,104 @@
+import argparse
+import os
+from typing import Optional, Sequence
+
+# torch is imported lazily: configure_blas_threads has to run before numpy or torch load.
+
+# Environment variables read by the BLAS/OpenMP runtimes when numpy, scipy and torch load.
+BLAS_THREAD_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def allocated_cpus() -> int:
+    """
+    CPUs this process may use: the SLURM allocation when running under SLURM,
+    otherwise the CPU affinity mask (or the machine's CPU count).
+    """
+    for var in ("SLURM_CPUS_PER_TASK", "SLURM_CPUS_ON_NODE"):
+        value = os.environ.get(var, "")
+        if value.isdigit() and int(value) > 0:
+            return int(value)
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def configure_blas_threads(num_threads: Optional[int] = None) -> int:
+    """
+    Caps BLAS/OpenMP thread pools at the allocated CPUs so they do not oversubscribe
+    the cores SLURM gave the job. Must run before numpy or torch is imported. Values
+    already set in the environment are respected unless `num_threads` is given.
+    """
+    n = num_threads or allocated_cpus()
+    for var in BLAS_THREAD_VARS:
+        if num_threads:
+            os.environ[var] = str(n)
+        else:
+            os.environ.setdefault(var, str(n))
+    return n
+
+
+def threads_from_argv(argv: Sequence[str]) -> Optional[int]:
+    """The --threads option of a command line, read before the full parser (and numpy) exist."""
+    pre_parser = argparse.ArgumentParser(add_help=False)
+    pre_parser.add_argument("--threads", type=int, default=None)
+    args, _ = pre_parser.parse_known_args(argv)
+    return args.threads
+
+
+class DevicePolicy:
+    """
+    Where the batched linear algebra of the conversion runs.
+
+    Ingestion, thresholding and edge extraction always stay in numpy on the host. When
+    the selected node features are compute-bound and a GPU is requested (or available,
+    for "auto"), each chunk is copied into a reused pinned staging buffer and moved to
+    the GPU in one non-blocking transfer; results come back in one transfer as well.
+    """
+
+    def __init__(self, device: str = "auto", num_threads: Optional[int] = None, gpu_worthwhile: bool = True):
+        import torch
+
+        self.num_threads = num_threads or allocated_cpus()
+        torch.set_num_threads(self.num_threads)
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(self.num_threads)
+        except ImportError:
+            pass  # the environment variables set by configure_blas_threads apply
+
+        cuda = torch.cuda.is_available()
+        if device == "cuda" and not cuda:
+            print("CUDA requested but not available; running on CPU.")
+        use_cuda = cuda and gpu_worthwhile and device in ("cuda", "auto")
+        self.device = torch.device("cuda" if use_cuda else "cpu")
+        self._staging = None
+
+    @property
+    def is_cuda(self) -> bool:
+        return self.device.type == "cuda"
+
+    def describe(self) -> str:
+        return f"device={self.device}, threads={self.num_threads}"
+
+    def to_device(self, array):
+        """Wraps a host array as a tensor on the policy's device (zero-copy on CPU)."""
+        import torch
+
+        host = torch.from_numpy(array)
+        if not self.is_cuda:
+            return host
+        if self._staging is None or self._staging.numel() < host.numel() or self._staging.dtype != host.dtype:
+            self._staging = torch.empty(host.numel(), dtype=host.dtype).pin_memory()
+        staged = self._staging[:host.numel()].view(host.shape)
+        staged.copy_(host)
+        # Safe to reuse the staging buffer: to_host synchronizes before the next chunk is staged.
+        return staged.to(self.device, non_blocking=True)
+
+    def to_host(self, tensor):
+        return tensor.cpu().numpy()
@@ -0,0 +1,196 @@
+from typing import Callable, Dict, NamedTuple
+
+import numpy as np
+
+# Each strategy maps a batch of connectivity matrices (B, N, N) to sparsified matrices of
+# the same shape: kept entries hold their original weight, the rest are zero. All of them
+# operate on the whole batch at once.
+
+
+def threshold_proportional(W: np.ndarray, p: float = 0.05) -> np.ndarray: #python version of BCT function originally written in MATLAB
+    """
+    Thresholds a connectivity matrix by retaining the top p proportion of strongest weights.
+
+    Parameters:
+        W (np.ndarray): Square connectivity matrix (symmetric or asymmetric).
+        p (float): Proportion of strongest weights to retain (0 < p < 1).
+
+    Returns:
+        np.ndarray: Thresholded matrix with only top p weights retained.
+    """
+    W = W.copy()
+    n = W.shape[0]
+    np.fill_diagonal(W, 0)  # Remove self-connections
+
+    symmetric = np.allclose(W, W.T, atol=1e-10)
+    if symmetric:
+        W = np.triu(W)  # Work with upper triangle only
+        ud = 2
+    else:
+        ud = 1
+
+    # Get indices and values of non-zero elements
+    inds = np.transpose(np.nonzero(W))
+    weights = W[W != 0]
+    sorted_inds = inds[np.argsort(-np.abs(weights))]  # Sort by descending absolute weight
+
+    num_edges_to_keep = int(round((n**2 - n) * p / ud))
+    keep_inds = sorted_inds[:num_edges_to_keep]
+
+    # Create new thresholded matrix
+    W_thr = np.zeros_like(W)
+    for i, j in keep_inds:
+        W_thr[i, j] = W[i, j]
+
+    if symmetric:
+        W_thr = W_thr + W_thr.T  # Restore symmetry
+
+    return W_thr
+
+
+def _without_diagonal(W: np.ndarray) -> np.ndarray:
+    W = W.copy()
+    n = W.shape[-1]
+    W[:, np.arange(n), np.arange(n)] = 0
+    return W
+
+
+def _top_k_mask(scores: np.ndarray, k: int) -> np.ndarray:
+    """Boolean mask of the k largest scores of each row of a (B, M) array; NaN never ranks first."""
+    b, m = scores.shape
+    if k <= 0:
+        return np.zeros((b, m), dtype=bool)
+    if k >= m:
+        return np.ones((b, m), dtype=bool)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    mask = np.zeros((b, m), dtype=bool)
+    np.put_along_axis(mask, idx, True, axis=1)
+    return mask
+
+
+def proportional(W: np.ndarray, threshold: float = 0.05, **_) -> np.ndarray:
+    """
+    Keeps the `threshold` proportion of strongest absolute weights of each subject;
+    threshold_proportional applied to the whole batch. Symmetric matrices are ranked on
+    their upper triangle and stay symmetric.
+    """
+    W = _without_diagonal(W)
+    b, n, _ = W.shape
+    out = np.zeros_like(W)
+    symmetric = np.isclose(W, W.transpose(0, 2, 1), atol=1e-10).all(axis=(1, 2))
+    upper = np.triu(np.ones((n, n), dtype=bool), 1)
+    for group, mask, undirected in ((symmetric, upper, 2), (~symmetric, ~np.eye(n, dtype=bool), 1)):
+        if not group.any():
+            continue
+        values = W[group][:, mask]
+        keep = _top_k_mask(np.abs(values), int(round((n ** 2 - n) * threshold / undirected)))
+        kept = np.zeros((int(group.sum()), n, n), dtype=W.dtype)
+        kept[:, mask] = np.where(keep, values, 0)
+        out[group] = kept + kept.transpose(0, 2, 1) if undirected == 2 else kept
+    return out
+
+
+def absolute(W: np.ndarray, abs_threshold: float = 0.3, **_) -> np.ndarray:
+    """Keeps every weight whose magnitude is at least `abs_threshold`."""
+    W = _without_diagonal(W)
+    return np.where(np.abs(W) >= abs_threshold, W, 0)
+
+
+def knn(W: np.ndarray, knn: int = 10, **_) -> np.ndarray:
+    """
+    Keeps each node's `knn` strongest connections by magnitude. An edge is kept when
+    either endpoint selects it, so the result is symmetric for symmetric input.
+    """
+    W = _without_diagonal(W)
+    b, n, _ = W.shape
+    k = min(knn, n - 1)
+    if k <= 0:
+        return np.zeros_like(W)
+    scores = np.nan_to_num(np.abs(W), nan=-np.inf)
+    scores[:, np.arange(n), np.arange(n)] = -np.inf
+    idx = np.argpartition(-scores, k - 1, axis=2)[..., :k]
+    selected = np.zeros(W.shape, dtype=bool)
+    np.put_along_axis(selected, idx, True, axis=2)
+    return np.where(selected | selected.transpose(0, 2, 1), W, 0)
+
+
+def maximum_spanning_tree(S: np.ndarray) -> np.ndarray:
+    """
+    Symmetric edge mask of a maximum spanning tree of each (N, N) non-negative weight
+    matrix, by Prim's algorithm run for all subjects together (N - 1 steps of O(B N) each).
+    """
+    b, n, _ = S.shape
+    rows = np.arange(b)
+    in_tree = np.zeros((b, n), dtype=bool)
+    in_tree[:, 0] = True
+    best = S[:, 0, :].copy()
+    parent = np.zeros((b, n), dtype=np.int64)
+    tree = np.zeros((b, n, n), dtype=bool)
+    for _ in range(n - 1):
+        j = np.where(in_tree, -np.inf, best).argmax(axis=1)
+        p = parent[rows, j]
+        tree[rows, p, j] = True
+        tree[rows, j, p] = True
+        in_tree[rows, j] = True
+        weights = S[rows, j, :]
+        better = (weights > best) & ~in_tree
+        best = np.where(better, weights, best)
+        parent = np.where(better, j[:, None], parent)
+    return tree
+
+
+def mst_topk(W: np.ndarray, threshold: float = 0.05, **_) -> np.ndarray:
+    """
+    Maximum spanning tree of the absolute (symmetrized) weights, so every graph is
+    connected, plus the strongest remaining edges up to the `threshold` density.
+    """
+    W = _without_diagonal(W)
+    b, n, _ = W.shape
+    S = np.nan_to_num((np.abs(W) + np.abs(W.transpose(0, 2, 1))) / 2)
+    tree = maximum_spanning_tree(S)
+    upper = np.triu(np.ones((n, n), dtype=bool), 1)
+    scores = np.where(tree[:, upper], np.inf, S[:, upper])
+    k = max(int(round((n ** 2 - n) * threshold / 2)), n - 1)
+    keep = np.zeros((b, n, n), dtype=bool)
+    keep[:, upper] = _top_k_mask(scores, k)
+    return np.where(keep | keep.transpose(0, 2, 1), W, 0)
+
+
+def signed(W: np.ndarray, threshold: float = 0.05, **_) -> np.ndarray:
+    """Keeps the `threshold` proportion of strongest positive and, separately, of strongest negative weights."""
+    return proportional(np.maximum(W, 0), threshold) + proportional(np.minimum(W, 0), threshold)
+
+
+class Sparsifier(NamedTuple):
+    fn: Callable[..., np.ndarray]
+    # Whether only positive weights become edges (edges_from_stack's positive_only)
+    positive_only: bool
+
+
+# Proportional keeps its original behaviour of dropping negative weights from the edges;
+# the other strategies select negative weights on purpose.
+SPARSIFIERS: Dict[str, Sparsifier] = {
+    "proportional": Sparsifier(proportional, True),
+    "absolute": Sparsifier(absolute, False),
+    "knn": Sparsifier(knn, False),
+    "mst_topk": Sparsifier(mst_topk, False),
+    "signed": Sparsifier(signed, False),
+}
+
+
+def get_sparsifier(name: str) -> Sparsifier:
+    if name not in SPARSIFIERS:
+        raise ValueError(f"Unknown sparsifier '{name}'. Choose from {', '.join(SPARSIFIERS)}")
+    return SPARSIFIERS[name]
+
+
+def sparsifier_tag(name: str, threshold: float = 0.05, abs_threshold: float = 0.3, knn: int = 10) -> str:
+    """Part of the output file name identifying the sparsification, e.g. "5pct" or "knn10"."""
+    pct = f"{int(threshold * 100)}pct"
+    return {
+        "proportional": pct,
+        "absolute": f"abs{abs_threshold:g}",
+        "knn": f"knn{knn}",
+        "mst_topk": f"mst{pct}",
+        "signed": f"signed{pct}",
+    }[name]
@@ -0,0 +1,156 @@
+import os
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+STATS_VERSION = 1
+
+# Connectivity values are correlations: 20 bins over [-1, 1] plus open-ended outer bins
+WEIGHT_BIN_EDGES = np.concatenate([[-np.inf], np.linspace(-1.0, 1.0, 21), [np.inf]])
+
+# Per-subject scalar columns. Rows not computed (e.g. restored from an older checkpoint)
+# hold NaN, or -1 in the integer columns.
+SCALAR_COLUMNS = {
+    "edge_count": np.int64,
+    "density": np.float64,
+    "degree_mean": np.float64,
+    "degree_std": np.float64,
+    "degree_min": np.float64,
+    "degree_median": np.float64,
+    "degree_max": np.float64,
+    "isolated_nodes": np.int64,
+    "weight_mean": np.float64,
+    "weight_std": np.float64,
+    "weight_min": np.float64,
+    "weight_max": np.float64,
+    "max_asymmetry": np.float64,
+    "asymmetric_edges": np.int64,
+    "nonfinite": np.int64,
+}
+
+
+def stats_path_for(dataset_path: str) -> str:
+    """Location of the statistics sidecar written next to a converted .pt dataset."""
+    return f"{os.path.splitext(dataset_path)[0]}.stats.npz"
+
+
+def chunk_stats(raw: np.ndarray, thresholded: np.ndarray, positive_only: bool = True,
+                bin_edges: np.ndarray = WEIGHT_BIN_EDGES) -> Dict[str, np.ndarray]:
+    """
+    Statistics of a (B, N, N) batch of subjects, as reductions over the whole batch.
+
+    Edges are the off-diagonal entries kept by edges_from_stack. Degrees count the edges
+    leaving each node; isolated nodes have no edge in either direction. The weight
+    statistics and histogram cover the kept edges. Symmetry and non-finite counts are
+    measured on the raw (unthresholded) matrices.
+    """
+    b, n, _ = thresholded.shape
+    A = (thresholded > 0 if positive_only else thresholded != 0) & ~np.eye(n, dtype=bool)
+    edge_count = A.sum(axis=(1, 2))
+    degree = A.sum(axis=2)
+
+    g, row, col = np.nonzero(A)
+    values = thresholded[g, row, col].astype(np.float64)
+    has_edges = edge_count > 0
+    safe_count = np.maximum(edge_count, 1)
+    weight_mean = np.bincount(g, weights=values, minlength=b) / safe_count
+    weight_sq = np.bincount(g, weights=values * values, minlength=b) / safe_count
+    weight_std = np.sqrt(np.maximum(weight_sq - weight_mean ** 2, 0.0))
+    weight_min = np.where(A, thresholded, np.inf).min(axis=(1, 2))
+    weight_max = np.where(A, thresholded, -np.inf).max(axis=(1, 2))
+
+    num_bins = len(bin_edges) - 1
+    bins = np.clip(np.searchsorted(bin_edges, values, side="right") - 1, 0, num_bins - 1)
+    hist = np.bincount(g * num_bins + bins, minlength=b * num_bins).reshape(b, num_bins)
+
+    finite = np.isfinite(raw)
+    diff = np.abs(raw - raw.transpose(0, 2, 1))
+    max_asymmetry = np.where(np.isfinite(diff), diff, 0.0).max(axis=(1, 2))
+
+    return {
+        "edge_count": edge_count,
+        "density": edge_count / (n * (n - 1)),
+        "degree_mean": degree.mean(axis=1),
+        "degree_std": degree.std(axis=1),
+        "degree_min": degree.min(axis=1).astype(np.float64),
+        "degree_median": np.median(degree, axis=1),
+        "degree_max": degree.max(axis=1).astype(np.float64),
+        "isolated_nodes": (~(A.any(axis=2) | A.any(axis=1))).sum(axis=1),
+        "weight_mean": np.where(has_edges, weight_mean, np.nan),
+        "weight_std": np.where(has_edges, weight_std, np.nan),
+        "weight_min": np.where(has_edges, weight_min, np.nan),
+        "weight_max": np.where(has_edges, weight_max, np.nan),
+        "max_asymmetry": max_asymmetry,
+        "asymmetric_edges": (A & ~A.transpose(0, 2, 1)).sum(axis=(1, 2)),
+        "nonfinite": (~finite).sum(axis=(1, 2)),
+        "weight_hist": hist,
+    }
+
+
+class StatsBuilder:
+    """Accumulates per-subject statistics into preallocated columns, chunk by chunk."""
+
+    def __init__(self, num_graphs: int, num_rois: int, positive_only: bool = True,
+                 bin_edges: np.ndarray = WEIGHT_BIN_EDGES):
+        self.num_rois = num_rois
+        self.positive_only = positive_only
+        self.bin_edges = np.asarray(bin_edges, dtype=np.float64)
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.full(num_graphs, np.nan if dtype is np.float64 else -1, dtype=dtype)
+            for name, dtype in SCALAR_COLUMNS.items()
+        }
+        self.columns["weight_hist"] = np.zeros((num_graphs, len(self.bin_edges) - 1), dtype=np.int64)
+
+    def add(self, start: int, raw: np.ndarray, thresholded: np.ndarray) -> None:
+        self.set_rows(start, chunk_stats(raw, thresholded, self.positive_only, self.bin_edges))
+
+    def set_rows(self, start: int, rows: Dict[str, np.ndarray]) -> None:
+        for name, values in rows.items():
+            if name in self.columns:
+                self.columns[name][start:start + len(values)] = values
+
+    def rows(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        return {name: column[start:stop] for name, column in self.columns.items()}
+
+    def _arrays(self, subject_ids: Sequence[str], labels: np.ndarray) -> Dict[str, np.ndarray]:
+        return {
+            "version": np.asarray(STATS_VERSION),
+            "num_rois": np.asarray(self.num_rois),
+            "bin_edges": self.bin_edges,
+            "subject_id": np.asarray([str(s) for s in subject_ids], dtype=str),
+            "label": np.asarray(labels, dtype=np.int64).reshape(-1),
+            **self.columns,
+        }
+
+    def save(self, path: str, subject_ids: Sequence[str], labels: np.ndarray,
+             meta: Optional[Dict[str, Any]] = None) -> None:
+        """Writes the columns, subject IDs and labels as an uncompressed .npz (one .npy per column)."""
+        arrays = self._arrays(subject_ids, labels)
+        for key, value in (meta or {}).items():
+            arrays[f"meta_{key}"] = np.asarray(value)
+        _write_npz(path, arrays)
+
+    def append_to(self, path: str, subject_ids: Sequence[str], labels: np.ndarray) -> None:
+        """
+        Adds these subjects after those of an existing sidecar, keeping its metadata.
+        Columns the existing sidecar lacks are missing (NaN or -1, empty histograms) for its subjects.
+        """
+        with np.load(path) as f:
+            arrays = {name: f[name] for name in f.files}
+        if not np.array_equal(arrays["bin_edges"], self.bin_edges):
+            raise ValueError(f"{path} uses different weight histogram bins")
+        existing = len(arrays["subject_id"])
+        for name, values in self._arrays(subject_ids, labels).items():
+            if name in ("subject_id", "label") or name in self.columns:
+                old = arrays.get(name)
+                if old is None:
+                    fill = np.nan if values.dtype.kind == "f" else (0 if values.ndim > 1 else -1)
+                    old = np.full((existing, *values.shape[1:]), fill, dtype=values.dtype)
+                arrays[name] = np.concatenate([old, values])
+        _write_npz(path, arrays)
+
+
+def _write_npz(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
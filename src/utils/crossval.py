@@ -0,0 +1,142 @@
+# Fold splits and result aggregation for k-fold x multi-seed evaluation.
+# Stdlib only apart from torch for reading labels, and runnable as a script so the
+# launcher can compute splits inside the training environment:
+#   python crossval.py --data NCandaData500.pt --folds 10
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Above this many distinct labels, labels are treated as continuous and stratified by rank
+_MAX_CLASSES = 20
+
+
+def splits_path(dataset_path: str, folds: int, seed: int) -> str:
+    return f"{dataset_path}.folds{folds}-seed{seed}.json"
+
+
+def stratified_folds(labels: Sequence[Any], folds: int, seed: int = 0) -> List[List[int]]:
+    """
+    Assigns every graph to one of `folds` folds, keeping the label distribution of each
+    fold close to the whole dataset's. Continuous labels are stratified by rank.
+    """
+    if folds < 2 or folds > len(labels):
+        raise ValueError(f"Cannot split {len(labels)} graphs into {folds} folds")
+    strata = list(labels)
+    if len(set(strata)) > _MAX_CLASSES:
+        order = sorted(range(len(strata)), key=strata.__getitem__)
+        strata = [0] * len(order)
+        for rank, i in enumerate(order):
+            strata[i] = rank // folds
+
+    by_stratum: Dict[Any, List[int]] = defaultdict(list)
+    for i, label in enumerate(strata):
+        by_stratum[label].append(i)
+    rng = random.Random(seed)
+    assignment: List[List[int]] = [[] for _ in range(folds)]
+    offset = 0
+    for label in sorted(by_stratum, key=repr):
+        members = by_stratum[label]
+        rng.shuffle(members)
+        # Continue the round-robin across strata so fold sizes differ by at most one
+        for j, i in enumerate(members):
+            assignment[(offset + j) % folds].append(i)
+        offset += len(members)
+    return [sorted(fold) for fold in assignment]
+
+
+def fold_splits(folds: List[List[int]]) -> List[Dict[str, List[int]]]:
+    """Fold k is the test set of split k and fold k+1 its validation set; the rest is training data."""
+    k = len(folds)
+    return [
+        {
+            "train": sorted(i for j, fold in enumerate(folds) if j not in (f, (f + 1) % k) for i in fold),
+            "val": folds[(f + 1) % k],
+            "test": folds[f],
+        }
+        for f in range(k)
+    ]
+
+
+def load_labels(dataset_path: str) -> List[Any]:
+    """Graph labels of a converted dataset ((Data, slices) as saved by the conversion script)."""
+    import torch
+
+    try:
+        data, _ = torch.load(dataset_path, map_location="cpu", mmap=True, weights_only=False)
+    except RuntimeError:
+        # Files in the legacy (non-zip) format cannot be memory-mapped
+        data, _ = torch.load(dataset_path, map_location="cpu", weights_only=False)
+    return data.y.view(-1).tolist()
+
+
+def _stamp(dataset_path: str) -> Tuple[int, int]:
+    st = os.stat(dataset_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def load_cached_splits(dataset_path: str, folds: int, seed: int) -> Optional[Dict[str, Any]]:
+    """The cached splits, or None when there are none or the dataset changed since they were made."""
+    path = splits_path(dataset_path, folds, seed)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (cached.get("size"), cached.get("mtime_ns")) != _stamp(dataset_path):
+        return None
+    return cached
+
+
+def write_splits(dataset_path: str, folds: int, seed: int, labels: Optional[Sequence[Any]] = None) -> str:
+    """Computes the splits of a dataset and caches them next to it; returns the split file."""
+    if labels is None:
+        labels = load_labels(dataset_path)
+    size, mtime_ns = _stamp(dataset_path)
+    payload = {
+        "dataset": os.path.abspath(dataset_path),
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "folds": folds,
+        "seed": seed,
+        "num_graphs": len(labels),
+        "splits": fold_splits(stratified_folds(labels, folds, seed)),
+    }
+    path = splits_path(dataset_path, folds, seed)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def aggregate(results: Iterable[Dict[str, float]]) -> Dict[str, Tuple[float, float, int]]:
+    """Mean, sample standard deviation and count of every metric over runs."""
+    values: Dict[str, List[float]] = defaultdict(list)
+    for metrics in results:
+        for name, value in metrics.items():
+            values[name].append(value)
+    return {
+        name: (statistics.mean(v), statistics.stdev(v) if len(v) > 1 else 0.0, len(v))
+        for name, v in sorted(values.items())
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compute and cache stratified k-fold splits of a converted dataset.")
+    parser.add_argument("--data", required=True, help="Dataset .pt file.")
+    parser.add_argument("--folds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the split (not of training).")
+    args = parser.parse_args(argv)
+    if load_cached_splits(args.data, args.folds, args.seed) is None:
+        write_splits(args.data, args.folds, args.seed)
+    print(splits_path(args.data, args.folds, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
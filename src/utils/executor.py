@@ -0,0 +1,44 @@
+import os
+import subprocess
+import platform
+from typing import Optional, Iterator, Tuple
+
+
+class ProcessExecutor:
+    """
+    Handles the execution of a command in a subprocess and yields its output.
+    This class is framework-agnostic and can be tested without a Qt event loop.
+    """
+    def __init__(self, command: str, working_dir: Optional[str] = None, env: Optional[dict] = None):
+        self.command = command
+        self.working_dir = working_dir
+        self.env = env or os.environ.copy()
+
+    def run(self) -> Iterator[Tuple[str, int]]:
+        """
+        Executes the command and yields output lines.
+        The final yielded value will be an empty string and the return code.
+        """
+        try:
+            if platform.system() == "Windows":
+                command_list = ["cmd.exe", "/c", self.command]
+            else:
+                command_list = ["/usr/bin/bash", "-c", self.command]
+
+            proc = subprocess.Popen(
+                command_list,
+                cwd=self.working_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                env=self.env,
+                bufsize=1
+            )
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                yield line, -1  # -1 indicates the process is still running
+            proc.wait()
+            yield "", proc.returncode
+        except Exception as e:
+            # In case of an exception (e.g., command not found), yield the error and a non-zero exit code.
+            yield str(e), 1
@@ -0,0 +1,263 @@
+# Metric extraction from training logs and bounded in-memory time series for plotting.
+# Pure Python (no numpy), as the GUI environment does not need the training stack.
+import codecs
+import os
+import re
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+# "Test Accuracy: 0.81", "loss = 1.2e-3", "Epoch: 012". A name is up to four words that each
+# start with a letter, so in "Epoch 5 Test Accuracy: 0.9" it is "Test Accuracy".
+METRIC_PAIR_RE = re.compile(
+    r"(?<![A-Za-z0-9_])([A-Za-z][A-Za-z0-9_]*(?: [A-Za-z][A-Za-z0-9_]*){0,3})"
+    r"\s*[:=]\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\b"
+)
+
+_LINE_BREAK_RE = re.compile(r"\r\n|\r|\n")
+
+
+def metric_name(label: str) -> str:
+    return re.sub(r"\s+", "_", label.strip().lower())
+
+
+# Run bookkeeping printed next to the metrics (e.g. "Seed: 3, Fold: 2"); never a final metric
+BOOKKEEPING_KEYS = ("epoch", "seed", "fold")
+
+
+def match_metrics(line: str, patterns: Optional[Dict[str, Pattern]] = None) -> Dict[str, float]:
+    """
+    Metrics on one line: with `patterns` (metric name -> compiled regular expression whose
+    first group is the value) only those, otherwise every "name: number" pair.
+    """
+    if patterns:
+        values = {}
+        for name, rx in patterns.items():
+            m = rx.search(line)
+            if m:
+                try:
+                    values[name] = float(m.group(1))
+                except (IndexError, ValueError):
+                    pass
+        return values
+    return {metric_name(m.group(1)): float(m.group(2)) for m in METRIC_PAIR_RE.finditer(line)}
+
+
+def parse_metrics(text: str, patterns: Optional[Dict[str, str]] = None, step_key: str = "epoch") -> Dict[str, float]:
+    """
+    Final value of each metric in a log; names are lower-cased with underscores. The step key
+    and the bookkeeping keys (epoch, seed, fold) are left out.
+    """
+    compiled = {name: re.compile(rx) for name, rx in (patterns or {}).items()}
+    values: Dict[str, float] = {}
+    for line in _LINE_BREAK_RE.split(text):
+        values.update(match_metrics(line, compiled))
+    for key in (step_key, *BOOKKEEPING_KEYS):
+        values.pop(key, None)
+    return values
+
+
+def _buckets(xs: Sequence[float], count: int) -> List[Tuple[int, int]]:
+    """
+    Index ranges splitting the interior points (all but the first and last) into `count`
+    intervals of equal width in x, skipping empty ones. Equal x-width keeps the density
+    uniform over the run, however often a series is compacted. Falls back to equal
+    point counts when x is not sorted (e.g. a log that restarted its epochs).
+    """
+    n = len(xs)
+    if any(xs[i] > xs[i + 1] for i in range(n - 1)):
+        every = (n - 2) / count
+        return [(int(i * every) + 1, int((i + 1) * every) + 1) for i in range(count)]
+    lo, hi = xs[1], xs[n - 2]
+    width = (hi - lo) / count or 1.0
+    ranges = []
+    start = 1
+    for b in range(1, count + 1):
+        end = bisect_right(xs, lo + b * width, start, n - 1) if b < count else n - 1
+        if end > start:
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets: indices of at most `threshold` points that keep the
+    visual shape of the series. The first and last points are always kept.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    buckets = _buckets(xs, threshold - 2)
+    selected = [0]
+    a = 0
+    for i, (start, end) in enumerate(buckets):
+        if i + 1 < len(buckets):
+            next_start, next_end = buckets[i + 1]
+            avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+            avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+        else:
+            avg_x, avg_y = xs[n - 1], ys[n - 1]
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def minmax(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """Indices of the minimum and maximum of each of threshold // 2 buckets, in order; keeps spikes."""
+    n = len(ys)
+    if threshold >= n or threshold < 4:
+        return list(range(n))
+    selected = [0]
+    for start, end in _buckets(xs, (threshold - 2) // 2):
+        lo = min(range(start, end), key=ys.__getitem__)
+        hi = max(range(start, end), key=ys.__getitem__)
+        selected.extend(sorted({lo, hi}))
+    selected.append(n - 1)
+    return selected
+
+
+DOWNSAMPLERS = {"lttb": lttb, "minmax": minmax}
+
+
+def _check_method(method: str) -> None:
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Choose from {', '.join(DOWNSAMPLERS)}")
+
+
+class TimeSeries:
+    """
+    One metric as two columns of doubles. When more than `capacity` points are held, the
+    series is downsampled to half its capacity, so memory stays bounded however long the
+    run; points added since the last compaction are kept at full resolution.
+    """
+
+    def __init__(self, capacity: int = 4096, method: str = "lttb"):
+        _check_method(method)
+        self.capacity = max(8, capacity)
+        self.method = method
+        self.x = array("d")
+        self.y = array("d")
+        self.total = 0
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def append(self, x: float, y: float) -> None:
+        self.x.append(x)
+        self.y.append(y)
+        self.total += 1
+        if len(self.x) > self.capacity:
+            keep = DOWNSAMPLERS[self.method](self.x, self.y, self.capacity // 2)
+            self.x = array("d", (self.x[i] for i in keep))
+            self.y = array("d", (self.y[i] for i in keep))
+
+    @property
+    def last(self) -> Optional[float]:
+        return self.y[-1] if self.y else None
+
+    def points(self, max_points: Optional[int] = None) -> Tuple[List[float], List[float]]:
+        """The series downsampled to at most max_points, e.g. one per horizontal pixel."""
+        if max_points is None or len(self.x) <= max_points:
+            return list(self.x), list(self.y)
+        keep = DOWNSAMPLERS[self.method](self.x, self.y, max_points)
+        return [self.x[i] for i in keep], [self.y[i] for i in keep]
+
+
+class MetricStore:
+    """Named time series; `version` changes on every update so views can skip redundant redraws."""
+
+    def __init__(self, capacity: int = 4096, method: str = "lttb"):
+        _check_method(method)
+        self.capacity = capacity
+        self.method = method
+        self.series: Dict[str, TimeSeries] = {}
+        self.version = 0
+
+    def add(self, step: float, values: Dict[str, float]) -> None:
+        for name, value in values.items():
+            if name not in self.series:
+                self.series[name] = TimeSeries(self.capacity, self.method)
+            self.series[name].append(step, value)
+        self.version += 1
+
+    def names(self) -> List[str]:
+        return list(self.series)
+
+    def clear(self) -> None:
+        self.series.clear()
+        self.version += 1
+
+
+class MetricExtractor:
+    """
+    Turns log text into metric points, incrementally: text may arrive in arbitrary pieces
+    and an unfinished last line is kept until the rest arrives.
+
+    By default every "name: number" pair is a metric. `patterns` maps metric names to
+    regular expressions whose first group is the value, to extract only those metrics.
+    The `step_key` metric (e.g. the epoch) becomes the x value of the other metrics on
+    its line; lines without it continue from the previous step.
+    """
+
+    def __init__(self, store: Optional[MetricStore] = None, patterns: Optional[Dict[str, str]] = None,
+                 step_key: str = "epoch"):
+        self.store = store if store is not None else MetricStore()
+        self.patterns = {name: re.compile(rx) for name, rx in (patterns or {}).items()}
+        self.step_key = step_key
+        self.reset()
+
+    def reset(self) -> None:
+        self._partial = ""
+        self._step = 0.0
+
+    def feed_line(self, line: str) -> bool:
+        values = match_metrics(line, self.patterns)
+        step = values.pop(self.step_key, None)
+        if not values:
+            return False
+        self._step = step if step is not None else self._step + 1
+        self.store.add(self._step, values)
+        return True
+
+    def feed(self, text: str) -> int:
+        """Consumes a chunk of output and returns the number of lines that produced metrics."""
+        *lines, self._partial = _LINE_BREAK_RE.split(self._partial + text)
+        return sum(self.feed_line(line) for line in lines)
+
+
+class LogTailer:
+    """
+    Follows a growing log file (e.g. a SLURM --output file) by offset. Each call returns the
+    text appended since the previous one; the file may not exist yet, and a truncated or
+    replaced file is read again from the start.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.offset = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def read_new(self) -> str:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return ""
+        if size < self.offset:
+            self.offset = 0
+            self._decoder.reset()
+        if size == self.offset:
+            return ""
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(self.max_bytes)
+        self.offset += len(data)
+        return self._decoder.decode(data)
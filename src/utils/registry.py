@@ -0,0 +1,273 @@
+# Local SQLite history of conversion and training launches.
+# Qt-free and stdlib-only, so the GUI and the headless CLI share it.
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .metrics import parse_metrics
+from .scheduler import SchedulerBackend, get_backend
+
+REGISTRY_FILE = "runs.sqlite3"
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    name TEXT,
+    command TEXT NOT NULL,
+    params TEXT NOT NULL,
+    param_hash TEXT NOT NULL,
+    dataset_checksum TEXT,
+    backend TEXT NOT NULL,
+    job_id TEXT,
+    status TEXT NOT NULL,
+    exit_code INTEGER,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    log_path TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS checksums (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    checksum TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_param_hash ON runs(param_hash);
+CREATE INDEX IF NOT EXISTS idx_runs_kind_submitted ON runs(kind, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status);
+CREATE INDEX IF NOT EXISTS idx_runs_job_id ON runs(job_id);
+CREATE INDEX IF NOT EXISTS idx_runs_name ON runs(name);
+CREATE INDEX IF NOT EXISTS idx_runs_dataset ON runs(dataset_checksum);
+CREATE INDEX IF NOT EXISTS idx_metrics_name_value ON metrics(name, value);
+"""
+
+# Options that name files (covered by the dataset checksum) or do not change the result
+_UNHASHED_PARAMS = {"--path", "--data", "inputs", "labels", "output_dir", "checkpoint_every", "resume"}
+
+_SAMPLE_SIZE = 1 << 20
+
+# sacct states mapped to registry statuses; anything else counts as failed once it ended
+_SACCT_STATUS = {"PENDING": "submitted", "RUNNING": "running", "COMPLETING": "running", "COMPLETED": "completed"}
+
+
+class RunRecord(NamedTuple):
+    id: int
+    kind: str
+    name: Optional[str]
+    command: str
+    params: Dict[str, Any]
+    param_hash: str
+    dataset_checksum: Optional[str]
+    backend: str
+    job_id: Optional[str]
+    status: str
+    exit_code: Optional[int]
+    submitted_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    log_path: Optional[str]
+
+    def describe(self) -> str:
+        when = datetime.fromtimestamp(self.submitted_at).strftime("%Y-%m-%d %H:%M")
+        job = f", job {self.job_id}" if self.job_id else ""
+        return f"run #{self.id} ({self.name or self.kind}, {self.backend}{job}) {self.status} on {when}"
+
+
+def registry_path(config: Dict[str, Any]) -> str:
+    return os.path.join(config["logs_dir"], REGISTRY_FILE)
+
+
+def open_registry(config: Dict[str, Any]) -> "RunRegistry":
+    """The registry in the configured logs directory, parsing metrics as configured under `metrics`."""
+    metrics_cfg = config.get("metrics", {})
+    return RunRegistry(registry_path(config), metrics_cfg.get("patterns"), metrics_cfg.get("step_key", "epoch"))
+
+
+def param_hash(kind: str, params: Dict[str, Any], dataset_checksum: Optional[str]) -> str:
+    """Hashes what determines a run's result: its kind, its options and its input data."""
+    options = {str(k): v for k, v in params.items() if str(k) not in _UNHASHED_PARAMS}
+    payload = json.dumps({"kind": kind, "params": options, "data": dataset_checksum}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _sampled_checksum(path: str, size: int) -> str:
+    """sha256 of the size and 1 MiB samples from the start, middle and end of the file."""
+    h = hashlib.sha256(str(size).encode("utf-8"))
+    with open(path, "rb") as f:
+        for offset in sorted({0, max(0, size // 2 - _SAMPLE_SIZE // 2), max(0, size - _SAMPLE_SIZE)}):
+            f.seek(offset)
+            h.update(f.read(_SAMPLE_SIZE))
+    return h.hexdigest()
+
+
+class RunRegistry:
+    """
+    Records every launch with its command, parameters, parameter hash, dataset checksum,
+    SLURM job ID, timings, exit code and final metrics.
+
+    One connection is shared between threads (the CLI runs batches in a thread pool),
+    so every statement runs under a lock.
+    """
+
+    def __init__(self, path: str, metric_patterns: Optional[Dict[str, str]] = None, step_key: str = "epoch"):
+        self.path = path
+        self.metric_patterns = metric_patterns or {}
+        self.step_key = step_key
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, args: Sequence[Any] = ()) -> sqlite3.Cursor:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, args)
+
+    def _query(self, sql: str, args: Sequence[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def file_checksum(self, path: str) -> str:
+        """Checksum of one file, computed once per size and mtime and then read from the registry."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        row = self._query("SELECT size, mtime_ns, checksum FROM checksums WHERE path = ?", (path,))
+        if row and row[0][:2] == (st.st_size, st.st_mtime_ns):
+            return row[0][2]
+        checksum = _sampled_checksum(path, st.st_size)
+        self._execute("INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?)", (path, st.st_size, st.st_mtime_ns, checksum))
+        return checksum
+
+    def dataset_checksum(self, paths: Iterable[str]) -> Optional[str]:
+        """Combined checksum of the input files; files that do not exist (yet) are skipped."""
+        sums = [self.file_checksum(p) for p in paths if p and os.path.isfile(p)]
+        if not sums:
+            return None
+        return hashlib.sha256("|".join(sums).encode("utf-8")).hexdigest()[:16]
+
+    def fingerprint(self, kind: str, params: Dict[str, Any], datasets: Iterable[str]) -> Tuple[str, Optional[str]]:
+        checksum = self.dataset_checksum(datasets)
+        return param_hash(kind, params, checksum), checksum
+
+    def find_by_hash(self, hash_: str, include_failed: bool = False) -> List[RunRecord]:
+        sql = "SELECT * FROM runs WHERE param_hash = ?"
+        if not include_failed:
+            sql += " AND status != 'failed'"
+        return [self._record(r) for r in self._query(sql + " ORDER BY submitted_at DESC", (hash_,))]
+
+    def start(self, kind: str, name: Optional[str], command: str, params: Dict[str, Any], hash_: str,
+              dataset_checksum: Optional[str], backend: str, job_id: Optional[str] = None,
+              log_path: Optional[str] = None) -> int:
+        now = time.time()
+        status = "submitted" if backend == "slurm" else "running"
+        cursor = self._execute(
+            "INSERT INTO runs (kind, name, command, params, param_hash, dataset_checksum, backend, job_id, status,"
+            " submitted_at, started_at, log_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, name, command, json.dumps(params, default=str), hash_, dataset_checksum, backend, job_id, status,
+             now, None if backend == "slurm" else now, log_path),
+        )
+        return cursor.lastrowid
+
+    def finish(self, run_id: int, exit_code: Optional[int], metrics: Optional[Dict[str, float]] = None,
+               status: Optional[str] = None, started_at: Optional[float] = None,
+               finished_at: Optional[float] = None) -> None:
+        if status is None:
+            status = "completed" if exit_code == 0 else "failed"
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, exit_code = ?, started_at = COALESCE(?, started_at),"
+                " finished_at = ? WHERE id = ?",
+                (status, exit_code, started_at, finished_at or time.time(), run_id),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO metrics VALUES (?, ?, ?)",
+                [(run_id, name, value) for name, value in (metrics or {}).items()],
+            )
+
+    def finish_from_log(self, run_id: int, exit_code: Optional[int], log_text: str, **kwargs) -> None:
+        """Finishes a run with the final metrics in its log; conversion logs have none."""
+        kind = self._query("SELECT kind FROM runs WHERE id = ?", (run_id,))
+        metrics = None
+        if kind and kind[0][0] != "conversion":
+            metrics = parse_metrics(log_text, self.metric_patterns, self.step_key)
+        self.finish(run_id, exit_code, metrics, **kwargs)
+
+    def runs(self, kind: Optional[str] = None, status: Optional[str] = None, param_hash: Optional[str] = None,
+             name_prefix: Optional[str] = None, limit: int = 50) -> List[RunRecord]:
+        clauses, args = [], []
+        for column, value in (("kind", kind), ("status", status), ("param_hash", param_hash)):
+            if value:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if name_prefix:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            args.append(name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._query(f"SELECT * FROM runs{where} ORDER BY submitted_at DESC LIMIT ?", (*args, limit))
+        return [self._record(r) for r in rows]
+
+    def metrics(self, run_id: int) -> Dict[str, float]:
+        return dict(self._query("SELECT name, value FROM metrics WHERE run_id = ? ORDER BY name", (run_id,)))
+
+    def refresh_slurm(self, backend: Optional[SchedulerBackend] = None) -> int:
+        """
+        Updates unfinished SLURM runs from the scheduler's accounting (sacct) and parses their
+        output logs for metrics. Returns the number of runs that finished; does nothing where
+        sacct is unavailable.
+        """
+        pending = {r.job_id: r for r in self.runs(status="submitted", limit=1000) + self.runs(status="running", limit=1000)
+                   if r.backend == "slurm" and r.job_id}
+        if not pending:
+            return 0
+        try:
+            jobs = (backend or get_backend()).accounting(list(pending))
+        except (OSError, subprocess.CalledProcessError):
+            return 0
+        finished = 0
+        for job in jobs:
+            run = pending.get(job.job_id)
+            if run is None:
+                continue
+            status = _SACCT_STATUS.get(job.state, "failed")
+            if status in ("submitted", "running"):
+                if status != run.status:
+                    self._execute("UPDATE runs SET status = ?, started_at = ? WHERE id = ?", (status, job.start, run.id))
+                continue
+            log_text = ""
+            if run.log_path:
+                log_path = run.log_path.replace("%j", job.job_id)
+                if os.path.isfile(log_path):
+                    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+                        log_text = f.read()
+            self.finish_from_log(run.id, job.exit_code, log_text, status=status,
+                                 started_at=job.start, finished_at=job.end)
+            finished += 1
+        return finished
+
+    @staticmethod
+    def _record(row: Tuple) -> RunRecord:
+        values = list(row)
+        values[4] = json.loads(values[4])
+        return RunRecord(*values)
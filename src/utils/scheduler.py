@@ -0,0 +1,466 @@
+# Batch scheduler backends: the real SLURM commands, or a local emulator of them.
+# Stdlib-only, so submission, arrays, dependencies and status polling can be tested and
+# benchmarked off-cluster.
+import abc
+import itertools
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .slurm import _DIRECTIVE_ALIASES, mem_megabytes, submit_job, time_seconds
+
+TERMINAL_STATES = ("COMPLETED", "FAILED", "CANCELLED", "TIMEOUT")
+
+_OPTION_ALIASES = {**_DIRECTIVE_ALIASES, "-a": "--array", "-d": "--dependency", "-D": "--chdir"}
+_DEPENDENCY_TYPES = ("after", "afterany", "afterok", "afternotok")
+_SHIM_SRUN = '#!/bin/sh\nexec "$@"\n'
+
+
+class JobInfo(NamedTuple):
+    """One job (or array task) as squeue/sacct report it."""
+    job_id: str
+    name: str
+    state: str
+    exit_code: Optional[int]
+    start: Optional[float]
+    end: Optional[float]
+
+    @property
+    def elapsed(self) -> float:
+        if self.start is None:
+            return 0.0
+        return (self.end or time.time()) - self.start
+
+
+def _parse_time(value: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None  # "Unknown", "None", "N/A"
+
+
+def _submitted(script_path: str, job_id: str) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(["sbatch", script_path], 0, f"Submitted batch job {job_id}\n", "")
+
+
+def _rejected(script_path: str, message: str) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(["sbatch", script_path], 1, "", f"sbatch: error: {message}\n")
+
+
+class SchedulerBackend(abc.ABC):
+    """The scheduler operations the launchers use: sbatch, squeue, sacct and scancel."""
+
+    name = ""
+
+    @abc.abstractmethod
+    def submit(self, script_path: str, dependency: Optional[str] = None) -> subprocess.CompletedProcess:
+        """Submits a job script; on success stdout reads "Submitted batch job <id>", as with sbatch."""
+
+    @abc.abstractmethod
+    def queue(self, job_ids: Optional[Sequence[str]] = None) -> List[JobInfo]:
+        """Pending and running jobs: the given ones, or all of the user's."""
+
+    @abc.abstractmethod
+    def accounting(self, job_ids: Sequence[str]) -> List[JobInfo]:
+        """State, exit code and timings of the given jobs, finished or not. Array IDs include their tasks."""
+
+    @abc.abstractmethod
+    def cancel(self, job_ids: Sequence[str]) -> None:
+        pass
+
+    def close(self, cancel: bool = False) -> None:
+        """Releases the backend. Jobs on a real cluster are left alone; see LocalSlurmEmulator.close."""
+
+
+class SlurmBackend(SchedulerBackend):
+    """
+    The SLURM command-line tools. Query methods raise FileNotFoundError where they are not
+    installed and subprocess.CalledProcessError when they fail.
+    """
+
+    name = "slurm"
+
+    def submit(self, script_path: str, dependency: Optional[str] = None) -> subprocess.CompletedProcess:
+        return submit_job(script_path, dependency)
+
+    @staticmethod
+    def _run(command: List[str]) -> List[List[str]]:
+        result = subprocess.run(command, capture_output=True, text=True, check=True)
+        return [line.split("|") for line in result.stdout.splitlines() if line.strip()]
+
+    def queue(self, job_ids: Optional[Sequence[str]] = None) -> List[JobInfo]:
+        select = ["-j", ",".join(job_ids)] if job_ids else ["--me"]
+        rows = self._run(["squeue", *select, "-h", "-o", "%i|%j|%T|%S"])
+        return [JobInfo(job_id, name, state, None, _parse_time(start), None)
+                for job_id, name, state, start in (r for r in rows if len(r) == 4)]
+
+    def accounting(self, job_ids: Sequence[str]) -> List[JobInfo]:
+        if not job_ids:
+            return []
+        rows = self._run(["sacct", "-j", ",".join(job_ids), "-n", "-P", "-X",
+                          "--format=JobID,JobName,State,ExitCode,Start,End"])
+        return [
+            JobInfo(job_id, name, state.split()[0] if state else "", int(exit_code.split(":")[0] or 0),
+                    _parse_time(start), _parse_time(end))
+            for job_id, name, state, exit_code, start, end in (r for r in rows if len(r) == 6)
+        ]
+
+    def cancel(self, job_ids: Sequence[str]) -> None:
+        if job_ids:
+            subprocess.run(["scancel", *job_ids], capture_output=True, text=True, check=True)
+
+
+def parse_directives(text: str) -> Dict[str, str]:
+    """
+    The #SBATCH options of a job script, keyed by their SBATCH_MAP spelling. Like sbatch,
+    parsing stops at the first line that is neither blank nor a comment.
+    """
+    options: Dict[str, str] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or (line.startswith("#") and not line.startswith("#SBATCH")):
+            continue
+        if not line.startswith("#SBATCH"):
+            break
+        tokens = shlex.split(line[len("#SBATCH"):])
+        i = 0
+        while i < len(tokens):
+            flag, value = tokens[i], ""
+            if flag.startswith("--") and "=" in flag:
+                flag, value = flag.split("=", 1)
+            elif i + 1 < len(tokens) and not tokens[i + 1].startswith("-"):
+                value = tokens[i + 1]
+                i += 1
+            options[_OPTION_ALIASES.get(flag, flag)] = value
+            i += 1
+    return options
+
+
+def parse_array(spec: str) -> Tuple[List[int], Optional[int]]:
+    """Task IDs and concurrency limit of an --array value such as "0-9%2", "1,3,5" or "0-20:5"."""
+    ranges, _, limit = spec.partition("%")
+    tasks = set()
+    for part in ranges.split(","):
+        span, _, step = part.partition(":")
+        first, _, last = span.partition("-")
+        tasks.update(range(int(first), int(last or first) + 1, int(step or 1)))
+    if not tasks:
+        raise ValueError(f"Invalid --array specification '{spec}'")
+    return sorted(tasks), int(limit) if limit else None
+
+
+def parse_dependency(spec: str) -> List[Tuple[str, List[str]]]:
+    """Conditions of a --dependency value such as "afterok:12:13,afterany:14"; all must hold."""
+    conditions = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        kind, *ids = part.split(":")
+        if kind not in _DEPENDENCY_TYPES or not ids:
+            raise ValueError(f"Invalid --dependency specification '{spec}'")
+        conditions.append((kind, ids))
+    return conditions
+
+
+class _EmulatedJob:
+    def __init__(self, job_id: str, array_job_id: Optional[str], task_id: Optional[int], name: str, script: str,
+                 workdir: str, options: Dict[str, str], cpus: int, mem_mb: int, time_limit: Optional[int],
+                 dependency: List[Tuple[str, List[str]]], array_limit: Optional[int], task_count: int):
+        self.job_id = job_id
+        self.array_job_id = array_job_id
+        self.task_id = task_id
+        self.name = name
+        self.script = script
+        self.workdir = workdir
+        self.options = options
+        self.cpus = cpus
+        self.mem_mb = mem_mb
+        self.time_limit = time_limit
+        self.dependency = dependency
+        self.array_limit = array_limit
+        self.task_count = task_count
+        self.state = "PENDING"
+        self.reason = ""
+        self.exit_code: Optional[int] = None
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.active = False  # holds its CPUs and memory until the process has been reaped
+
+    def info(self) -> JobInfo:
+        return JobInfo(self.job_id, self.name, self.state, self.exit_code, self.start, self.end)
+
+    def log_path(self, key: str, default: str) -> str:
+        pattern = self.options.get(key) or default
+        path = (pattern.replace("%%", "\0").replace("%j", self.job_id).replace("%x", self.name)
+                .replace("%A", self.array_job_id or self.job_id).replace("%a", str(self.task_id or 0))
+                .replace("\0", "%"))
+        return os.path.join(self.workdir, path)
+
+
+class LocalSlurmEmulator(SchedulerBackend):
+    """
+    Emulates sbatch, squeue, sacct and scancel on one machine with `cpus` CPUs and
+    `mem` of memory. Job scripts run as local processes; a job starts once its
+    dependencies are satisfied and its CPUs and memory are free, in submission order
+    except that smaller jobs may start ahead of a blocked larger one.
+
+    Supported options: --job-name, --output, --error, --cpus-per-task, --mem, --time
+    (jobs are killed with state TIMEOUT), --array (with a %N throttle), --dependency
+    (after, afterany, afterok, afternotok) and --chdir. GPU and partition options are
+    accepted and ignored. Unlike SLURM, a job whose dependency can no longer be
+    satisfied is cancelled instead of pending forever. `srun` runs its command
+    directly; everything else in the script (e.g. `conda run`) runs as written.
+
+    Accounting lives in memory, so jobs are only visible to the process that submitted them.
+    """
+
+    name = "local"
+
+    def __init__(self, cpus: Optional[int] = None, mem: Optional[Any] = None, default_mem_per_cpu: str = "1G"):
+        self.cpus = cpus or os.cpu_count() or 1
+        if mem:
+            self.mem_mb = mem_megabytes(mem)
+        else:
+            self.mem_mb = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1 << 20)
+        self.default_mem_per_cpu_mb = mem_megabytes(default_mem_per_cpu)
+        self._spool = tempfile.mkdtemp(prefix="gnn_gui_slurm_")
+        bin_dir = os.path.join(self._spool, "bin")
+        os.makedirs(bin_dir)
+        with open(os.path.join(bin_dir, "srun"), "w") as f:
+            f.write(_SHIM_SRUN)
+        os.chmod(os.path.join(bin_dir, "srun"), 0o755)
+        self._bin_dir = bin_dir
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._jobs: Dict[str, _EmulatedJob] = {}
+        self._arrays: Dict[str, List[_EmulatedJob]] = {}
+        self._pending: List[_EmulatedJob] = []
+
+    # sbatch
+
+    def submit(self, script_path: str, dependency: Optional[str] = None) -> subprocess.CompletedProcess:
+        try:
+            with open(script_path, "r", encoding="utf-8") as f:
+                text = f.read()
+            options = parse_directives(text)
+            if dependency:
+                options["--dependency"] = dependency
+            cpus = int(options.get("--cpus-per-task") or 1)
+            mem_mb = mem_megabytes(options["--mem"]) if options.get("--mem") else cpus * self.default_mem_per_cpu_mb
+            time_limit = time_seconds(options["--time"]) if options.get("--time") else None
+            conditions = parse_dependency(options.get("--dependency", ""))
+            tasks, array_limit = parse_array(options["--array"]) if options.get("--array") else (None, None)
+        except (OSError, ValueError) as e:
+            return _rejected(script_path, str(e))
+        if cpus > self.cpus or mem_mb > self.mem_mb:
+            return _rejected(script_path, "Batch job submission failed: Requested node configuration is not available")
+
+        with self._cond:
+            unknown = [i for _, ids in conditions for i in ids if i not in self._jobs and i not in self._arrays]
+            if unknown:
+                return _rejected(script_path, f"Batch job submission failed: Job dependency problem ({', '.join(unknown)})")
+            job_id = str(next(self._ids))
+            spool_script = os.path.join(self._spool, f"job_{job_id}.sh")
+            with open(spool_script, "w", encoding="utf-8") as f:
+                f.write(text)  # sbatch copies the script: later edits do not affect the job
+            name = options.get("--job-name") or os.path.basename(script_path)
+            workdir = options.get("--chdir") or os.getcwd()
+            common = dict(name=name, script=spool_script, workdir=workdir, options=options, cpus=cpus, mem_mb=mem_mb,
+                          time_limit=time_limit, dependency=conditions, array_limit=array_limit)
+            if tasks is None:
+                jobs = [_EmulatedJob(job_id, None, None, task_count=1, **common)]
+            else:
+                jobs = [_EmulatedJob(f"{job_id}_{t}", job_id, t, task_count=len(tasks), **common) for t in tasks]
+                self._arrays[job_id] = jobs
+            for job in jobs:
+                self._jobs[job.job_id] = job
+            self._pending.extend(jobs)
+            self._schedule()
+        return _submitted(script_path, job_id)
+
+    # squeue, sacct, scancel
+
+    def _select(self, job_ids: Optional[Sequence[str]]) -> List[_EmulatedJob]:
+        if not job_ids:
+            return list(self._jobs.values())
+        selected: Dict[str, _EmulatedJob] = {}
+        for job_id in job_ids:
+            for job in self._arrays.get(job_id) or filter(None, [self._jobs.get(job_id)]):
+                selected[job.job_id] = job
+        return list(selected.values())
+
+    def queue(self, job_ids: Optional[Sequence[str]] = None) -> List[JobInfo]:
+        with self._cond:
+            return [j.info() for j in self._select(job_ids) if j.state in ("PENDING", "RUNNING")]
+
+    def accounting(self, job_ids: Sequence[str]) -> List[JobInfo]:
+        with self._cond:
+            return [j.info() for j in self._select(job_ids)]
+
+    def cancel(self, job_ids: Sequence[str]) -> None:
+        with self._cond:
+            for job in self._select(job_ids):
+                if job.state == "PENDING":
+                    self._pending.remove(job)
+                    self._end(job, "CANCELLED", None)
+                elif job.state == "RUNNING":
+                    self._end(job, "CANCELLED", None)
+                    try:
+                        os.killpg(job.process.pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+            self._schedule()
+
+    def wait(self, job_ids: Optional[Sequence[str]] = None, timeout: Optional[float] = None) -> bool:
+        """Blocks until the given jobs (default: all) have ended; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: all(j.state in TERMINAL_STATES and not j.active for j in self._select(job_ids)), timeout
+            )
+
+    def close(self, cancel: bool = False) -> None:
+        """Waits for (or cancels) the remaining jobs and removes the spool directory."""
+        if cancel:
+            self.cancel(list(self._jobs))
+        self.wait()
+        shutil.rmtree(self._spool, ignore_errors=True)
+
+    # Scheduling; called with the lock held
+
+    def _end(self, job: _EmulatedJob, state: str, exit_code: Optional[int], reason: str = "") -> None:
+        job.state, job.exit_code, job.reason = state, exit_code, reason
+        job.end = time.time()
+        self._cond.notify_all()
+
+    def _dependency_state(self, job: _EmulatedJob) -> Optional[bool]:
+        """True when the dependencies are satisfied, False when they never will be, None to keep waiting."""
+        for kind, ids in job.dependency:
+            targets = [t for i in ids for t in self._arrays.get(i) or [self._jobs[i]]]
+            if kind == "after":
+                if any(t.state == "PENDING" for t in targets):
+                    return None
+                continue
+            if any(t.state not in TERMINAL_STATES for t in targets):
+                if kind == "afterok" and any(t.state in TERMINAL_STATES and t.state != "COMPLETED" for t in targets):
+                    return False
+                return None
+            failed = any(t.state != "COMPLETED" for t in targets)
+            if (kind == "afterok" and failed) or (kind == "afternotok" and not failed):
+                return False
+        return True
+
+    def _schedule(self) -> None:
+        changed = True
+        while changed:
+            changed = False
+            active = [j for j in self._jobs.values() if j.active]
+            free_cpus = self.cpus - sum(j.cpus for j in active)
+            free_mem = self.mem_mb - sum(j.mem_mb for j in active)
+            running_tasks: Dict[str, int] = {}
+            for j in active:
+                if j.array_job_id:
+                    running_tasks[j.array_job_id] = running_tasks.get(j.array_job_id, 0) + 1
+            for job in list(self._pending):
+                ready = self._dependency_state(job)
+                if ready is False:
+                    self._pending.remove(job)
+                    self._end(job, "CANCELLED", None, "DependencyNeverSatisfied")
+                    changed = True  # may settle other jobs' dependencies
+                    continue
+                if ready is None or job.cpus > free_cpus or job.mem_mb > free_mem:
+                    continue
+                if job.array_limit and running_tasks.get(job.array_job_id, 0) >= job.array_limit:
+                    continue
+                self._pending.remove(job)
+                self._launch(job)
+                free_cpus -= job.cpus
+                free_mem -= job.mem_mb
+                if job.array_job_id:
+                    running_tasks[job.array_job_id] = running_tasks.get(job.array_job_id, 0) + 1
+                changed = True
+
+    def _launch(self, job: _EmulatedJob) -> None:
+        env = dict(os.environ)
+        env.update({
+            "PATH": f"{self._bin_dir}{os.pathsep}{env.get('PATH', '')}",
+            "SLURM_JOB_ID": job.job_id,
+            "SLURM_JOB_NAME": job.name,
+            "SLURM_CPUS_PER_TASK": str(job.cpus),
+            "SLURM_MEM_PER_NODE": str(job.mem_mb),
+            "SLURM_SUBMIT_DIR": job.workdir,
+        })
+        if job.array_job_id:
+            env.update({"SLURM_ARRAY_JOB_ID": job.array_job_id, "SLURM_ARRAY_TASK_ID": str(job.task_id),
+                        "SLURM_ARRAY_TASK_COUNT": str(job.task_count)})
+        default_output = "slurm-%A_%a.out" if job.array_job_id else "slurm-%j.out"
+        job.start = time.time()
+        try:
+            stdout = open(job.log_path("--output", default_output), "w")
+            stderr = open(job.log_path("--error", ""), "w") if job.options.get("--error") else subprocess.STDOUT
+            try:
+                job.process = subprocess.Popen(["bash", job.script], cwd=job.workdir, stdout=stdout, stderr=stderr,
+                                               stdin=subprocess.DEVNULL, env=env, start_new_session=True)
+            finally:
+                stdout.close()
+                if stderr is not subprocess.STDOUT:
+                    stderr.close()
+        except OSError as e:
+            self._end(job, "FAILED", 1, str(e))
+            return
+        job.state = "RUNNING"
+        job.active = True
+        threading.Thread(target=self._reap, args=(job,), daemon=True).start()
+
+    def _reap(self, job: _EmulatedJob) -> None:
+        state = None
+        try:
+            code = job.process.wait(timeout=job.time_limit)
+        except subprocess.TimeoutExpired:
+            state = "TIMEOUT"
+            try:
+                os.killpg(job.process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            code = job.process.wait()
+        exit_code = code if code >= 0 else 128 - code
+        with self._cond:
+            job.active = False
+            if job.state == "RUNNING":
+                self._end(job, state or ("COMPLETED" if code == 0 else "FAILED"), exit_code)
+            else:
+                self._cond.notify_all()
+            self._schedule()
+
+
+_BACKEND: Optional[SchedulerBackend] = None
+
+
+def backend_from_config(config: Dict[str, Any]) -> SchedulerBackend:
+    """The backend named by the config's scheduler.backend ("slurm" or "local")."""
+    settings = config.get("scheduler") or {}
+    kind = settings.get("backend") or "slurm"
+    if kind == "slurm":
+        return SlurmBackend()
+    if kind == "local":
+        return LocalSlurmEmulator(cpus=settings.get("cpus") or None, mem=settings.get("mem") or None)
+    raise ValueError(f"Unknown scheduler backend '{kind}'. Choose from slurm, local")
+
+
+def get_backend() -> SchedulerBackend:
+    global _BACKEND
+    if _BACKEND is None:
+        _BACKEND = SlurmBackend()
+    return _BACKEND
+
+
+def set_backend(backend: SchedulerBackend) -> Optional[SchedulerBackend]:
+    """Makes `backend` the one used for submission and status queries; returns the previous one."""
+    global _BACKEND
+    previous, _BACKEND = _BACKEND, backend
+    return previous
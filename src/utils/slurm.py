@@ -1,66 +1,253 @@
 import os
 import subprocess
-from typing import Dict, Any
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 import re
 from datetime import datetime
 
-def update_slurm_script(template_path: str, command: str, slurm_cfg: Dict[str, Any], jobs_dir: str, conda_env: str) -> str:
+# Mapping from config key to SBATCH directive
+SBATCH_MAP = {
+    "job_name": "--job-name",
+    "output": "--output",
+    "error": "--error",
+    "partition": "-p",
+    "gpus": "--gpus",
+    "cpus": "--cpus-per-task",
+    "mem": "--mem",
+    "time": "--time",
+    "account": "--account",
+    "qos": "--qos",
+}
+
+# Alternative spellings of the same directive, mapped to the SBATCH_MAP spelling
+_DIRECTIVE_ALIASES = {
+    "-J": "--job-name",
+    "-o": "--output",
+    "-e": "--error",
+    "--partition": "-p",
+    "-G": "--gpus",
+    "-c": "--cpus-per-task",
+    "-t": "--time",
+    "-A": "--account",
+    "-q": "--qos",
+}
+
+_DIRECTIVE_RE = re.compile(r"^#SBATCH\s+(-{1,2}[A-Za-z][\w-]*)(?:[=\s]|$)")
+_MEM_RE = re.compile(r"^\d+[KMGT]?$", re.IGNORECASE)
+_TIME_RE = re.compile(
+    r"^(?:(?P<days>\d+)-(?P<dh>\d+)(?::(?P<dm>\d{2}))?(?::(?P<ds>\d{2}))?"
+    r"|(?P<h>\d+):(?P<m>\d{2}):(?P<s>\d{2})"
+    r"|(?P<mm>\d+)(?::(?P<ss>\d{2}))?)$"
+)
+
+_TEMPLATE_CACHE: Dict[str, Tuple[int, int, "SlurmTemplate"]] = {}
+_NAME_LOCK = threading.Lock()
+
+
+def validate_mem(value: Any) -> str:
+    text = str(value).strip()
+    if not _MEM_RE.match(text):
+        raise ValueError(f"Invalid SLURM memory '{value}': expected a number with an optional K/M/G/T suffix, e.g. 700000M or 64G")
+    return text
+
+
+def validate_time(value: Any) -> str:
+    text = str(value).strip()
+    if text.upper() in ("UNLIMITED", "INFINITE"):
+        return text
+    match = _TIME_RE.match(text)
+    if not match or any(int(match.group(g)) >= 60 for g in ("dm", "ds", "m", "s", "ss") if match.group(g)):
+        raise ValueError(
+            f"Invalid SLURM time '{value}': expected MM, MM:SS, HH:MM:SS, D-HH, D-HH:MM or D-HH:MM:SS"
+        )
+    return text
+
+
+_VALIDATORS = {"mem": validate_mem, "time": validate_time}
+
+_MEM_UNITS_MB = {"K": 1 / 1024, "M": 1, "G": 1024, "T": 1024 * 1024}
+
+
+def mem_megabytes(value: Any) -> int:
+    """A SLURM memory size in megabytes (SLURM's default unit)."""
+    text = validate_mem(value).upper()
+    unit = text[-1] if text[-1] in _MEM_UNITS_MB else "M"
+    return max(1, int(int(text.rstrip("KMGT")) * _MEM_UNITS_MB[unit]))
+
+
+def time_seconds(value: Any) -> Optional[int]:
+    """A SLURM time limit in seconds, or None when unlimited."""
+    text = validate_time(value)
+    if text.upper() in ("UNLIMITED", "INFINITE"):
+        return None
+    g = {k: int(v) for k, v in _TIME_RE.match(text).groupdict().items() if v is not None}
+    if "days" in g:
+        return ((g["days"] * 24 + g["dh"]) * 60 + g.get("dm", 0)) * 60 + g.get("ds", 0)
+    if "h" in g:
+        return (g["h"] * 60 + g["m"]) * 60 + g["s"]
+    return g["mm"] * 60 + g.get("ss", 0)
+
+
+def _additional_lines(additional: Any) -> List[str]:
+    """Splits the free-form 'additional' setting (newline or ';' separated) into #SBATCH lines."""
+    lines = []
+    for item in re.split(r"[\n;]", str(additional or "")):
+        item = item.strip()
+        if not item:
+            continue
+        if item.startswith("#SBATCH"):
+            lines.append(item)
+        elif item.startswith("-"):
+            lines.append(f"#SBATCH {item}")
+        else:
+            raise ValueError(f"Invalid additional SBATCH line '{item}': expected an option such as --signal=USR1@120")
+    return lines
+
+
+class SlurmTemplate:
     """
-    Creates a new SLURM script based on a template, filling in a command and SBATCH directives.
+    A job script template parsed once into lines and a table of its #SBATCH directives.
+
+    `directives` maps each directive (in SBATCH_MAP spelling) to its line number and the
+    flag as written in the template, so rendering is a list substitution instead of a
+    regex pass per setting.
     """
+
+    def __init__(self, path: str, lines: List[str], directives: Dict[str, Tuple[int, str]]):
+        self.path = path
+        self.lines = lines
+        self.directives = directives
+
+    @classmethod
+    def parse(cls, path: str, text: str) -> "SlurmTemplate":
+        lines = text.split("\n")
+        directives: Dict[str, Tuple[int, str]] = {}
+        for n, line in enumerate(lines):
+            match = _DIRECTIVE_RE.match(line)
+            if match:
+                flag = match.group(1)
+                directives.setdefault(_DIRECTIVE_ALIASES.get(flag, flag), (n, flag))
+        return cls(path, lines, directives)
+
+    def _insert_at(self) -> int:
+        """Line after the last #SBATCH directive, or after the shebang when there is none."""
+        last = max((n for n, line in enumerate(self.lines) if line.startswith("#SBATCH")), default=None)
+        if last is not None:
+            return last + 1
+        return 1 if self.lines and self.lines[0].startswith("#!") else 0
+
+    def render(self, command: str, slurm_cfg: Dict[str, Any], conda_env: str, preamble: Sequence[str] = ()) -> str:
+        """
+        Fills directives and placeholders for one job. Directives present in the template
+        are updated in place and missing ones are inserted after the last #SBATCH line;
+        a GPU count of 0 removes the GPU request. `preamble` lines (e.g. shell variables
+        of an array task) go right before the command.
+        """
+        lines = list(self.lines)
+        removed = set()
+        inserted: List[str] = []
+        for cfg_key, sbatch_key in SBATCH_MAP.items():
+            value = slurm_cfg.get(cfg_key)
+            if cfg_key == "gpus" and value is not None and str(value).strip() == "0":
+                if sbatch_key in self.directives:
+                    removed.add(self.directives[sbatch_key][0])
+                continue
+            if value is None or value == "":
+                continue
+            value = _VALIDATORS[cfg_key](value) if cfg_key in _VALIDATORS else value
+            if sbatch_key in self.directives:
+                n, flag = self.directives[sbatch_key]
+                lines[n] = f"#SBATCH {flag} {value}"
+            else:
+                inserted.append(f"#SBATCH {sbatch_key} {value}")
+        inserted.extend(_additional_lines(slurm_cfg.get("additional")))
+
+        at = self._insert_at()
+        lines = [line for n, line in enumerate(lines[:at]) if n not in removed] + inserted + \
+                [line for n, line in enumerate(lines[at:], start=at) if n not in removed]
+        content = "\n".join(lines)
+
+        # The command from the GUI is authoritative.
+        # The srun part is added here to ensure it's always present.
+        command_line = "\n".join([*preamble, f"srun conda run -n {conda_env} {command}"])
+        content = content.replace("#COMMAND_PLACEHOLDER", command_line)
+
+        # Replace the conda activation placeholder
+        activation_env = slurm_cfg.get("conda_env", "NeuroGraph")
+        content = content.replace("#CONDA_ACTIVATION_PLACEHOLDER", f"conda activate {activation_env}")
+        return content
+
+
+def load_template(template_path: str) -> SlurmTemplate:
+    """Returns the parsed template, re-reading the file only when its mtime or size changed."""
     if not os.path.exists(template_path):
         raise FileNotFoundError(f"SLURM script template not found at: {template_path}")
+    key = os.path.abspath(template_path)
+    st = os.stat(key)
+    cached = _TEMPLATE_CACHE.get(key)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    with open(key, "r") as f:
+        template = SlurmTemplate.parse(key, f.read())
+    _TEMPLATE_CACHE[key] = (st.st_mtime_ns, st.st_size, template)
+    return template
 
-    with open(template_path, "r") as f:
-        content = f.read()
-
-    # Mapping from config key to SBATCH directive
-    sbatch_map = {
-        "job_name": "--job-name",
-        "output": "--output",
-        "error": "--error",
-        "partition": "-p",
-        "gpus": "--gpus",
-        "mem": "--mem",
-        "time": "--time",
-        "account": "--account",
-        "qos": "--qos",
-    }
-
-    # Update SBATCH directives
-    for cfg_key, sbatch_key in sbatch_map.items():
-        if cfg_key in slurm_cfg and slurm_cfg[cfg_key]:
-            new_value = slurm_cfg[cfg_key]
-            # Regex to match SBATCH directive, accommodating both space and '=' separators
-            pattern = re.compile(rf"^(#SBATCH\s+{re.escape(sbatch_key)})(?:[=\s]).*", re.MULTILINE)
-            if pattern.search(content):
-                content = pattern.sub(rf"\1 {new_value}", content)
-
-    # The command from the GUI is authoritative.
-    # The srun part is added here to ensure it's always present.
-    new_command_str = f"srun conda run -n {conda_env} {command}"
-
-    # Replace the placeholder with the new command
-    content = content.replace("#COMMAND_PLACEHOLDER", new_command_str)
-
-    # Replace the conda activation placeholder
-    conda_env = slurm_cfg.get("conda_env", "NeuroGraph")
-    conda_activation_command = f"conda activate {conda_env}"
-    content = content.replace("#CONDA_ACTIVATION_PLACEHOLDER", conda_activation_command)
-
-    # Create a new script in the jobs directory
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    job_name = slurm_cfg.get("job_name", "gnn_job").replace(" ", "_")
-    new_script_filename = f"{job_name}_{timestamp}.sh"
-    new_script_path = os.path.join(jobs_dir, new_script_filename)
 
-    os.makedirs(jobs_dir, exist_ok=True)
-    with open(new_script_path, "w", encoding="utf-8") as f:
+def _reserve_script_path(jobs_dir: str, job_name: str, timestamp: str) -> str:
+    """Claims a unique script name; jobs rendered in the same second get a numeric suffix."""
+    with _NAME_LOCK:
+        for n in range(10000):
+            suffix = f"_{n}" if n else ""
+            path = os.path.join(jobs_dir, f"{job_name}_{timestamp}{suffix}.sh")
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o750))
+                return path
+            except FileExistsError:
+                continue
+    raise FileExistsError(f"Could not find a free job script name for {job_name} in {jobs_dir}")
+
+
+def _write_atomic(path: str, content: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         f.write(content)
-    os.chmod(new_script_path, 0o750)
+    os.chmod(tmp_path, 0o750)
+    os.replace(tmp_path, path)
+
+
+class JobSpec(NamedTuple):
+    command: str
+    slurm_cfg: Dict[str, Any]
+    preamble: Sequence[str] = ()
 
-    return new_script_path
+
+def render_slurm_scripts(template_path: str, jobs: Sequence[JobSpec], jobs_dir: str, conda_env: str) -> List[str]:
+    """
+    Renders many jobs from one template. All jobs are rendered (and validated) before any
+    script is written, so an invalid setting leaves no partial batch behind.
+    """
+    template = load_template(template_path)
+    rendered = [(job.slurm_cfg, template.render(job.command, job.slurm_cfg, conda_env, job.preamble)) for job in jobs]
+
+    os.makedirs(jobs_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    paths = []
+    for slurm_cfg, content in rendered:
+        job_name = str(slurm_cfg.get("job_name") or "gnn_job").replace(" ", "_")
+        path = _reserve_script_path(jobs_dir, job_name, timestamp)
+        _write_atomic(path, content)
+        paths.append(path)
+    return paths
+
+
+def update_slurm_script(template_path: str, command: str, slurm_cfg: Dict[str, Any], jobs_dir: str, conda_env: str,
+                        preamble: Sequence[str] = ()) -> str:
+    """
+    Creates a new SLURM script based on a template, filling in a command and SBATCH directives.
+    """
+    return render_slurm_scripts(template_path, [JobSpec(command, slurm_cfg, preamble)], jobs_dir, conda_env)[0]
 
 
-def submit_job(script_path: str) -> subprocess.CompletedProcess:
-    return subprocess.run(["sbatch", script_path], check=False, capture_output=True, text=True)
+def submit_job(script_path: str, dependency: Optional[str] = None) -> subprocess.CompletedProcess:
+    command = ["sbatch", script_path] if not dependency else ["sbatch", f"--dependency={dependency}", script_path]
+    return subprocess.run(command, check=False, capture_output=True, text=True)
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINT = os.path.join(REPO_ROOT, "gnn_gui.py")
+
+
+def _run_cli(*args):
+    return subprocess.run([sys.executable, ENTRY_POINT, *args], capture_output=True, text=True, cwd=REPO_ROOT)
+
+
+def test_cli_does_not_import_pyqt():
+    """The headless entry point must start without PyQt5."""
+    code = (
+        f"import sys; sys.path.insert(0, {os.path.join(REPO_ROOT, 'src')!r}); "
+        "import cli; assert not any(m.startswith('PyQt5') for m in sys.modules), 'PyQt5 imported'"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_convert_dry_run_builds_the_gui_command(tmp_path):
+    result = _run_cli("convert", "--inputs", "a.mat", "b.mat", "--labels", "labels.mat",
+                      "--output_dir", str(tmp_path), "--rois", "100", "--node_features", "degree,spectral",
+                      "--spectral_dim", "4", "--local", "--dry-run")
+
+    assert result.returncode == 0, result.stderr
+    assert '--inputs "a.mat" "b.mat" --labels "labels.mat"' in result.stdout
+    assert "--ROIs 100 --node_features degree,spectral --spectral_dim 4" in result.stdout
+    assert "(conversion, local)" in result.stdout
+    assert f'--output_dir "{tmp_path}"' in result.stdout
+
+
+def test_convert_without_output_dir_keeps_the_script_default():
+    result = _run_cli("convert", "--inputs", "a.mat", "--labels", "labels.mat", "--local", "--dry-run")
+
+    assert result.returncode == 0, result.stderr
+    assert "--output_dir" not in result.stdout
+
+
+def test_sweep_expands_grid(tmp_path):
+    batch = tmp_path / "batch.yaml"
+    batch.write_text(textwrap.dedent("""
+        defaults:
+          slurm: false
+          script: train.py
+        runs:
+          - name: gat
+            data: /data/NCandaData500.pt
+            model: GAT
+            grid:
+              --seed: [1, 2]
+              --hidden: [32, 64]
+    """))
+
+    result = _run_cli("sweep", str(batch), "--dry-run")
+
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.strip().splitlines()
+    assert len(lines) == 4
+    assert lines[0].startswith("[gat_seed1_hidden32] (training, local) python train.py")
+    assert all("--model GATConv" in line and "--path /data" in line for line in lines)
+
+
+def test_missing_inputs_is_reported_as_error():
+    result = _run_cli("convert", "--inputs", "--labels", "labels.mat", "--dry-run")
+    assert result.returncode != 0
+
+
+def test_crossval_dry_run_expands_models_folds_and_seeds():
+    result = _run_cli("crossval", "--data", "/data/ds.pt", "--models", "GAT", "GCN", "--folds", "3",
+                      "--seeds", "1", "2", "--group", "cv", "--script", "train.py", "--local", "--dry-run")
+
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.strip().splitlines()
+    assert len(lines) == 12
+    assert lines[0].startswith("[cv.GAT.f0.s1] (training, local)")
+    assert "--seed 1" in lines[0] and "--fold 0 --split_file /data/ds.pt.folds3-seed0.json" in lines[0]
+    assert lines[-1].startswith("[cv.GCN.f2.s2]")
+
+
+def test_crossval_array_skips_duplicates_and_keeps_the_task_mapping(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(os.path.join(REPO_ROOT, "src"))
+    import cli
+    from utils.commands import SubmitResult
+
+    config = {"training": {"script_path": "template.sh"}, "slurm_training": {}, "jobs_dir": str(tmp_path)}
+    opts = {"data": "/data/ds.pt", "models": ["GAT"], "folds": 3, "seeds": [1, 2], "slurm": True}
+    runs = cli.plan_crossval(config, opts, "cv", "/data/ds.pt.folds3-seed0.json")
+    registry = cli.RunRegistry(str(tmp_path / "runs.sqlite3"))
+    done = next(r for r in runs if r.params["--fold"] == 1 and r.params["--seed"] == 1)
+    registry.finish(registry.start(done.kind, done.name, done.command, done.params,
+                                   *registry.fingerprint(done.kind, done.params, done.datasets), "local"), 0)
+    runs = cli._checked_runs(registry, runs, skip_duplicates=True)
+    assert len(runs) == 5
+
+    submitted = []
+    monkeypatch.setattr(cli, "submit_slurm", lambda template, command, cfg, jobs_dir, env, preamble: (
+        submitted.append((cfg, preamble)) or SubmitResult(True, "Submitted batch job 7", "7", "job.sh")))
+    assert cli.submit_crossval_arrays(config, runs, 3, [1, 2], registry, max_concurrent=2) == 0
+
+    cfg, preamble = submitted[0]
+    assert cfg["additional"] == "--array=0,2-5%2"
+    assert preamble[0] == "FOLD=$((SLURM_ARRAY_TASK_ID % 3))" and preamble[1] == "SEEDS=(1 2)"
+    tasks = {int(r.job_id.split("_")[1]): r.name for r in registry.runs(kind="training") if r.job_id}
+    assert tasks == {0: "cv.GAT.f0.s1", 2: "cv.GAT.f2.s1", 3: "cv.GAT.f0.s2", 4: "cv.GAT.f1.s2", 5: "cv.GAT.f2.s2"}
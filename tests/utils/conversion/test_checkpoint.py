@@ -0,0 +1,81 @@
+import os
+import signal
+import numpy as np
+import pytest
+from src.utils.conversion.checkpoint import CheckpointStore, StopRequest
+
+
+def _append_range(store, start, count, n=3):
+    x = np.full((count * n, 2), start, dtype=np.float32)
+    edges = np.zeros((2, count), dtype=np.int64)
+    return store.append(start, x, edges, np.ones(count, dtype=np.int64))
+
+
+def test_resume_returns_contiguous_verified_parts(tmp_path):
+    store = CheckpointStore(str(tmp_path / "ckpt"), "run")
+    store.start()
+    _append_range(store, 0, 2)
+    _append_range(store, 2, 2)
+
+    parts = CheckpointStore(str(tmp_path / "ckpt"), "run").valid_parts()
+
+    assert [(p.start, p.stop) for p in parts] == [(0, 2), (2, 4)]
+    x, edges, counts = store.load(parts[1])
+    assert x.shape == (6, 2) and (x == 2).all()
+
+
+def test_corrupt_part_and_everything_after_it_is_recomputed(tmp_path):
+    store = CheckpointStore(str(tmp_path / "ckpt"), "run")
+    store.start()
+    _append_range(store, 0, 2)
+    corrupt = _append_range(store, 2, 2)
+    _append_range(store, 4, 2)
+    with open(os.path.join(store.directory, corrupt.file), "ab") as f:
+        f.write(b"garbage")
+
+    assert [p.stop for p in store.valid_parts()] == [2]
+
+    _append_range(store, 2, 2)  # recomputed range is re-appended
+    assert [p.stop for p in store.valid_parts()] == [2, 4, 6]
+
+
+def test_torn_manifest_line_is_ignored(tmp_path):
+    store = CheckpointStore(str(tmp_path / "ckpt"), "run")
+    store.start()
+    _append_range(store, 0, 2)
+    with open(store.manifest_path, "a") as f:
+        f.write('{"type": "part", "fi')
+
+    assert len(store.valid_parts()) == 1
+
+
+def test_parts_appended_after_a_torn_line_survive_the_next_resume(tmp_path):
+    store = CheckpointStore(str(tmp_path / "ckpt"), "run")
+    store.start()
+    _append_range(store, 0, 2)
+    with open(store.manifest_path, "a") as f:
+        f.write('{"type": "part", "fi')  # killed while appending the record of part 2..4
+
+    resumed = CheckpointStore(str(tmp_path / "ckpt"), "run")
+    assert [p.stop for p in resumed.valid_parts()] == [2]
+    _append_range(resumed, 2, 2)
+    _append_range(resumed, 4, 2)
+
+    assert [p.stop for p in CheckpointStore(str(tmp_path / "ckpt"), "run").valid_parts()] == [2, 4, 6]
+
+
+def test_checkpoint_from_different_run_is_rejected(tmp_path):
+    CheckpointStore(str(tmp_path / "ckpt"), "run-a").start()
+    with pytest.raises(ValueError, match="different conversion"):
+        CheckpointStore(str(tmp_path / "ckpt"), "run-b").valid_parts()
+
+
+def test_stop_request_records_signal():
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        stop = StopRequest(signals=("SIGUSR1",))
+        assert not stop
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert stop and stop.signum == signal.SIGUSR1
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pytest
+import scipy.io
+
+from src.utils.conversion.estimate import (
+    DEFAULT_COST_MODEL, MAX_CHUNK_SIZE, ConversionEstimate, InputShape, choose_chunk_size, estimate_conversion,
+    load_cost_model, memory_mb, scan_input_shapes
+)
+from src.utils.conversion.feature_names import COMPUTE_BOUND_FEATURES, FEATURE_NAMES
+from src.utils.conversion.inputs import scan_input
+from src.utils.conversion.matfile import read_mat_header
+from src.utils.conversion.sparsify import SPARSIFIERS
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_mat_header_matches_scipy(tmp_path, compressed):
+    path = str(tmp_path / "conn.mat")
+    scipy.io.savemat(path, {
+        "conn": np.random.default_rng(0).random((30, 30, 7)).astype(np.float32),
+        "subject_id": np.array(["a", "b", "c", "d", "e", "f", "g"], dtype=object),
+        "age": np.arange(7.0),
+    }, do_compression=compressed)
+    header = read_mat_header(path)
+    assert [(name, shape) for name, shape, _ in header] == [(name, shape) for name, shape, _ in scipy.io.whosmat(path)]
+    assert header[0][2] == "single" and header[2][2] == "double"
+    assert scan_input_shapes([path]) == [InputShape(path, 30, 7, 4)]
+
+
+def test_estimate_and_conversion_read_the_same_variable(tmp_path):
+    path = str(tmp_path / "conn.mat")
+    scipy.io.savemat(path, {"a_mask": np.zeros((4, 5, 6)), "conn": np.zeros((8, 8, 6))})
+    with pytest.raises(ValueError, match="not square"):
+        scan_input(path)
+    with pytest.raises(ValueError, match="not square"):
+        scan_input_shapes([path])
+
+
+def test_mat_header_rejects_other_formats(tmp_path):
+    path = tmp_path / "v73.mat"
+    path.write_bytes(b"MATLAB 7.3 MAT-file".ljust(512, b" "))
+    with pytest.raises(ValueError, match="not a MATLAB 5"):
+        read_mat_header(str(path))
+
+
+def test_cost_model_covers_every_feature_and_sparsifier(tmp_path):
+    assert set(DEFAULT_COST_MODEL["features"]) == set(FEATURE_NAMES)
+    assert set(DEFAULT_COST_MODEL["sparsify_n2"]) == set(SPARSIFIERS)
+    cubic = {name for name, (_, exponent) in DEFAULT_COST_MODEL["features"].items() if exponent >= 3}
+    assert cubic == set(COMPUTE_BOUND_FEATURES)
+
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps({"base_mb": 1.0, "features": {"degree": [1.0, 2]}}))
+    model = load_cost_model(str(path))
+    assert model["base_mb"] == 1.0 and model["features"]["degree"] == [1.0, 2]
+    assert model["features"]["spectral"] == DEFAULT_COST_MODEL["features"]["spectral"]
+
+
+def test_chunk_size_fits_the_available_memory():
+    model = load_cost_model("/nonexistent.json")
+    shapes = [InputShape("a.mat", 400, 300, 8), InputShape("b.mat", 400, 200, 8)]
+    fixed = sum(memory_mb(model, shapes, 0, 400, 8000).values())
+    per_subject = memory_mb(model, shapes, 1, 400, 8000)["chunk"]
+    chunk = choose_chunk_size(model, shapes, 400, 8000, (fixed + 10.5 * per_subject) / 0.8)
+    assert chunk == 10
+    assert choose_chunk_size(model, shapes, 400, 8000, 10 ** 7) == MAX_CHUNK_SIZE
+    assert choose_chunk_size(model, shapes, 400, 8000, fixed) == 1
+    assert choose_chunk_size(model, shapes, 400, 8000, None) == 32
+
+
+def test_estimate_and_slurm_request(tmp_path):
+    path = str(tmp_path / "conn.mat")
+    scipy.io.savemat(path, {"conn": np.zeros((50, 50, 12))})
+    model = load_cost_model("/nonexistent.json")
+    cheap = estimate_conversion([path], ["degree"], model=model)
+    assert (cheap.num_subjects, cheap.num_rois, cheap.chunk_size) == (12, 50, 12)
+    assert not cheap.compute_bound and not cheap.gpu_useful
+    assert cheap.slurm_settings() == {"mem": "4G", "cpus": 2, "time": "00:30:00"}
+
+    long_run = ConversionEstimate(5000, 500, 32, {"base": 30000.0}, 2 * 86400, 8, True, True)
+    assert long_run.slurm_settings() == {"mem": "37G", "cpus": 8, "gpus": 1, "time": "4-00:15:00"}
@@ -0,0 +1,80 @@
+import networkx as nx
+import numpy as np
+import pytest
+import torch
+from src.utils.conversion.feature_names import COMPUTE_BOUND_FEATURES, FEATURE_NAMES
+from src.utils.conversion.features import FEATURE_EXTRACTORS, FeatureStage, extract_features, parse_feature_names
+from src.utils.conversion.graph_index import edges_from_stack
+
+
+def _random_graphs(batch=3, n=12, seed=0):
+    rng = np.random.default_rng(seed)
+    W = rng.random((batch, n, n)) * (rng.random((batch, n, n)) < 0.4)
+    W = np.triu(W, 1)
+    return W + W.transpose(0, 2, 1)
+
+
+def test_scalar_features_match_networkx():
+    W = _random_graphs()
+    feats = extract_features(torch.from_numpy(W), ["degree", "strength", "clustering"]).numpy()
+
+    for b in range(len(W)):
+        G = nx.from_numpy_array(W[b])
+        nodes = range(W.shape[1])
+        np.testing.assert_allclose(feats[b, :, 0], [G.degree(i) for i in nodes])
+        np.testing.assert_allclose(feats[b, :, 1], [G.degree(i, weight="weight") for i in nodes])
+        clustering = nx.clustering(G)
+        np.testing.assert_allclose(feats[b, :, 2], [clustering[i] for i in nodes])
+
+
+def test_degree_counts_the_emitted_edges():
+    rng = np.random.default_rng(1)
+    W = rng.uniform(-1, 1, (2, 9, 9))
+    W = np.where(np.abs(W) > 0.5, W + W.transpose(0, 2, 1), 0.0)
+    for positive_only in (True, False):
+        _, edge_counts = edges_from_stack(W, positive_only=positive_only)
+        degree = extract_features(torch.from_numpy(W), ["degree"], positive_only=positive_only)
+        assert degree.sum(dim=(1, 2)).tolist() == edge_counts.tolist()
+
+
+def test_eigenvector_centrality_matches_networkx():
+    W = _random_graphs(batch=1, n=10)
+    W[0] += np.ones((10, 10)) - np.eye(10)  # connected, so the leading eigenvector is unique
+    feats = extract_features(torch.from_numpy(W), ["eigenvector"]).numpy()
+
+    expected = nx.eigenvector_centrality_numpy(nx.from_numpy_array(W[0]), weight="weight")
+    np.testing.assert_allclose(feats[0, :, 0], [expected[i] for i in range(10)], atol=1e-8)
+
+
+def test_spectral_embedding_width_and_determinism():
+    W = torch.from_numpy(_random_graphs())
+    first = extract_features(W, ["spectral"], spectral_dim=4)
+    second = extract_features(W.clone(), ["spectral"], spectral_dim=4)
+
+    assert first.shape == (3, 12, 4)
+    assert torch.equal(first, second)
+    with pytest.raises(ValueError, match="between 1 and 11"):
+        extract_features(W, ["spectral"], spectral_dim=12)
+
+
+def test_feature_names_match_the_extractors():
+    assert tuple(FEATURE_EXTRACTORS) == FEATURE_NAMES
+    assert set(COMPUTE_BOUND_FEATURES) <= set(FEATURE_NAMES)
+
+
+def test_parse_feature_names_rejects_unknown():
+    assert parse_feature_names("Degree, strength") == ["degree", "strength"]
+    with pytest.raises(ValueError):
+        parse_feature_names("degree,pagerank")
+
+
+def test_feature_stage_caches_whole_stack(tmp_path):
+    W = _random_graphs(batch=4)
+    stage = FeatureStage(["degree", "clustering"], 4, 12, cache_dir=str(tmp_path), cache_key="k")
+    first = np.concatenate([stage.process(0, W[:3]), stage.process(3, W[3:])])
+    stage.finalize()
+
+    cached = FeatureStage(["degree", "clustering"], 4, 12, cache_dir=str(tmp_path), cache_key="k")
+    assert cached.from_cache
+    np.testing.assert_array_equal(cached.process(0, W[:3]), first[:36])
+    assert first.shape == (48, 2)
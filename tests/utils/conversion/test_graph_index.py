@@ -0,0 +1,85 @@
+import numpy as np
+import torch
+from torch_geometric.data import Data
+from src.utils.conversion.graph_index import (
+    GraphIndex, GraphIndexBuilder, append_graphs, edges_from_stack, index_path_for, load_graph_views
+)
+
+
+def _write_dataset(tmp_path, num_graphs=4, n=5):
+    rng = np.random.default_rng(0)
+    W = rng.random((num_graphs, n, n)) * (rng.random((num_graphs, n, n)) < 0.5)
+    edges, edge_counts = edges_from_stack(W)
+    builder = GraphIndexBuilder(num_graphs)
+    builder.set_counts(0, n, edge_counts)
+    index = builder.build([f"s{i}" for i in range(num_graphs)])
+
+    x = torch.from_numpy(W.reshape(-1, n).astype(np.float32))
+    y = torch.arange(num_graphs).view(-1, 1)
+    slices = {"x": torch.from_numpy(index.node_ptr), "edge_index": torch.from_numpy(index.edge_ptr), "y": y}
+    path = str(tmp_path / "dataset.pt")
+    torch.save((Data(x=x, edge_index=torch.from_numpy(edges), y=y), slices), path)
+    index.save(index_path_for(path))
+    return path, W
+
+
+def test_edges_from_stack_matches_per_graph_extraction():
+    rng = np.random.default_rng(1)
+    W = rng.standard_normal((3, 6, 6))
+    edges, counts = edges_from_stack(W)
+
+    expected = []
+    for w in W:
+        row, col = np.where(w > 0)
+        mask = row != col
+        expected.append(np.stack([row[mask], col[mask]]))
+    np.testing.assert_array_equal(edges, np.concatenate(expected, axis=1))
+    assert counts.tolist() == [e.shape[1] for e in expected]
+
+
+def test_index_offsets_from_counts():
+    index = GraphIndex.from_counts(np.array([3, 3, 3]), np.array([2, 0, 5]))
+    assert index.node_ptr.tolist() == [0, 3, 6, 9]
+    assert index.edge_ptr.tolist() == [0, 2, 2, 7]
+    assert index.num_edges == 7
+
+
+def test_graph_views_share_storage(tmp_path):
+    path, W = _write_dataset(tmp_path)
+    views = load_graph_views(path)
+
+    assert len(views) == 4
+    assert views.index.subject_ids == ["s0", "s1", "s2", "s3"]
+    for i, graph in enumerate(views):
+        assert graph.x.untyped_storage().data_ptr() == views.x.untyped_storage().data_ptr()
+        assert graph.edge_index.untyped_storage().data_ptr() == views.edge_index.untyped_storage().data_ptr()
+        np.testing.assert_array_equal(graph.x.numpy(), W[i].astype(np.float32))
+        assert graph.y.item() == i
+
+
+def test_shuffled_returns_the_same_objects(tmp_path):
+    path, _ = _write_dataset(tmp_path)
+    views = load_graph_views(path)
+    shuffled = list(views.shuffled(torch.Generator().manual_seed(0)))
+
+    assert sorted(id(g) for g in shuffled) == sorted(id(g) for g in views)
+
+
+def test_append_graphs_matches_converting_everything_at_once(tmp_path):
+    path, W = _write_dataset(tmp_path, num_graphs=4, n=5)
+    rng = np.random.default_rng(2)
+    W_new = rng.random((3, 5, 5)) * (rng.random((3, 5, 5)) < 0.5)
+    edges, edge_counts = edges_from_stack(W_new)
+    new_index = GraphIndex.from_counts(np.full(3, 5), edge_counts, ["t0", "t1", "t2"])
+    x, edge_index, y, index = append_graphs(
+        path, torch.from_numpy(W_new.reshape(-1, 5).astype(np.float32)), torch.from_numpy(edges),
+        torch.arange(4, 7).view(-1, 1), new_index)
+
+    W_all = np.concatenate([W, W_new])
+    all_edges, all_counts = edges_from_stack(W_all)
+    expected = GraphIndex.from_counts(np.full(7, 5), all_counts)
+    assert torch.equal(x, torch.from_numpy(W_all.reshape(-1, 5).astype(np.float32)))
+    assert torch.equal(edge_index, torch.from_numpy(all_edges))
+    assert y.view(-1).tolist() == list(range(7))
+    assert np.array_equal(index.node_ptr, expected.node_ptr) and np.array_equal(index.edge_ptr, expected.edge_ptr)
+    assert index.subject_ids == ["s0", "s1", "s2", "s3", "t0", "t1", "t2"]
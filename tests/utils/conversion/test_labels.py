@@ -0,0 +1,87 @@
+import numpy as np
+import scipy.io
+import pytest
+from src.utils.conversion import labels as labels_module
+from src.utils.conversion.labels import LabelTable
+from src.utils.conversion.inputs import scan_inputs, read_subject_ids, iter_subject_matrices
+
+
+@pytest.fixture(autouse=True)
+def clear_table_cache():
+    labels_module._TABLE_CACHE.clear()
+
+
+def _write_inputs(tmp_path, ids_per_file):
+    paths = []
+    for n, ids in enumerate(ids_per_file):
+        stack = np.random.default_rng(n).random((4, 4, len(ids)))
+        path = tmp_path / f"tasks{n}.mat"
+        scipy.io.savemat(path, {"conn": stack, "subject_id": np.array(ids, dtype=object)})
+        paths.append(str(path))
+    return paths
+
+
+def test_struct_labels_join_by_subject_id(tmp_path):
+    """Labels stored in a different order than the inputs are matched by subject ID."""
+    labels_path = tmp_path / "labels.mat"
+    scipy.io.savemat(labels_path, {"labels": {
+        "subject": np.array(["s3", "s1", "s2"], dtype=object),
+        "cddr15a": np.array([3.0, 1.0, np.nan]),
+        "other": np.array([0.0, 0.0, 0.0]),
+    }})
+    specs = scan_inputs(_write_inputs(tmp_path, [["s1", "s2"], ["s3", "s4"]]))
+    subject_ids = read_subject_ids(specs)
+    assert subject_ids == ["s1", "s2", "s3", "s4"]
+
+    table = LabelTable.from_file(str(labels_path))
+    keep, values = table.align(subject_ids, 4, "cddr15a")
+
+    assert keep.tolist() == [True, False, True, False]
+    assert values.tolist() == [1.0, 3.0]
+
+
+def test_unnamed_labels_fall_back_to_positional_join(tmp_path):
+    """A plain numeric label array aligns with subjects by row order, as before."""
+    labels_path = tmp_path / "labels.mat"
+    scipy.io.savemat(labels_path, {"y": np.array([[0.0, 9.0], [np.nan, 9.0], [1.0, 9.0]])})
+
+    table = LabelTable.from_file(str(labels_path))
+    assert not table.has_named_columns
+    keep, values = table.align(None, 3, "col0")
+
+    assert keep.tolist() == [True, False, True]
+    assert values.tolist() == [0.0, 1.0]
+
+
+def test_unknown_column_lists_available_columns(tmp_path):
+    labels_path = tmp_path / "labels.csv"
+    labels_path.write_text("subject_id,cddr15a\ns1,1\n")
+
+    table = LabelTable.from_file(str(labels_path))
+    with pytest.raises(KeyError, match="cddr15a"):
+        table.column("missing")
+
+
+def test_table_is_cached_on_disk(tmp_path):
+    labels_path = tmp_path / "labels.csv"
+    labels_path.write_text("subject_id,cddr15a\ns1,1\ns2,0\n")
+    cache_dir = tmp_path / "cache"
+
+    LabelTable.from_file(str(labels_path), cache_dir=str(cache_dir))
+    labels_module._TABLE_CACHE.clear()
+    cached = list(cache_dir.glob("labels-*.pkl"))
+    assert len(cached) == 1
+
+    table = LabelTable.from_file(str(labels_path), cache_dir=str(cache_dir))
+    assert table.by_id
+    assert table.column("CDDR15A").tolist() == [1, 0]
+
+
+def test_iter_subject_matrices_skips_masked_subjects_without_copying(tmp_path):
+    specs = scan_inputs(_write_inputs(tmp_path, [["a", "b"], ["c"]]))
+    keep = np.array([False, True, True])
+
+    yielded = list(iter_subject_matrices(specs, keep))
+
+    assert [g for g, _ in yielded] == [1, 2]
+    assert all(adj.base is not None for _, adj in yielded)
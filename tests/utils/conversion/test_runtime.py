@@ -0,0 +1,53 @@
+import os
+import numpy as np
+import torch
+from src.utils.conversion.runtime import (
+    BLAS_THREAD_VARS, DevicePolicy, allocated_cpus, configure_blas_threads, threads_from_argv
+)
+
+
+def test_allocated_cpus_follows_slurm(monkeypatch):
+    monkeypatch.setenv("SLURM_CPUS_PER_TASK", "6")
+    assert allocated_cpus() == 6
+
+
+def test_configure_blas_threads_respects_existing_settings(monkeypatch):
+    environ = {"MKL_NUM_THREADS": "2", "SLURM_CPUS_PER_TASK": "8"}
+    monkeypatch.setattr(os, "environ", environ)
+
+    assert configure_blas_threads() == 8
+    assert environ["OMP_NUM_THREADS"] == "8"
+    assert environ["MKL_NUM_THREADS"] == "2"
+    assert all(var in environ for var in BLAS_THREAD_VARS)
+
+
+def test_threads_option_sets_blas_threads_before_parsing(monkeypatch):
+    environ = {"MKL_NUM_THREADS": "2", "SLURM_CPUS_PER_TASK": "8"}
+    monkeypatch.setattr(os, "environ", environ)
+
+    threads = threads_from_argv(["--inputs", "a.mat", "--threads", "3", "--resume"])
+    assert threads == 3 and threads_from_argv(["--inputs", "a.mat"]) is None
+    assert configure_blas_threads(threads) == 3
+    assert all(environ[var] == "3" for var in BLAS_THREAD_VARS)
+
+
+def test_cpu_policy_is_zero_copy():
+    previous = torch.get_num_threads()
+    try:
+        policy = DevicePolicy("cpu", num_threads=1)
+        array = np.ones((2, 3, 3))
+        tensor = policy.to_device(array)
+
+        assert not policy.is_cuda
+        assert torch.get_num_threads() == 1
+        assert tensor.data_ptr() == array.ctypes.data
+    finally:
+        torch.set_num_threads(previous)
+
+
+def test_auto_policy_stays_on_cpu_when_gpu_not_worthwhile():
+    previous = torch.get_num_threads()
+    try:
+        assert not DevicePolicy("auto", num_threads=1, gpu_worthwhile=False).is_cuda
+    finally:
+        torch.set_num_threads(previous)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from src.utils.conversion.sparsify import (
+    SPARSIFIERS, absolute, get_sparsifier, knn, maximum_spanning_tree, mst_topk, proportional, signed,
+    sparsifier_tag, threshold_proportional
+)
+
+
+def _stack(rng, b, n, symmetric=True):
+    W = rng.uniform(-1, 1, (b, n, n))
+    return (W + W.transpose(0, 2, 1)) / 2 if symmetric else W
+
+
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_proportional_matches_the_per_subject_reference(symmetric):
+    rng = np.random.default_rng(0)
+    W = _stack(rng, 5, 12, symmetric)
+    for p in (0.05, 0.2, 0.5):
+        expected = np.stack([threshold_proportional(w, p) for w in W])
+        np.testing.assert_array_equal(proportional(W, threshold=p), expected)
+
+
+def test_mixed_batch_keeps_each_subject_symmetry():
+    rng = np.random.default_rng(1)
+    W = np.concatenate([_stack(rng, 2, 10), _stack(rng, 2, 10, symmetric=False)])
+    expected = np.stack([threshold_proportional(w, 0.1) for w in W])
+    np.testing.assert_array_equal(proportional(W, threshold=0.1), expected)
+
+
+def test_absolute_and_knn_selection():
+    rng = np.random.default_rng(2)
+    W = _stack(rng, 3, 9)
+    A = absolute(W, abs_threshold=0.4)
+    off = ~np.eye(9, dtype=bool)
+    assert ((A != 0) == ((np.abs(W) >= 0.4) & off)).all()
+
+    K = knn(W, knn=3)
+    np.testing.assert_array_equal(K, K.transpose(0, 2, 1))
+    assert ((K != 0).sum(axis=2) >= 3).all()
+    for s in range(3):
+        for i in range(9):
+            strongest = np.argsort(-np.abs(np.where(off[i], W[s, i], 0)))[:3]
+            assert (K[s, i, strongest] == W[s, i, strongest]).all()
+
+
+def _connected(mask):
+    seen, frontier = {0}, [0]
+    while frontier:
+        i = frontier.pop()
+        for j in np.nonzero(mask[i])[0]:
+            if j not in seen:
+                seen.add(int(j))
+                frontier.append(int(j))
+    return len(seen) == len(mask)
+
+
+def test_mst_topk_graphs_are_connected_at_low_density():
+    rng = np.random.default_rng(3)
+    W = _stack(rng, 4, 15)
+    S = np.abs(W)
+    tree = maximum_spanning_tree(S)
+    assert (tree.sum(axis=(1, 2)) == 2 * 14).all()
+    out = mst_topk(W, threshold=0.01)
+    for s in range(4):
+        assert _connected(out[s] != 0)
+    assert ((mst_topk(W, threshold=0.3) != 0).sum(axis=(1, 2)) == 2 * round(15 * 14 * 0.3 / 2)).all()
+
+
+def test_signed_keeps_both_signs():
+    rng = np.random.default_rng(4)
+    W = _stack(rng, 2, 10)
+    out = signed(W, threshold=0.1)
+    expected_each = 2 * round(10 * 9 * 0.1 / 2)
+    assert ((out > 0).sum(axis=(1, 2)) == expected_each).all()
+    assert ((out < 0).sum(axis=(1, 2)) == expected_each).all()
+
+
+def test_registry_and_tags():
+    assert get_sparsifier("proportional").positive_only
+    with pytest.raises(ValueError, match="Unknown sparsifier"):
+        get_sparsifier("random")
+    tags = {name: sparsifier_tag(name, threshold=0.05, abs_threshold=0.25, knn=8) for name in SPARSIFIERS}
+    assert tags == {"proportional": "5pct", "absolute": "abs0.25", "knn": "knn8", "mst_topk": "mst5pct",
+                    "signed": "signed5pct"}
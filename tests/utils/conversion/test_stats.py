@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from src.utils.conversion.graph_index import edges_from_stack
+from src.utils.conversion.report import DatasetStats, format_report
+from src.utils.conversion.stats import StatsBuilder, chunk_stats, stats_path_for
+
+
+def _symmetric(rng, n):
+    W = rng.uniform(-1, 1, (n, n))
+    return (W + W.T) / 2
+
+
+def test_chunk_stats_match_per_subject_loops():
+    rng = np.random.default_rng(0)
+    raw = np.stack([_symmetric(rng, 6) for _ in range(3)])
+    raw[2, 0, 1] += 0.5  # asymmetric input
+    raw[1, 4, 4] = np.nan
+    thresholded = np.where(np.abs(raw) > 0.4, raw, 0.0)
+    thresholded[1] = 0.0  # empty graph
+
+    stats = chunk_stats(raw, thresholded)
+    _, edge_counts = edges_from_stack(thresholded)
+    assert stats["edge_count"].tolist() == edge_counts.tolist()
+    for s in (0, 2):
+        A = (thresholded[s] > 0) & ~np.eye(6, dtype=bool)
+        weights = thresholded[s][A]
+        assert stats["density"][s] == pytest.approx(A.sum() / 30)
+        assert stats["degree_max"][s] == A.sum(1).max()
+        assert stats["isolated_nodes"][s] == (~(A.any(0) | A.any(1))).sum()
+        assert stats["weight_mean"][s] == pytest.approx(weights.mean())
+        assert stats["weight_std"][s] == pytest.approx(weights.std())
+        assert stats["weight_max"][s] == weights.max()
+        assert stats["weight_hist"][s].sum() == len(weights)
+    assert stats["isolated_nodes"][1] == 6 and np.isnan(stats["weight_mean"][1])
+    assert stats["nonfinite"].tolist() == [0, 1, 0]
+    assert stats["max_asymmetry"][0] == 0 and stats["max_asymmetry"][2] == pytest.approx(0.5)
+
+
+def test_sidecar_reads_back_and_flags_outliers(tmp_path):
+    rng = np.random.default_rng(1)
+    n_subjects = 12
+    raw = np.stack([_symmetric(rng, 8) for _ in range(n_subjects)])
+    thresholded = np.where(raw > 0.3, raw, 0.0)
+    thresholded[5] = 0.0
+    builder = StatsBuilder(n_subjects, 8)
+    builder.add(0, raw[:8], thresholded[:8])
+    builder.add(8, raw[8:], thresholded[8:])
+    path = stats_path_for(str(tmp_path / "NCandaData8.pt"))
+    ids = [f"S{i:02d}" for i in range(n_subjects)]
+    builder.save(path, ids, np.array([0] * 9 + [1] * 3), {"threshold": 0.3})
+
+    stats = DatasetStats.load(path)
+    assert stats.subject_ids == ids and stats.num_rois == 8 and stats.threshold == 0.3
+    assert stats.label_counts() == {0: 9, 1: 3}
+    assert [o.subject_id for o in stats.outliers()] == ["S05"]
+    assert "empty graph" in stats.outliers()[0].reasons
+    report = format_report(stats)
+    assert "12 subjects, 8 ROIs, threshold 0.3" in report
+    assert "Labels: 0: 9 (75.0%), 1: 3 (25.0%)" in report
+
+
+def test_small_clean_cohort_has_no_outliers(tmp_path):
+    rng = np.random.default_rng(3)
+    raw = np.stack([_symmetric(rng, 8) for _ in range(5)])
+    builder = StatsBuilder(5, 8)
+    builder.add(0, raw, np.where(raw > 0.3, raw, 0.0))
+    path = str(tmp_path / "d.stats.npz")
+    builder.save(path, list("abcde"), np.zeros(5))
+    assert DatasetStats.load(path).outliers() == []
+
+
+def test_rows_missing_from_an_older_checkpoint_are_reported(tmp_path):
+    builder = StatsBuilder(4, 3)
+    W = np.ones((2, 3, 3))
+    builder.add(2, W, W)
+    path = str(tmp_path / "d.stats.npz")
+    builder.save(path, ["a", "b", "c", "d"], np.zeros(4))
+    stats = DatasetStats.load(path)
+    assert "No statistics for 2 subjects" in "\n".join(stats.summary_lines())
+    assert stats.outliers() == []
+
+
+def test_append_to_extends_an_existing_sidecar(tmp_path):
+    rng = np.random.default_rng(2)
+    raw = np.stack([_symmetric(rng, 6) for _ in range(5)])
+    thresholded = np.where(raw > 0.3, raw, 0.0)
+    path = str(tmp_path / "d.stats.npz")
+    whole = StatsBuilder(5, 6)
+    whole.add(0, raw, thresholded)
+    whole.save(str(tmp_path / "whole.stats.npz"), list("abcde"), np.arange(5), {"threshold": 0.3})
+
+    first = StatsBuilder(3, 6)
+    first.add(0, raw[:3], thresholded[:3])
+    first.save(path, list("abc"), np.arange(3), {"threshold": 0.3})
+    second = StatsBuilder(2, 6)
+    second.add(0, raw[3:], thresholded[3:])
+    second.append_to(path, list("de"), np.arange(3, 5))
+
+    with np.load(path) as appended, np.load(str(tmp_path / "whole.stats.npz")) as expected:
+        assert set(appended.files) == set(expected.files)
+        for name in expected.files:
+            assert np.array_equal(appended[name], expected[name], equal_nan=expected[name].dtype.kind == "f")
@@ -0,0 +1,49 @@
+from src.utils.commands import (
+    build_conversion_command, build_crossval_command, build_training_command, coerce_param, conversion_params
+)
+
+
+def test_conversion_command_quotes_paths_and_adds_options():
+    command = build_conversion_command(
+        "convert.py", ["/data/a b.mat"], "/data/labels.mat", "/out", "500",
+        node_features=["degree"], spectral_dim="8", checkpoint_every="0", resume=True,
+    )
+    assert command == (
+        'python convert.py --inputs "/data/a b.mat" --labels "/data/labels.mat" --output_dir "/out" '
+        '--ROIs 500 --node_features degree --resume'
+    )
+
+
+def test_sparsifier_options_are_only_added_when_not_default():
+    base = build_conversion_command("c.py", ["a.mat"], "l.mat", "/out", "10")
+    assert build_conversion_command("c.py", ["a.mat"], "l.mat", "/out", "10", sparsifier="proportional",
+                                    sparsifier_value="0.05") == base
+    assert build_conversion_command("c.py", ["a.mat"], "l.mat", "/out", "10", sparsifier="knn",
+                                    sparsifier_value="5").endswith("--sparsifier knn --knn 5")
+    assert conversion_params(["a.mat"], "l.mat", "/out", 10) == conversion_params(
+        ["a.mat"], "l.mat", "/out", 10, sparsifier="proportional", sparsifier_value="0.05")
+    params = conversion_params(["a.mat"], "l.mat", "/out", 10, sparsifier="absolute", sparsifier_value="0.4")
+    assert (params["sparsifier"], params["sparsifier_value"]) == ("absolute", 0.4)
+    assert build_conversion_command("c.py", ["a.mat"], "l.mat", "/out", "10", append_to="/out/d.pt").endswith(
+        '--append "/out/d.pt"')
+
+
+def test_training_command_local_and_slurm():
+    params = {"--epochs": 5, "--data": "my data.pt"}
+    assert build_training_command("train.py", params) == "python train.py --epochs 5 --data 'my data.pt'"
+    assert build_training_command("job.sh", params, use_slurm=True) == "python main_NCanda.py --epochs 5 --data 'my data.pt'"
+
+
+def test_coerce_param():
+    assert coerce_param(" 16 ") == 16
+    assert coerce_param("0.1") == 0.1
+    assert coerce_param("cuda") == "cuda"
+
+
+def test_crossval_command_runs_the_headless_cli():
+    command = build_crossval_command("/data/my ds.pt", ["GAT", "GCN"], 10, [1, 2], "train.py",
+                                     {"--epochs": 5}, use_slurm=True)
+    assert command.endswith(
+        "gnn_gui.py crossval --data '/data/my ds.pt' --models GAT GCN --folds 10 --seeds 1 2 "
+        "--script train.py --slurm --param epochs=5"
+    )
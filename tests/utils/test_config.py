@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+import yaml
+
+from src.utils.config import ConfigError, ConfigService, validate_config
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = tmp_path / "default.yaml"
+    path.write_text(yaml.dump({
+        "workspace_dir": str(tmp_path), "jobs_dir": str(tmp_path / "jobs"), "logs_dir": str(tmp_path / "logs"),
+        "slurm_training": {"gpus": 2, "time": "4:00:00"},
+    }))
+    service = ConfigService(str(path), delay=0.05)
+    service.load()
+    return service
+
+
+def test_load_merges_defaults_and_creates_dirs(service, tmp_path):
+    assert service.data["slurm_training"]["gpus"] == 2
+    assert service.data["slurm"]["cpus"] == 4
+    assert os.path.isdir(tmp_path / "jobs") and os.path.isdir(tmp_path / "logs")
+
+
+def test_schema_errors_are_reported_together():
+    with pytest.raises(ConfigError) as excinfo:
+        validate_config({"theme": 3, "slurm": {"gpus": True, "mem": 16000}, "conversion": "x"})
+    message = str(excinfo.value)
+    assert "theme: expected str, got int" in message
+    assert "slurm.gpus: expected int, got bool" in message
+    assert "conversion: expected a mapping" in message
+    assert "mem" not in message
+
+
+def test_invalid_file_fails_on_load(tmp_path):
+    path = tmp_path / "bad.yaml"
+    path.write_text("slurm: [1, 2]\n")
+    with pytest.raises(ConfigError):
+        ConfigService(str(path)).load()
+
+
+def test_saves_are_coalesced(service, monkeypatch):
+    writes = []
+    real_write = service._write
+    monkeypatch.setattr(service, "_write", lambda config: (writes.append(dict(config)), real_write(config)))
+
+    for value in ("1", "16", "16G"):
+        service.data["slurm_training"]["mem"] = value
+        service.schedule_save()
+    time.sleep(0.3)
+
+    assert len(writes) == 1
+    with open(service.path) as f:
+        assert yaml.safe_load(f)["slurm_training"]["mem"] == "16G"
+    assert not os.path.exists(service.path + ".tmp")
+
+
+def test_close_writes_pending_changes(service):
+    service.delay = 60
+    service.data["theme"] = "light"
+    service.schedule_save()
+    service.close()
+    with open(service.path) as f:
+        assert yaml.safe_load(f)["theme"] == "light"
+
+
+def test_reload_only_on_external_change(service):
+    data = service.data
+    service.save()
+    assert not service.reload_if_changed()
+
+    with open(service.path) as f:
+        on_disk = yaml.safe_load(f)
+    on_disk["theme"] = "wake forest"
+    with open(service.path, "w") as f:
+        f.write(yaml.dump(on_disk) + "\n")
+
+    assert service.reload_if_changed()
+    assert service.data is data and data["theme"] == "wake forest"
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from src.utils.crossval import aggregate, fold_splits, load_cached_splits, stratified_folds, write_splits
+
+
+def test_stratified_folds_partition_and_balance():
+    labels = [0] * 70 + [1] * 30
+    folds = stratified_folds(labels, 10, seed=3)
+
+    assert sorted(i for fold in folds for i in fold) == list(range(100))
+    assert all(len(fold) == 10 for fold in folds)
+    assert all(sum(labels[i] for i in fold) == 3 for fold in folds)
+    assert folds == stratified_folds(labels, 10, seed=3)
+    assert folds != stratified_folds(labels, 10, seed=4)
+
+
+def test_continuous_labels_are_stratified_by_rank():
+    labels = [i * 0.5 for i in range(50)]
+    folds = stratified_folds(labels, 5)
+    means = [sum(labels[i] for i in fold) / len(fold) for fold in folds]
+    assert max(means) - min(means) < 2.5
+
+
+def test_fold_splits_are_disjoint():
+    splits = fold_splits(stratified_folds([0, 1] * 10, 4))
+    for split in splits:
+        train, val, test = (set(split[k]) for k in ("train", "val", "test"))
+        assert not (train & val or train & test or val & test)
+        assert len(train | val | test) == 20
+    assert [s["val"] for s in splits] == [s["test"] for s in splits[1:] + splits[:1]]
+
+
+def test_too_many_folds_raises():
+    with pytest.raises(ValueError):
+        stratified_folds([0, 1, 0], 5)
+
+
+def test_splits_are_cached_until_the_dataset_changes(tmp_path):
+    dataset = tmp_path / "ds.pt"
+    dataset.write_bytes(b"data")
+    path = write_splits(str(dataset), 2, 0, labels=[0, 1, 0, 1])
+
+    assert os.path.basename(path) == "ds.pt.folds2-seed0.json"
+    assert load_cached_splits(str(dataset), 2, 0)["num_graphs"] == 4
+    assert load_cached_splits(str(dataset), 3, 0) is None
+
+    dataset.write_bytes(b"new data")
+    assert load_cached_splits(str(dataset), 2, 0) is None
+
+
+def test_aggregate():
+    stats = aggregate([{"test": 0.7, "loss": 1.0}, {"test": 0.9}])
+    assert stats["test"] == pytest.approx((0.8, 0.1414, 2), abs=1e-4)
+    assert stats["loss"] == (1.0, 0.0, 1)
@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+from src.utils.metrics import LogTailer, MetricExtractor, TimeSeries, lttb, minmax
+
+
+def test_extractor_handles_split_lines_and_steps():
+    extractor = MetricExtractor()
+    assert extractor.feed("Epoch: 001, Loss: 0.9, Val Acc: 0.5\nEpoch: 002, Lo") == 1
+    assert extractor.feed("ss: 0.4, Val Acc: 0.7\nno metrics here\r") == 1
+
+    series = extractor.store.series
+    assert sorted(series) == ["loss", "val_acc"]
+    assert list(series["loss"].x) == [1.0, 2.0] and list(series["loss"].y) == [0.9, 0.4]
+
+
+def test_metric_names_do_not_absorb_preceding_words():
+    extractor = MetricExtractor()
+    extractor.feed("Epoch 5 Test Accuracy: 0.9, Val Loss = 0.3 | lr: 1e-3\nSeed 2 Fold 1 Train F1: 0.8\n")
+    assert sorted(extractor.store.series) == ["lr", "test_accuracy", "train_f1", "val_loss"]
+
+
+def test_configured_patterns_only_extract_those_metrics():
+    extractor = MetricExtractor(patterns={"loss": r"train loss ([\d.]+)"}, step_key="epoch")
+    extractor.feed("train loss 0.5 | lr: 0.01\ntrain loss 0.25\n")
+    series = extractor.store.series
+    assert list(series) == ["loss"]
+    assert list(series["loss"].x) == [1.0, 2.0]
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_time_series_memory_is_bounded(method):
+    series = TimeSeries(capacity=100, method=method)
+    for i in range(10_000):
+        series.append(i, math.sin(i / 100))
+    assert len(series) <= 100 and series.total == 10_000
+    assert series.x[0] == 0 and series.x[-1] == 9_999
+    xs, _ = series.points(max_points=20)
+    assert len(xs) <= 20
+
+
+def test_downsamplers_keep_ends_and_peaks():
+    xs = list(range(1000))
+    ys = [0.0] * 1000
+    ys[500] = 10.0
+    for method in (lttb, minmax):
+        keep = method(xs, ys, 50)
+        assert keep[0] == 0 and keep[-1] == 999 and 500 in keep
+        assert keep == sorted(keep) and len(keep) <= 50
+
+
+def test_log_tailer_follows_appends_and_truncation(tmp_path):
+    path = tmp_path / "job.out"
+    tailer = LogTailer(str(path))
+    assert tailer.read_new() == ""
+
+    path.write_bytes("loss: 1\nacc: é".encode("utf-8")[:-1])
+    assert tailer.read_new() == "loss: 1\nacc: "
+    with open(path, "ab") as f:
+        f.write("é".encode("utf-8")[-1:] + b"\n")
+    assert tailer.read_new() == "é\n"
+
+    path.write_text("new\n")
+    assert tailer.read_new() == "new\n"
@@ -0,0 +1,70 @@
+from src.utils.commands import conversion_params
+from src.utils.registry import RunRegistry, param_hash, parse_metrics
+
+
+def test_param_hash_ignores_file_names_and_key_order():
+    a = param_hash("training", {"--epochs": 5, "--lr": 0.01, "--data": "a.pt"}, "abc")
+    b = param_hash("training", {"--lr": 0.01, "--epochs": 5, "--data": "copy_of_a.pt"}, "abc")
+    assert a == b
+    assert a != param_hash("training", {"--lr": 0.01, "--epochs": 6}, "abc")
+    assert a != param_hash("training", {"--lr": 0.01, "--epochs": 5}, "other data")
+
+
+def test_conversion_params_match_between_gui_and_cli_values():
+    gui = conversion_params(["a.mat"], "l.mat", "/out", "500", ["degree", "spectral"], "8")
+    cli = conversion_params(["a.mat"], "l.mat", "/out", 500, ["degree", "spectral"], 8)
+    assert gui == cli
+    assert conversion_params(["a.mat"], "l.mat", "/out", 500, None, 8)["node_features"] == ["adjacency"]
+    assert conversion_params(["a.mat"], "l.mat", "/out", 500, ["degree"], 8)["spectral_dim"] is None
+
+
+def test_parse_metrics_keeps_final_values():
+    log = "Epoch: 001, Loss: 0.9, Test Acc: 0.50\nEpoch: 002, Loss: 0.4, Test Acc: 0.75\nbest val_auc = 8.1e-1\n"
+    assert parse_metrics(log) == {"loss": 0.4, "test_acc": 0.75, "best_val_auc": 0.81}
+
+
+def test_parse_metrics_skips_bookkeeping_and_applies_patterns():
+    log = "Seed: 3, Fold: 2\nStep: 10, Loss: 0.5, Test Acc: 0.7\nStep: 20, Loss: 0.3, Test Acc: 0.8\n"
+    assert parse_metrics(log, step_key="step") == {"loss": 0.3, "test_acc": 0.8}
+    assert parse_metrics(log, {"acc": r"Test Acc: ([\d.]+)"}) == {"acc": 0.8}
+
+
+def test_records_runs_and_finds_duplicates(tmp_path):
+    data = tmp_path / "data.pt"
+    data.write_bytes(b"x" * 3_000_000)
+    registry = RunRegistry(str(tmp_path / "runs.sqlite3"))
+
+    params = {"--epochs": 5, "--data": "data.pt"}
+    hash_, checksum = registry.fingerprint("training", params, [str(data)])
+    assert registry.find_by_hash(hash_) == []
+
+    run_id = registry.start("training", "gat", "python train.py", params, hash_, checksum, "local")
+    registry.finish_from_log(run_id, 0, "Test: 0.8\n")
+    slurm_id = registry.start("training", "gat", "python train.py", params, hash_, checksum, "slurm", job_id="42")
+
+    assert [r.id for r in registry.find_by_hash(hash_)] == [slurm_id, run_id]
+    assert registry.metrics(run_id) == {"test": 0.8}
+    done = registry.runs(status="completed")
+    assert [r.id for r in done] == [run_id] and done[0].exit_code == 0 and done[0].params == params
+    assert registry.runs(kind="conversion") == []
+
+    conversion_id = registry.start("conversion", "convert", "python convert.py", {}, "h", None, "local")
+    registry.finish_from_log(conversion_id, 0, "Subjects: 120, Edges: 4000\n")
+    assert registry.metrics(conversion_id) == {}
+
+    # A failed run is not a reason to skip the configuration
+    registry.finish(slurm_id, 1)
+    registry.finish(run_id, 1)
+    assert registry.find_by_hash(hash_) == []
+
+
+def test_checksum_follows_file_content(tmp_path):
+    data = tmp_path / "data.pt"
+    data.write_bytes(b"a" * 100)
+    registry = RunRegistry(str(tmp_path / "runs.sqlite3"))
+    first = registry.dataset_checksum([str(data)])
+    assert registry.dataset_checksum([str(data)]) == first
+
+    data.write_bytes(b"b" * 101)
+    assert registry.dataset_checksum([str(data)]) != first
+    assert registry.dataset_checksum([str(tmp_path / "missing.pt")]) is None
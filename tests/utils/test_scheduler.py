@@ -0,0 +1,134 @@
+import os
+import time
+
+import pytest
+
+from src.utils import scheduler
+from src.utils.commands import submit_slurm
+from src.utils.registry import RunRegistry
+from src.utils.scheduler import LocalSlurmEmulator, parse_array, parse_dependency, parse_directives
+
+
+@pytest.fixture
+def emulator():
+    backend = LocalSlurmEmulator(cpus=2, mem="4G")
+    yield backend
+    backend.close(cancel=True)
+
+
+def write_job(tmp_path, name, body, directives=()):
+    path = tmp_path / f"{name}.sh"
+    lines = ["#!/bin/bash", f"#SBATCH --job-name {name}", f"#SBATCH --output {tmp_path}/{name}-%j.out",
+             *(f"#SBATCH {d}" for d in directives), "", body, ""]
+    path.write_text("\n".join(lines))
+    return str(path)
+
+
+def submit(backend, script, dependency=None):
+    result = backend.submit(script, dependency)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()[-1]
+
+
+def states(backend, job_ids):
+    return {job.job_id: job.state for job in backend.accounting(job_ids)}
+
+
+def test_directive_parsing_stops_at_the_first_command():
+    options = parse_directives("#!/bin/bash\n#SBATCH -J conv -c 8\n#SBATCH --mem=64G\n##SBATCH --time 1:00:00\n"
+                               "echo hi\n#SBATCH --array 0-3\n")
+    assert options == {"--job-name": "conv", "--cpus-per-task": "8", "--mem": "64G"}
+
+
+def test_array_and_dependency_specs():
+    assert parse_array("0-9%2") == (list(range(10)), 2)
+    assert parse_array("1,3,8-12:2") == ([1, 3, 8, 10, 12], None)
+    assert parse_dependency("afterok:12:13,afterany:14") == [("afterok", ["12", "13"]), ("afterany", ["14"])]
+    with pytest.raises(ValueError):
+        parse_dependency("whenever:12")
+
+
+def test_job_runs_with_slurm_environment(emulator, tmp_path):
+    job_id = submit(emulator, write_job(tmp_path, "env", "srun echo $SLURM_JOB_ID $SLURM_CPUS_PER_TASK", ["-c 2"]))
+    assert emulator.wait([job_id], timeout=10)
+    (job,) = emulator.accounting([job_id])
+    assert (job.state, job.exit_code) == ("COMPLETED", 0)
+    assert job.end >= job.start
+    assert (tmp_path / f"env-{job_id}.out").read_text() == f"{job_id} 2\n"
+
+
+def test_cpus_and_memory_limit_concurrency(emulator, tmp_path):
+    script = write_job(tmp_path, "busy", f"date +%s.%N >> {tmp_path}/starts; sleep 0.3", ["--mem 1G"])
+    big = write_job(tmp_path, "big", "true", ["--mem 3G"])
+    ids = [submit(emulator, script) for _ in range(3)] + [submit(emulator, big)]
+    assert len(emulator.queue()) == 4
+    assert states(emulator, ids[2:]) == {ids[2]: "PENDING", ids[3]: "PENDING"}
+    assert emulator.wait(timeout=10)
+    assert set(states(emulator, ids).values()) == {"COMPLETED"}
+    starts = sorted(float(t) for t in (tmp_path / "starts").read_text().split())
+    assert starts[2] - starts[0] >= 0.25  # the third job waited for a free CPU
+
+
+def test_oversized_and_invalid_jobs_are_rejected(emulator, tmp_path):
+    assert emulator.submit(write_job(tmp_path, "huge", "true", ["-c 3"])).returncode == 1
+    assert emulator.submit(write_job(tmp_path, "bad", "true", ["--array 3-x"])).returncode == 1
+    result = emulator.submit(write_job(tmp_path, "orphan", "true"), dependency="afterok:999")
+    assert "dependency" in result.stderr
+
+
+def test_array_tasks_respect_the_throttle(emulator, tmp_path):
+    script = write_job(tmp_path, "arr", f"echo $SLURM_ARRAY_TASK_ID > {tmp_path}/task$SLURM_ARRAY_TASK_ID; sleep 0.2",
+                       ["--array 0-3%1"])
+    array_id = submit(emulator, script)
+    time.sleep(0.1)
+    assert [job.state for job in emulator.queue([array_id])] == ["RUNNING", "PENDING", "PENDING", "PENDING"]
+    assert emulator.wait([array_id], timeout=10)
+    assert sorted(states(emulator, [array_id])) == [f"{array_id}_{t}" for t in range(4)]
+    assert all((tmp_path / f"task{t}").read_text() == f"{t}\n" for t in range(4))
+
+
+def test_dependencies_wait_for_and_follow_the_outcome(emulator, tmp_path):
+    first = submit(emulator, write_job(tmp_path, "first", "sleep 0.2; exit 3"))
+    ok = submit(emulator, write_job(tmp_path, "ok", "true"), dependency=f"afterok:{first}")
+    any_ = submit(emulator, write_job(tmp_path, "any", "true"), dependency=f"afterany:{first}")
+    not_ok = submit(emulator, write_job(tmp_path, "notok", "true"), dependency=f"afternotok:{first}")
+    chained = submit(emulator, write_job(tmp_path, "chained", "true"), dependency=f"afterok:{ok}")
+    assert states(emulator, [any_])[any_] == "PENDING"
+    assert emulator.wait(timeout=10)
+    assert states(emulator, [first, ok, any_, not_ok, chained]) == {
+        first: "FAILED", ok: "CANCELLED", any_: "COMPLETED", not_ok: "COMPLETED", chained: "CANCELLED",
+    }
+    assert emulator.accounting([first])[0].exit_code == 3
+
+
+def test_cancel_and_timeout(emulator, tmp_path):
+    running = submit(emulator, write_job(tmp_path, "long", "sleep 30"))
+    timed = submit(emulator, write_job(tmp_path, "timed", "sleep 30", ["--time 0:01"]))
+    time.sleep(0.1)
+    emulator.cancel([running])
+    assert emulator.wait(timeout=10)
+    assert states(emulator, [running, timed]) == {running: "CANCELLED", timed: "TIMEOUT"}
+
+
+def test_submit_slurm_and_registry_refresh_through_the_backend(emulator, tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "conda").write_text('#!/bin/sh\nshift 3\nexec "$@"\n')  # conda run -n ENV cmd...
+    (bin_dir / "conda").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    template = tmp_path / "template.sh"
+    template.write_text("#!/bin/bash -l\n#SBATCH --gpus 2\n\n#COMMAND_PLACEHOLDER\n")
+    previous = scheduler.set_backend(emulator)
+    try:
+        cfg = {"job_name": "train", "output": str(tmp_path / "train-%j.log")}
+        result = submit_slurm(str(template), "echo 'Epoch: 1, Test Accuracy: 0.75'", cfg, str(tmp_path / "jobs"), "env")
+        assert result.ok and result.job_id
+        registry = RunRegistry(str(tmp_path / "runs.sqlite3"))
+        run_id = registry.start("training", "t", "cmd", {}, "h", None, "slurm", job_id=result.job_id,
+                                log_path=cfg["output"])
+        assert emulator.wait(timeout=10)
+        assert registry.refresh_slurm() == 1
+        assert registry.runs()[0].status == "completed"
+        assert registry.metrics(run_id) == {"test_accuracy": 0.75}
+    finally:
+        scheduler.set_backend(previous)
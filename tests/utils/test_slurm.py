@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from src.utils import slurm
+from src.utils.slurm import JobSpec, load_template, render_slurm_scripts, update_slurm_script, validate_time
+
+TEMPLATE = """#!/bin/bash -l
+#SBATCH --job-name Template
+#SBATCH --partition gpu
+#SBATCH --gpus 2
+##SBATCH --mem 1850000M
+#SBATCH --mem 700000M
+
+#COMMAND_PLACEHOLDER
+"""
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "job.sh"
+    path.write_text(TEMPLATE)
+    return str(path)
+
+
+def test_directives_are_replaced_and_missing_ones_inserted(template, tmp_path):
+    cfg = {"job_name": "conv", "partition": "gpu-h100", "mem": "64G", "cpus": 8, "time": "1-02:00:00",
+           "additional": "--signal=USR1@120; #SBATCH --nodes 1"}
+    path = update_slurm_script(template, "python convert.py", cfg, str(tmp_path / "jobs"), "NeuroGraph")
+    lines = open(path).read().splitlines()
+
+    assert lines[:10] == [
+        "#!/bin/bash -l",
+        "#SBATCH --job-name conv",
+        "#SBATCH --partition gpu-h100",
+        "#SBATCH --gpus 2",
+        "##SBATCH --mem 1850000M",
+        "#SBATCH --mem 64G",
+        "#SBATCH --cpus-per-task 8",
+        "#SBATCH --time 1-02:00:00",
+        "#SBATCH --signal=USR1@120",
+        "#SBATCH --nodes 1",
+    ]
+    assert "srun conda run -n NeuroGraph python convert.py" in lines
+    assert os.stat(path).st_mode & 0o777 == 0o750
+
+
+def test_zero_gpus_removes_the_request(template, tmp_path):
+    path = update_slurm_script(template, "cmd", {"gpus": 0}, str(tmp_path), "env")
+    assert "--gpus" not in open(path).read()
+
+
+@pytest.mark.parametrize("cfg", [{"mem": "lots"}, {"time": "4h"}, {"time": "1:75:00"}, {"additional": "nodes=1"}])
+def test_invalid_settings_raise_before_writing(template, tmp_path, cfg):
+    jobs = tmp_path / "jobs"
+    with pytest.raises(ValueError):
+        render_slurm_scripts(template, [JobSpec("ok", {}), JobSpec("bad", cfg)], str(jobs), "env")
+    assert not jobs.exists()
+
+
+def test_valid_time_formats():
+    for value in ("30", "30:00", "4:00:00", "2-12", "2-12:30", "2-12:30:00", "UNLIMITED"):
+        assert validate_time(value) == value
+
+
+def test_batch_render_gives_unique_paths(template, tmp_path):
+    jobs = [JobSpec(f"python train.py --seed {n}", {"job_name": "sweep"}) for n in range(5)]
+    paths = render_slurm_scripts(template, jobs, str(tmp_path), "env")
+    assert len(set(paths)) == 5
+    assert [p for p in os.listdir(tmp_path) if p.endswith(".tmp")] == []
+    assert all(f"--seed {n}" in open(p).read() for n, p in enumerate(paths))
+
+
+def test_template_is_parsed_once_until_it_changes(template, monkeypatch):
+    first = load_template(template)
+    assert load_template(template) is first
+
+    with open(template, "a") as f:
+        f.write("# edited\n")
+    second = load_template(template)
+    assert second is not first
+    assert second.lines[-2] == "# edited"
+    assert slurm._TEMPLATE_CACHE[os.path.abspath(template)][2] is second
+
+
+def test_preamble_goes_before_the_command(template, tmp_path):
+    path = update_slurm_script(template, "python train.py --fold $FOLD", {}, str(tmp_path), "env",
+                               preamble=["FOLD=$((SLURM_ARRAY_TASK_ID % 10))"])
+    lines = open(path).read().splitlines()
+    n = lines.index("FOLD=$((SLURM_ARRAY_TASK_ID % 10))")
+    assert lines[n + 1] == "srun conda run -n env python train.py --fold $FOLD"